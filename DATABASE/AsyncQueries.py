@@ -0,0 +1,123 @@
+import itertools
+import logging
+from contextlib import nullcontext
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from DATABASE.config import pool_max_size
+
+
+class _TaskSignals(QObject):
+    finished = Signal(int, object)
+    failed = Signal(int, str)
+
+
+class _QueryTask(QRunnable):
+    def __init__(self, ticket: int, function, args, kwargs, signals: _TaskSignals):
+        super().__init__()
+        # Задачей владеет Python: так её можно безопасно снять из очереди через tryTake
+        self.setAutoDelete(False)
+        self.ticket = ticket
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = signals
+
+    def run(self):
+        try:
+            result = self.function(*self.args, **self.kwargs)
+        except Exception as e:
+            logging.error(f"Ошибка фонового запроса: {e}")
+            self.signals.failed.emit(self.ticket, str(e))
+            return
+        self.signals.finished.emit(self.ticket, result)
+
+
+class AsyncQueryRunner(QObject):
+    """
+    Выполняет обращения к БД в пуле потоков и возвращает результат в GUI-поток через сигналы.
+    Задачи с одинаковым key вытесняют друг друга: устаревшая снимается из очереди,
+    а результат уже запущенной отбрасывается.
+    """
+
+    def __init__(self, parent=None, max_threads: int = pool_max_size):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self._signals = _TaskSignals(self)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        self._tickets = itertools.count(1)
+        self._tasks = {}
+        self._callbacks = {}
+        self._latest = {}
+        # Профилировщик экранов (FRAMES.profiler.FrameProfiler), если включён
+        self.tracer = None
+
+    def submit(self, function, *args, on_done=None, on_error=None, key=None, **kwargs) -> int:
+        """
+        Ставит вызов function(*args, **kwargs) в очередь пула потоков
+        :param on_done: вызывается в GUI-потоке с результатом
+        :param on_error: вызывается в GUI-потоке с текстом ошибки
+        :param key: задача с тем же ключом отменяет предыдущую
+        :return: номер задачи
+        """
+        ticket = next(self._tickets)
+        if key is not None:
+            self.cancel(key)
+            self._latest[key] = ticket
+        if self.tracer is not None:
+            function = self.tracer.trace_task(ticket, function)
+        task = _QueryTask(ticket, function, args, kwargs, self._signals)
+        self._tasks[ticket] = task
+        self._callbacks[ticket] = (on_done, on_error, key)
+        self.thread_pool.start(task)
+        return ticket
+
+    def cancel(self, key) -> None:
+        ticket = self._latest.pop(key, None)
+        if ticket is None:
+            return
+        self._callbacks.pop(ticket, None)
+        task = self._tasks.get(ticket)
+        if task is not None and self.thread_pool.tryTake(task):
+            self._tasks.pop(ticket, None)
+            if self.tracer is not None:
+                self.tracer.task_done(ticket)
+
+    def is_busy(self, key) -> bool:
+        return key in self._latest
+
+    def _take_callbacks(self, ticket: int):
+        self._tasks.pop(ticket, None)
+        callbacks = self._callbacks.pop(ticket, None)
+        if callbacks is not None and self._latest.get(callbacks[2]) == ticket:
+            del self._latest[callbacks[2]]
+        return callbacks
+
+    def _deliver(self, ticket: int, callback, value) -> None:
+        if callback is None:
+            return
+        try:
+            with self.tracer.delivering(ticket) if self.tracer is not None else nullcontext():
+                callback(value)
+        except RuntimeError as e:
+            # Экран, запросивший данные, мог быть удалён, пока выполнялся запрос
+            logging.warning(f"Результат фонового запроса не доставлен: {e}")
+
+    def _on_finished(self, ticket: int, result) -> None:
+        callbacks = self._take_callbacks(ticket)
+        if callbacks is not None:
+            self._deliver(ticket, callbacks[0], result)
+        if self.tracer is not None:
+            self.tracer.task_done(ticket)
+
+    def _on_failed(self, ticket: int, message: str) -> None:
+        callbacks = self._take_callbacks(ticket)
+        if callbacks is not None:
+            self._deliver(ticket, callbacks[1], message)
+        if self.tracer is not None:
+            self.tracer.task_done(ticket)
+
+    def wait_for_done(self, timeout_ms: int = -1) -> bool:
+        return self.thread_pool.waitForDone(timeout_ms)
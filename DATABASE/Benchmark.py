@@ -0,0 +1,341 @@
+import argparse
+import contextlib
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import psycopg
+from config import *
+from CreateTables import drop_database
+from ImportData import sync_order_code_sequence
+from Migrations import migrate
+
+# Нагрузочный прогон методов DatabaseConnection на синтетическом каталоге.
+# Запуск из папки DATABASE:  python Benchmark.py --items 10000 > result.json
+# Таблица результатов печатается в stderr, JSON — в stdout (или в --output);
+# с --baseline сравнивает медианы с прошлым прогоном и завершается с кодом 1 при регрессии.
+# Работает только с отдельной БД benchmark_database_name: таблицы в ней пересоздаются.
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from DATABASE.CatalogCache import catalog_cache
+from DATABASE.Database import DatabaseConnection
+
+# === СИНТЕТИЧЕСКИЕ ДАННЫЕ ===
+# Распределения похожи на реальный каталог: пара крупных поставщиков держит большую часть товаров,
+# у части товаров нулевой остаток, скидка у большинства нулевая, в заказе чаще 1-2 позиции
+
+SUPPLIERS = {"Kari": 40, "Обувь для вас": 30, "Спортмастер": 12, "Zenden": 8, "ЦентрОбувь": 6, "Ralf Ringer": 4}
+CATEGORIES = {"Женская обувь": 45, "Мужская обувь": 35, "Детская обувь": 15, "Аксессуары": 5}
+CREATORS = ["Rieker", "Marco Tozzi", "Alessio Nesca", "CROSBY", "Рос", "Ecco", "Tamaris", "Kapika", "Antilopa"]
+NAMES = ["Туфли", "Ботинки", "Кроссовки", "Сапоги", "Полусапоги", "Кеды", "Сандалии", "Тапочки", "Мокасины", "Лоферы"]
+COLORS = ["черный", "коричневый", "белый", "бежевый", "синий", "красный", "серый"]
+SEASONS = ["демисезонные", "зимние", "летние", "всесезонные"]
+STATUSES = {"Новый": 30, "В обработке": 20, "Завершен": 50}
+ROLES = {"Авторизированный клиент": 85, "Менеджер": 10, "Администратор": 5}
+ORDER_LINES = {1: 40, 2: 25, 3: 15, 4: 10, 5: 6, 6: 4}
+STREETS = ["Подгорная", "Шоссейная", "Садовая", "Лесная", "Полевая", "Новая", "Школьная", "Цветочная"]
+
+def weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+def dataset_size(items):
+    """Размеры таблиц для каталога из items товаров"""
+    return {
+        "items": items,
+        "pvz": max(10, items // 200),
+        "clients": max(10, items // 20),
+        "orders": max(10, items // 2),
+    }
+
+def item_rows(rng, count):
+    for number in range(1, count + 1):
+        name = rng.choice(NAMES)
+        creator = rng.choice(CREATORS)
+        category = weighted(rng, CATEGORIES)
+        sale = 0 if rng.random() < 0.6 else rng.choice([5, 10, 15, 20, 25, 30])
+        stock = 0 if rng.random() < 0.1 else int(rng.expovariate(1 / 15)) + 1
+        information = (
+            f"{name} {creator} {category.split()[0].lower()} {rng.choice(SEASONS)}, "
+            f"размер {rng.randint(35, 46)}, цвет {rng.choice(COLORS)}"
+        )
+        picture = f"{number % 50}.jpg" if rng.random() < 0.3 else ""
+        yield (
+            f"BN{number:07d}", name, "шт.", round(rng.uniform(500, 15000), 2), weighted(rng, SUPPLIERS),
+            creator, category, sale, stock, information, picture,
+        )
+
+def order_rows(rng, count, pvz_count, client_names, articles):
+    """(order_id, create, delivery, pvz, client, code, status) и строки состава (order_id, article, quantity)"""
+    orders, lines = [], []
+    today = date.today()
+    for order_id in range(1, count + 1):
+        created = today - timedelta(days=rng.randint(0, 730))
+        orders.append((
+            order_id, created, created + timedelta(days=rng.randint(2, 10)), rng.randint(1, pvz_count),
+            rng.choice(client_names), 900 + order_id, weighted(rng, STATUSES),
+        ))
+        for article in rng.sample(articles, weighted(rng, ORDER_LINES)):
+            lines.append((order_id, article, weighted(rng, {1: 70, 2: 20, 3: 10})))
+    return orders, lines
+
+def copy_rows(cursor, statement, rows):
+    with cursor.copy(statement) as copy:
+        for row in rows:
+            copy.write_row(row)
+
+def connect(dbname):
+    return psycopg.connect(user=user_name, password=user_password, host=host_address, dbname=dbname, autocommit=True)
+
+def ensure_database(dbname):
+    """Создаёт БД для замеров с той же локалью, что у рабочей (от неё зависят ILIKE и сортировка по имени)"""
+    with connect("postgres") as conn:
+        if conn.execute("SELECT 1 FROM pg_database WHERE datname = %s", (dbname,)).fetchone() is not None:
+            return
+        locale = conn.execute(
+            "SELECT datcollate, datctype FROM pg_database WHERE datname = %s", (database_name,)
+        ).fetchone()
+        options = ""
+        if locale:
+            # В БД postgres с кодировкой SQL_ASCII psycopg отдаёт строки байтами
+            collate, ctype = (value.decode() if isinstance(value, bytes) else value for value in locale)
+            options = f" LC_COLLATE '{collate}' LC_CTYPE '{ctype}'"
+        conn.execute(f"CREATE DATABASE \"{dbname}\" ENCODING 'UTF8' TEMPLATE template0{options}")
+        print(f"Создана БД {dbname}", file=sys.stderr)
+
+def seed(dbname, items, rng):
+    """Пересоздаёт схему в БД dbname и заполняет её синтетическими данными"""
+    sizes = dataset_size(items)
+    ensure_database(dbname)
+    started = time.perf_counter()
+    with connect(dbname) as conn:
+        drop_database(conn)
+        migrate(conn)
+        conn.autocommit = False
+        with conn.cursor() as cursor:
+            copy_rows(cursor, "COPY PVZ (pvz_id, pvz_address) FROM STDIN", (
+                (number, f"{rng.randint(100000, 699999)}, г. Лесной, ул. {rng.choice(STREETS)}, {rng.randint(1, 60)}")
+                for number in range(1, sizes["pvz"] + 1)
+            ))
+            client_names = [f"Клиент {number:06d}" for number in range(1, sizes["clients"] + 1)]
+            copy_rows(cursor, "COPY Client (user_role, user_name, user_login, user_password) FROM STDIN", (
+                (weighted(rng, ROLES), name, f"user{number}@bench.local", "bench")
+                for number, name in enumerate(client_names, start=1)
+            ))
+            copy_rows(cursor, """
+                COPY Items (item_article, item_name, item_edinica, item_cost, item_deliveryman, item_creator,
+                            item_category, item_sale, item_count, item_information, item_picture) FROM STDIN
+            """, item_rows(rng, sizes["items"]))
+            articles = [f"BN{number:07d}" for number in range(1, sizes["items"] + 1)]
+            orders, lines = order_rows(rng, sizes["orders"], sizes["pvz"], client_names, articles)
+            copy_rows(cursor, """
+                COPY Orders (order_id, order_create_date, order_delivery_date, order_pvz_id_fk,
+                             order_client_name, order_code, order_status) FROM STDIN
+            """, orders)
+            copy_rows(cursor, "COPY OrderItems (order_id, product_article, quantity) FROM STDIN", lines)
+            for table, column in (("PVZ", "pvz_id"), ("Orders", "order_id")):
+                cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), (SELECT MAX({column}) FROM {table}))")
+        conn.commit()
+        sync_order_code_sequence(conn)
+        conn.autocommit = True
+        conn.execute("ANALYZE")
+    sizes["order_lines"] = len(lines)
+    print(f"Данные созданы за {time.perf_counter() - started:.1f} с: {sizes}", file=sys.stderr)
+    return sizes
+
+# === ЗАМЕРЫ ===
+
+def measure(name, params, function, repeat, before=None):
+    """Один прогон вхолостую, затем repeat замеров; before() вызывается перед каждым вызовом и не замеряется"""
+    samples = []
+    rows = None
+    for run in range(repeat + 1):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        result = function()
+        elapsed = (time.perf_counter() - started) * 1000
+        if run:
+            samples.append(elapsed)
+        if isinstance(result, dict) and "items" in result:
+            rows = len(result["items"])
+        elif isinstance(result, (list, tuple)):
+            rows = len(result)
+    samples.sort()
+    return {
+        "name": name,
+        "params": params,
+        "runs": repeat,
+        "rows": rows,
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+    }
+
+def cold_cache():
+    catalog_cache.invalidate("замер")
+
+def search_filters():
+    """Наборы фильтров каталога: (параметры замера, аргументы поиска)"""
+    top_supplier = max(SUPPLIERS, key=SUPPLIERS.get)
+    texts = {"none": "", "one_word": "ботинки", "two_words": "кроссовки черный", "article": "BN00001"}
+    sorts = {"name": (False, True), "count_asc": (True, True), "count_desc": (True, False)}
+    for text_name, text in texts.items():
+        for supplier in ("", top_supplier):
+            for sort_name, (sort_by_count, sort_ascending) in sorts.items():
+                params = {"text": text_name, "supplier": supplier or "all", "sort": sort_name}
+                yield params, (text, supplier, sort_by_count, sort_ascending)
+
+def search_cases(db):
+    for params, args in search_filters():
+        yield params, (lambda args=args: db.search_and_filter_items(*args))
+
+def page_cases(db):
+    """Страницы каталога, как их запрашивает главный экран: первая и следующая после курсора первой"""
+    for params, args in search_filters():
+        yield dict(params, page="first"), (lambda args=args: db.search_items_page(*args))
+        cursor = db.search_items_page(*args)["cursor"]
+        if cursor is not None:
+            yield dict(params, page="next"), (lambda args=args, cursor=cursor: db.search_items_page(*args, after=cursor))
+
+def run_benchmarks(db, repeat, rng):
+    results = []
+    results.append(measure("get_all_items", {}, db.get_all_items, repeat, before=cold_cache))
+
+    db.search_index_enabled = False
+    for params, function in search_cases(db):
+        results.append(measure("search_and_filter_items", dict(params, engine="sql"), function, repeat, before=cold_cache))
+    for params, function in page_cases(db):
+        results.append(measure("search_items_page", dict(params, engine="sql"), function, repeat, before=cold_cache))
+    db.search_index_enabled = True
+    for params, function in search_cases(db):
+        # Индекс строится один раз (прогон вхолостую), замеряется только поиск по нему
+        results.append(measure("search_and_filter_items", dict(params, engine="index"), function, repeat))
+    # Страницы берутся из индекса, только когда он уже построен: иначе их отдаёт SQL
+    index = db.search_index()
+    for params, function in page_cases(db):
+        # Первая страница — новый поиск, следующая — из запомненной индексом выборки, как при прокрутке
+        before = index._results.clear if params["page"] == "first" else None
+        results.append(measure("search_items_page", dict(params, engine="index"), function, repeat, before=before))
+
+    results.append(measure("take_all_orders_rows", {}, db.take_all_orders_rows, repeat))
+    results.append(measure("take_orders_page", {"page": "first"}, db.take_orders_page, repeat))
+    cursor = db.take_orders_page()["cursor"]
+    if cursor is not None:
+        results.append(measure("take_orders_page", {"page": "next"}, lambda: db.take_orders_page(after=cursor), repeat))
+    order_ids = [row[0] for row in db._fetch("SELECT order_id FROM Orders")]
+    results.append(measure("get_order_by_id", {}, lambda: db.get_order_by_id(rng.choice(order_ids)), repeat))
+
+    # Создаём заказы из товаров с запасом на складе и затем удаляем их же: данные возвращаются к исходным
+    in_stock = [row[0] for row in db._fetch("SELECT item_article FROM Items WHERE item_count > %s", (repeat + 1,))]
+    pvz_ids = [row[0] for row in db._fetch("SELECT pvz_id FROM PVZ")]
+    codes = []
+
+    def create_order():
+        code = db.get_next_order_code()
+        codes.append(code)
+        today = date.today()
+        return db.create_new_order({
+            "create_date": today, "delivery_date": today + timedelta(days=3), "pvz_id": rng.choice(pvz_ids),
+            "client_name": "Benchmark", "code": code, "status": "Новый",
+            "items": [{"article": article, "quantity": 1} for article in rng.sample(in_stock, weighted(rng, ORDER_LINES))],
+        })
+
+    results.append(measure("create_new_order", {}, create_order, repeat))
+    created = [row[0] for row in db._fetch("SELECT order_id FROM Orders WHERE order_code = ANY(%s)", (codes,))]
+    if len(created) > 1:
+        results.append(measure("delete_order", {}, lambda: db.delete_order(created.pop()), min(repeat, len(created) - 1)))
+    return results
+
+# === ВЫВОД ===
+
+def result_key(result):
+    return result["name"] + json.dumps(result["params"], sort_keys=True, ensure_ascii=False)
+
+def print_table(results):
+    print(f"{'замер':<70} {'мин':>9} {'медиана':>9} {'p95':>9}  строк", file=sys.stderr)
+    for result in results:
+        params = ",".join(f"{key}={value}" for key, value in result["params"].items())
+        title = f"{result['name']}({params})" if params else result["name"]
+        print(f"{title:<70} {result['min_ms']:>9.2f} {result['median_ms']:>9.2f} {result['p95_ms']:>9.2f}  {'' if result['rows'] is None else result['rows']}",
+              file=sys.stderr)
+
+def compare(results, baseline_path, tolerance):
+    """Замеры, медиана которых выросла больше чем на tolerance относительно прошлого прогона"""
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = {result_key(result): result for result in json.load(file)["results"]}
+    regressions = []
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old and result["median_ms"] > old["median_ms"] * (1 + tolerance):
+            regressions.append({"name": result_key(result), "baseline_ms": old["median_ms"], "median_ms": result["median_ms"]})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры методов DatabaseConnection на синтетических данных")
+    parser.add_argument("--items", type=int, default=10000, help="масштаб: число товаров (ПВЗ, клиенты и заказы — пропорционально)")
+    parser.add_argument("--repeat", type=int, default=20, help="замеров на каждый метод")
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора данных")
+    parser.add_argument("--database", default=benchmark_database_name, help="БД для замеров (таблицы в ней пересоздаются)")
+    parser.add_argument("--no-seed", action="store_true", help="не пересоздавать данные, замерить на уже заполненной БД")
+    parser.add_argument("--output", help="записать JSON в файл вместо stdout")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения медиан")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимый рост медианы относительно --baseline")
+    args = parser.parse_args()
+
+    if args.database == database_name:
+        parser.error("замеры пересоздают таблицы — укажите отдельную БД, а не рабочую")
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.no_seed:
+        with connect("postgres") as conn:
+            if conn.execute("SELECT 1 FROM pg_database WHERE datname = %s", (args.database,)).fetchone() is None:
+                parser.error(f"БД {args.database} не найдена — запустите без --no-seed")
+    rng = random.Random(args.seed)
+    sizes = None
+    if not args.no_seed:
+        # Сообщения пересоздания таблиц и миграций — в stderr, stdout остаётся под JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            sizes = seed(args.database, args.items, rng)
+    db = DatabaseConnection(dbname=args.database)
+    try:
+        results = run_benchmarks(db, args.repeat, rng)
+        server_version = db._fetch("SHOW server_version", fetch_one=True)
+    finally:
+        db.close()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "database": args.database,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "sizes": sizes,
+            "python": platform.python_version(),
+            "postgres": server_version[0] if server_version else None,
+            "search_engine": search_engine,
+        },
+        "results": results,
+    }
+    print_table(results)
+    if args.baseline:
+        report["regressions"] = compare(results, args.baseline, args.tolerance)
+        for regression in report["regressions"]:
+            print(f"Регрессия: {regression['name']}: {regression['baseline_ms']} -> {regression['median_ms']} мс", file=sys.stderr)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+    return 1 if report.get("regressions") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
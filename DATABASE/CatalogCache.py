@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import psycopg
+
+from DATABASE.config import catalog_cache_size, catalog_cache_ttl, catalog_notify_channel
+
+# Метка процесса в NOTIFY: свои уведомления слушатель пропускает, кэш уже сброшен
+PROCESS_TOKEN = uuid.uuid4().hex
+
+
+class CatalogCache:
+    """Общий для процесса кэш данных каталога с вытеснением по времени жизни (TTL) и давности использования (LRU)."""
+
+    def __init__(self, max_entries: int = catalog_cache_size, ttl: float = catalog_cache_ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._version = 0
+        self._listeners = []
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key, loader):
+        """
+        Возвращает значение из кэша или загружает его через loader().
+        Возвращаемые объекты общие для всех экранов — их нельзя изменять.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            version = self._version
+
+        value = loader()
+        with self._lock:
+            # Пока шла загрузка, данные могли измениться — такой результат не кэшируем
+            if value and version == self._version:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def peek(self, key):
+        """Значение из кэша без загрузки; None — если его нет или срок жизни истёк."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def invalidate(self, reason: str = "", remote: bool = False) -> None:
+        """
+        :param remote: данные изменил другой клиент — открытые экраны об этом не знают, уведомляем слушателей
+        """
+        with self._lock:
+            self._entries.clear()
+            self._version += 1
+            listeners = list(self._listeners) if remote else []
+        logging.info(f"Кэш каталога сброшен{': ' + reason if reason else ''}")
+        for listener in listeners:
+            listener()
+
+    def add_listener(self, callback) -> None:
+        """
+        callback() вызывается после сброса кэша изменениями с другого клиента (из потока CatalogListener).
+        Свои изменения экраны обновляют сами через refresh_frame
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback) -> None:
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "version": self._version}
+
+
+catalog_cache = CatalogCache()
+
+
+class CatalogListener(threading.Thread):
+    """Слушает LISTEN-канал каталога на отдельном соединении и сбрасывает кэш при изменениях с других клиентов."""
+
+    RECONNECT_DELAY = 5.0
+
+    def __init__(self, connection_kwargs: dict, cache: CatalogCache = catalog_cache, channel: str = catalog_notify_channel):
+        super().__init__(name="CatalogListener", daemon=True)
+        self.connection_kwargs = connection_kwargs
+        self.cache = cache
+        self.channel = channel
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                with psycopg.connect(**self.connection_kwargs, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {self.channel}")
+                    logging.info(f"Подписка на изменения каталога: {self.channel}")
+                    while not self._stop_event.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            if notify.payload != PROCESS_TOKEN:
+                                self.cache.invalidate("изменения с другого клиента", remote=True)
+            except Exception as e:
+                logging.error(f"Ошибка подписки на изменения каталога: {e}")
+                self._stop_event.wait(self.RECONNECT_DELAY)
+
+    def stop(self):
+        self._stop_event.set()
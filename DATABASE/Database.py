@@ -1,85 +1,259 @@
 import logging
+import threading
+import time
 import traceback
+from contextlib import contextmanager
+
 import psycopg
 from psycopg.rows import dict_row
-from DATABASE.config import database_name, host_address, user_name, user_password
-from StaticStorage import Storage
+from DATABASE.config import (
+    database_name, host_address, user_name, user_password,
+    pool_enabled, pool_min_size, pool_max_size, pool_timeout, pool_max_lifetime, pool_max_idle,
+    search_engine, search_index_enabled, search_index_max_items, catalog_notify_channel,
+)
+from DATABASE.CatalogCache import PROCESS_TOKEN, CatalogListener, catalog_cache
+from DATABASE.OrderCodes import OrderCodeAllocator
+from DATABASE.PreparedStatements import PreparedStatements
+from DATABASE.QueryStats import QueryStats
+from DATABASE.SearchIndex import CatalogSearchIndex
+from StaticStorage import Session, Storage
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    ConnectionPool = None
+
+ITEMS_PAGE_SIZE = 50
+ORDERS_PAGE_SIZE = 50
 
 
 class DatabaseConnection:
-    ITEMS_BASE_QUERY = """
-        SELECT 
+    ITEMS_COLUMNS = """
             item_id as id, item_article as article, item_name as name,
             item_edinica as edinica, item_cost as cost, item_deliveryman as deliveryman,
             item_creator as creator, item_category as category, item_sale as sale,
             item_count as count, item_information as information,
             COALESCE(NULLIF(item_picture, ''), 'picture.png') as picture
-        FROM Items
     """
+    ITEMS_BASE_QUERY = "SELECT " + ITEMS_COLUMNS + " FROM Items"
+
+    SEARCH_FIELDS = ["item_article", "item_name", "item_edinica", "item_deliveryman", "item_creator", "item_category", "item_information"]
+    # Веса полей при ранжировании: совпадение в артикуле важнее совпадения в описании
+    SEARCH_WEIGHTS = {
+        "item_article": 8, "item_name": 4, "item_category": 2, "item_creator": 2,
+        "item_deliveryman": 2, "item_edinica": 1, "item_information": 1,
+    }
 
-    def __init__(self):
+    def __init__(self, pooled: bool = pool_enabled, dbname: str = database_name):
         logging.info("Инициализация подключения к базе данных")
-        self.connection = self.connect_to_database()
-        if self.connection:
-            self._rollback_safe()
+        self.dbname = dbname
+        self.search_index_enabled = search_index_enabled
+        self.connection = None
+        # Одиночное подключение psycopg нельзя использовать из нескольких потоков одновременно:
+        # без пула GUI-поток и фоновые запросы (AsyncQueryRunner) работают с ним по очереди
+        self._connection_lock = threading.RLock()
+        self._index_build = None
+        self._index_build_lock = threading.Lock()
+        self.catalog_listener = None
+        self.statements = PreparedStatements()
+        self.query_stats = QueryStats()
+        self.order_codes = OrderCodeAllocator(self._fetch_order_codes)
+        self.pool = self.create_pool() if pooled else None
+        if self.pool is None:
+            self.connection = self.connect_to_database()
+            if self.connection:
+                self._rollback_safe()
 
     def _rollback_safe(self):
         if self.connection is None:
             return
         try:
-            self.connection.rollback()
+            with self._connection_lock:
+                self.connection.rollback()
         except Exception as e:
             logging.error(f"Ошибка восстановления транзакции: {e}")
 
+    def _connection_kwargs(self) -> dict:
+        return {"user": user_name, "password": user_password, "host": host_address, "dbname": self.dbname}
+
     def connect_to_database(self):
         try:
-            conn = psycopg.connect(user=user_name, password=user_password, host=host_address, dbname=database_name)
+            conn = psycopg.connect(**self._connection_kwargs())
             logging.info(f"Подключено к БД: {conn}")
             return conn
         except Exception as e:
             logging.error(f"Ошибка подключения к БД: {e}")
             return None
 
+    def create_pool(self):
+        """Пул соединений: min/max размер, проверка при выдаче, ограничение времени жизни и простоя."""
+        if ConnectionPool is None:
+            logging.warning("Пакет psycopg_pool не установлен, используется одиночное подключение")
+            return None
+        try:
+            pool = ConnectionPool(
+                kwargs=self._connection_kwargs(),
+                min_size=pool_min_size,
+                max_size=pool_max_size,
+                timeout=pool_timeout,
+                max_lifetime=pool_max_lifetime,
+                max_idle=pool_max_idle,
+                check=ConnectionPool.check_connection,
+                name="demoExam",
+                open=True,
+            )
+        except Exception as e:
+            logging.error(f"Ошибка создания пула соединений: {e}")
+            return None
+        try:
+            # Открытый пул не проверяет сервер: без ожидания недоступная БД выглядела бы подключённой,
+            # а каждый запрос ждал бы соединения pool_timeout секунд
+            pool.wait(timeout=pool_timeout)
+        except Exception as e:
+            logging.error(f"Пул соединений не смог подключиться к БД за {pool_timeout} с: {e}")
+            pool.close()
+            return None
+        logging.info(f"Создан пул соединений: {pool_min_size}..{pool_max_size}")
+        return pool
+
     def ensure_connection(self):
+        if self.pool is not None:
+            return not self.pool.closed
         if self.connection is not None and not self.connection.closed:
             return True
         self.connection = self.connect_to_database()
         return self.connection is not None
 
-    def _fetch(self, query: str, params: tuple = (), fetch_one: bool = False, as_dict: bool = False):
-        """Универсальный метод чтения данных из БД"""
+    @contextmanager
+    def _connection(self):
+        """Выдаёт соединение из пула (с возвратом по выходу) либо общее одиночное подключение."""
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+        else:
+            with self._connection_lock:
+                yield self.connection
+
+    def pool_stats(self) -> dict:
+        """Счётчики пула: выдачи соединений, ожидание в очереди, время использования."""
+        if self.pool is None:
+            return {}
+        stats = self.pool.get_stats()
+        requests = stats.get("requests_num", 0)
+        queued = stats.get("requests_queued", 0)
+        stats["avg_wait_ms"] = round(stats.get("requests_wait_ms", 0) / queued, 2) if queued else 0.0
+        stats["avg_usage_ms"] = round(stats.get("usage_ms", 0) / requests, 2) if requests else 0.0
+        return stats
+
+    def start_catalog_listener(self):
+        """Подписывает процесс на изменения каталога, сделанные другими клиентами (LISTEN/NOTIFY)."""
+        if self.catalog_listener is None:
+            self.catalog_listener = CatalogListener(self._connection_kwargs())
+            self.catalog_listener.start()
+
+    def _notify_catalog_changed(self, cursor):
+        """Уведомление уходит при COMMIT той же транзакции, в которой изменён каталог."""
+        self.statements.execute(cursor, "notify_catalog", "SELECT pg_notify(%s, %s)", (catalog_notify_channel, PROCESS_TOKEN))
+
+    def close(self):
+        if self.catalog_listener is not None:
+            self.catalog_listener.stop()
+        logging.info(f"Подготовленные запросы (подготовка/выполнение): {self.statements.report()}")
+        logging.info(f"Статистика запросов: {self.query_stats.report()}")
+        if self.pool is not None:
+            logging.info(f"Статистика пула соединений: {self.pool_stats()}")
+            self.pool.close()
+        elif self.connection is not None:
+            self.connection.close()
+
+    def _fetch(self, query: str, params: tuple = (), fetch_one: bool = False, as_dict: bool = False, name: str = None,
+               label: str = None):
+        """
+        Универсальный метод чтения данных из БД
+        :param name: имя постоянного запроса — он выполняется как подготовленный (см. PreparedStatements)
+        :param label: имя в статистике запросов для неподготавливаемых запросов (по умолчанию — name)
+        """
         if not self.ensure_connection():
             return None if fetch_one else []
+        stats_name = name or label or "adhoc"
+        started = None
         try:
             row_factory = dict_row if as_dict else None
-            with self.connection.cursor(row_factory=row_factory) as cursor:
-                cursor.execute(query, params)
-                return cursor.fetchone() if fetch_one else cursor.fetchall()
+            with self._connection() as conn, conn.cursor(row_factory=row_factory) as cursor:
+                started = time.perf_counter()
+                self.statements.execute(cursor, name, query, params)
+                result = cursor.fetchone() if fetch_one else cursor.fetchall()
+                elapsed = (time.perf_counter() - started) * 1000
+            rows = [result] if fetch_one and result is not None else ([] if fetch_one else result)
+            self.query_stats.record(stats_name, elapsed, len(rows), QueryStats.payload_size(rows))
+            self._check_slow(stats_name, elapsed, query, params)
+            return result
         except Exception as e:
             logging.error(f"Ошибка выполнения запроса чтения: {e}")
             self._rollback_safe()
+            if started is not None:
+                self.query_stats.record(stats_name, (time.perf_counter() - started) * 1000, failed=True)
             return None if fetch_one else []
 
-    def _execute(self, query: str, params: tuple = ()) -> bool:
+    def _execute(self, query: str, params: tuple = (), catalog_changed: bool = False, name: str = None,
+                 label: str = None) -> bool:
         """Универсальный метод записи/обновления/удаления"""
         if not self.ensure_connection():
             return False
+        stats_name = name or label or "adhoc"
+        started = None
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute(query, params)
-                self.connection.commit()
+            with self._connection() as conn, conn.cursor() as cursor:
+                started = time.perf_counter()
+                self.statements.execute(cursor, name, query, params)
+                rows = max(cursor.rowcount, 0)
+                if catalog_changed:
+                    self._notify_catalog_changed(cursor)
+                conn.commit()
+                elapsed = (time.perf_counter() - started) * 1000
+            self.query_stats.record(stats_name, elapsed, rows)
+            self._check_slow(stats_name, elapsed, query, params, with_plan=False)
+            if catalog_changed:
+                catalog_cache.invalidate("изменение каталога")
             return True
         except Exception as e:
             logging.error(f"Ошибка выполнения записи: {e}")
             self._rollback_safe()
+            if started is not None:
+                self.query_stats.record(stats_name, (time.perf_counter() - started) * 1000, failed=True)
             return False
 
+    def _check_slow(self, name: str, elapsed_ms: float, query: str, params, with_plan: bool = True) -> None:
+        """
+        Записывает медленный запрос в журнал
+        :param with_plan: снять план через EXPLAIN без выполнения — только для чтения; записи не повторяются
+        """
+        if not self.query_stats.is_slow(elapsed_ms):
+            return
+        plan = self.explain(query, params) if with_plan and self.query_stats.should_explain(name) else None
+        self.query_stats.log_slow(name, elapsed_ms, query, plan)
+        logging.warning(f"Медленный запрос {name}: {elapsed_ms:.1f} мс" + (f"\n{plan}" if plan else ""))
+
+    def explain(self, query: str, params=()) -> str | None:
+        """
+        План запроса EXPLAIN без ANALYZE: запрос только планируется, а не выполняется повторно, поэтому
+        стоит миллисекунды даже в GUI-потоке и не трогает данные, последовательности и блокировки.
+        """
+        try:
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute("EXPLAIN " + query, params, prepare=False)
+                return "\n".join(row[0] for row in cursor.fetchall())
+        except Exception as e:
+            logging.error(f"Не удалось получить план запроса: {e}")
+            self._rollback_safe()
+            return None
+
     # === АВТОРИЗАЦИЯ И ПОЛЬЗОВАТЕЛИ ===
 
     def check_user_login_password(self, user_login: str, user_password: str) -> bool:
         logging.info(f"Проверка авторизации пользователя: {user_login}")
-        query = "SELECT user_login, user_role FROM Client WHERE user_login = %s AND user_password = %s"
-        user = self._fetch(query, (user_login, user_password), fetch_one=True, as_dict=True)
+        query = "SELECT user_role, user_name, user_login FROM Client WHERE user_login = %s AND user_password = %s"
+        user = self._fetch(query, (user_login, user_password), fetch_one=True, as_dict=True, name="user_login")
         
         if not user:
             logging.warning(f"Пользователь {user_login} не найден или пароль неверен")
@@ -87,55 +261,233 @@ class DatabaseConnection:
 
         Storage.set_user_login(user["user_login"])
         Storage.set_user_role(user["user_role"])
+        Storage.set_session(Session(user))
         logging.info(f"Пользователь {user_login} успешно авторизован, роль: {user['user_role']}")
         return True
 
     def take_user_data(self) -> dict:
+        session = Storage.get_session()
+        if session is not None:
+            return session.profile
         user_login = Storage.get_user_login()
         logging.info(f"Получение данных пользователя: {user_login}")
-        query = "SELECT user_role, user_name, user_login, user_password FROM Client WHERE user_login = %s"
-        res = self._fetch(query, (user_login,), fetch_one=True, as_dict=True)
+        query = "SELECT user_role, user_name, user_login FROM Client WHERE user_login = %s"
+        res = self._fetch(query, (user_login,), fetch_one=True, as_dict=True, name="user_data")
         
         if not res:
             logging.info("Вход выполнен как гость")
-            return {"user_role": "Гость", "user_name": "Аккаунт Гостя"}
+            res = {"user_role": "Гость", "user_name": "Аккаунт Гостя"}
+            if Storage.get_user_role() != "Гость":
+                # Профиль не прочитан из-за ошибки БД — не запоминаем гостя вместо пользователя
+                return res
+        Storage.set_session(Session(res))
         return res
 
     # === ТОВАРЫ И КАТАЛОГ ===
 
     def get_all_items(self):
+        return catalog_cache.get_or_load("items", self._load_all_items)
+
+    def _load_all_items(self):
         logging.info("Запрос на получение всех товаров из БД")
-        res = self._fetch(self.ITEMS_BASE_QUERY, as_dict=True)
+        res = self._fetch(self.ITEMS_BASE_QUERY, as_dict=True, name="all_items")
         logging.info(f"Получено товаров из БД: {len(res)}")
         return res
 
-    def search_and_filter_items(self, search_text="", company_filter="", sort_by_count=False, sort_ascending=True):
-        logging.info(f"Поиск товаров: текст='{search_text}', фильтр='{company_filter}', сортировка по кол-ву={sort_by_count}")
-        query = self.ITEMS_BASE_QUERY + " WHERE 1=1"
+    def search_index(self, wait: bool = True):
+        """
+        Индекс каталога в памяти (строится при первом поиске, сбрасывается вместе с кэшем каталога) или None
+        :param wait: False — не ждать построения: запустить его в фоновом потоке и вернуть None, пока индекс не готов
+        """
+        if not self.search_index_enabled:
+            return None
+        if not wait:
+            cached = catalog_cache.peek("search_index")
+            if cached is None:
+                self._start_search_index_build()
+                return None
+            return cached.get("index")
+        return catalog_cache.get_or_load("search_index", self._build_search_index).get("index")
+
+    def _start_search_index_build(self) -> None:
+        with self._index_build_lock:
+            if self._index_build is not None and self._index_build.is_alive():
+                return
+            self._index_build = threading.Thread(target=self.search_index, name="SearchIndexBuild", daemon=True)
+            self._index_build.start()
+
+    def _build_search_index(self) -> dict:
+        # Размер каталога проверяем до чтения товаров: большой каталог не выгружается целиком
+        # на каждом сбросе кэша, а решение «поиск через SQL» кэшируется
+        row = self._fetch("SELECT COUNT(*) FROM Items", fetch_one=True, name="items_total")
+        if row is None:
+            return {}
+        if row[0] > search_index_max_items:
+            logging.info(f"Каталог слишком велик для индекса в памяти ({row[0]} товаров), поиск через SQL")
+            return {"index": None}
+        rows = self._fetch(self.ITEMS_BASE_QUERY + " ORDER BY item_name, item_id", as_dict=True, name="items_by_name")
+        if not rows:
+            # Пустой каталог или ошибка чтения — не кэшируем, поиск пойдёт через SQL
+            return {}
+        fields = [field.removeprefix("item_") for field in self.SEARCH_FIELDS]
+        weights = {field.removeprefix("item_"): weight for field, weight in self.SEARCH_WEIGHTS.items()}
+        index = CatalogSearchIndex(rows, fields, weights)
+        logging.info(f"Построен индекс поиска: {len(rows)} товаров, {len(index.postings)} триграмм")
+        return {"index": index}
+
+    @staticmethod
+    def _search_words(search_text: str) -> list[str]:
+        return [w.strip() for w in search_text.split() if w.strip()] if search_text else []
+
+    @staticmethod
+    def _ranked(words, sort_by_count) -> bool:
+        return search_engine == "trigram" and bool(words) and not sort_by_count
+
+    def _items_filter(self, words, company_filter=""):
+        where = " WHERE 1=1"
         params = []
 
-        if search_text:
-            words = [w.strip() for w in search_text.split() if w.strip()]
-            fields = ["item_article", "item_name", "item_edinica", "item_deliveryman", "item_creator", "item_category", "item_information"]
-            conds = []
-            for word in words:
-                conds.append(f"({' OR '.join(f'{f} ILIKE %s' for f in fields)})")
-                params.extend([f"%{word}%"] * len(fields))
-            if conds:
-                query += f" AND ({' AND '.join(conds)})"
+        conds = []
+        for word in words:
+            if search_engine == "trigram":
+                # item_search — склейка тех же полей, её покрывает GIN-индекс gin_trgm_ops
+                conds.append("item_search ILIKE %s")
+                params.append(f"%{word}%")
+            else:
+                conds.append(f"({' OR '.join(f'{f} ILIKE %s' for f in self.SEARCH_FIELDS)})")
+                params.extend([f"%{word}%"] * len(self.SEARCH_FIELDS))
+        if conds:
+            where += f" AND ({' AND '.join(conds)})"
 
         if company_filter and company_filter != "Все поставщики":
-            query += " AND item_deliveryman = %s"
+            where += " AND item_deliveryman = %s"
             params.append(company_filter)
+        return where, params
+
+    def _items_select(self, words, ranked: bool):
+        """SELECT товаров; при ранжировании добавляет столбец relevance — сумму весов полей с совпадениями."""
+        if not ranked:
+            return self.ITEMS_BASE_QUERY, []
+        terms = []
+        params = []
+        for word in words:
+            for field, weight in self.SEARCH_WEIGHTS.items():
+                terms.append(f"CASE WHEN {field} ILIKE %s THEN {weight} ELSE 0 END")
+                params.append(f"%{word}%")
+        return f"SELECT {self.ITEMS_COLUMNS}, ({' + '.join(terms)}) as relevance FROM Items", params
+
+    @staticmethod
+    def _items_order(sort_by_count=False, sort_ascending=True, ranked=False):
+        """Ключ сортировки [(столбец, направление)]; id делает порядок однозначным для курсора."""
+        if sort_by_count:
+            direction = "ASC" if sort_ascending else "DESC"
+            return [("count", direction), ("id", direction)]
+        if ranked:
+            return [("relevance", "DESC"), ("name", "ASC"), ("id", "ASC")]
+        return [("name", "ASC"), ("id", "ASC")]
+
+    @staticmethod
+    def _keyset_condition(order, cursor):
+        """Условие «строго после курсора» для ключа сортировки order."""
+        directions = {direction for _, direction in order}
+        if len(directions) == 1:
+            operator = ">" if directions == {"ASC"} else "<"
+            columns = ", ".join(column for column, _ in order)
+            return f"({columns}) {operator} ({', '.join(['%s'] * len(order))})", list(cursor)
+        conds = []
+        params = []
+        for position, (column, direction) in enumerate(order):
+            operator = ">" if direction == "ASC" else "<"
+            conds.append(" AND ".join([f"{c} = %s" for c, _ in order[:position]] + [f"{column} {operator} %s"]))
+            params.extend(cursor[:position + 1])
+        return "(" + " OR ".join(f"({cond})" for cond in conds) + ")", params
+
+    def _items_query(self, search_text, company_filter, sort_by_count, sort_ascending):
+        words = self._search_words(search_text)
+        ranked = self._ranked(words, sort_by_count)
+        select, select_params = self._items_select(words, ranked)
+        where, where_params = self._items_filter(words, company_filter)
+        order = self._items_order(sort_by_count, sort_ascending, ranked)
+        return select + where, select_params + where_params, where, where_params, order
 
-        query += f" ORDER BY item_count {'ASC' if sort_ascending else 'DESC'}" if sort_by_count else " ORDER BY item_name"
-        res = self._fetch(query, tuple(params), as_dict=True)
+    def search_and_filter_items(self, search_text="", company_filter="", sort_by_count=False, sort_ascending=True):
+        logging.info(f"Поиск товаров: текст='{search_text}', фильтр='{company_filter}', сортировка по кол-ву={sort_by_count}")
+        index = self.search_index()
+        if index is not None:
+            words = self._search_words(search_text)
+            ranked = self._ranked(words, sort_by_count)
+            positions, relevance = index.search(
+                words, company_filter, sort_by_count, sort_ascending, ranked, whole_text=search_engine == "trigram"
+            )
+            res = [{**index.items[p], "relevance": relevance[p]} if ranked else index.items[p] for p in positions]
+            logging.info(f"Поиск по индексу завершен, найдено товаров: {len(res)}")
+            return res
+        query, params, _, _, order = self._items_query(search_text, company_filter, sort_by_count, sort_ascending)
+        query = f"SELECT * FROM ({query}) AS catalog ORDER BY " + ", ".join(f"{c} {d}" for c, d in order)
+        res = self._fetch(query, tuple(params), as_dict=True, label="search_items")
         logging.info(f"Поиск завершен, найдено товаров: {len(res)}")
         return res
 
+    def search_items_page(self, search_text="", company_filter="", sort_by_count=False, sort_ascending=True,
+                          after=None, limit=ITEMS_PAGE_SIZE) -> dict:
+        """
+        Страница каталога с keyset-курсором вместо OFFSET
+        :param after: курсор из предыдущей страницы (None — первая страница)
+        :return: {"items": [...], "cursor": курсор следующей страницы или None, "total": всего строк (только для первой страницы)}
+        """
+        # Пока индекс строится в фоне, страницы отдаёт SQL: первая страница не ждёт выгрузки всего каталога.
+        # Курсор в обоих случаях — значения столбцов сортировки, поэтому продолжать можно любым способом
+        index = self.search_index(wait=False)
+        if index is not None:
+            words = self._search_words(search_text)
+            ranked = self._ranked(words, sort_by_count)
+            page = index.page(
+                words, company_filter, sort_by_count, sort_ascending, ranked,
+                self._items_order(sort_by_count, sort_ascending, ranked), after, limit,
+                whole_text=search_engine == "trigram",
+            )
+            if page is not None:
+                logging.info(f"Страница товаров из индекса: {len(page['items'])} строк, всего: {page['total']}")
+                return page
+        key = ("page", search_text, company_filter, sort_by_count, sort_ascending, after, limit)
+        return catalog_cache.get_or_load(
+            key,
+            lambda: self._load_items_page(search_text, company_filter, sort_by_count, sort_ascending, after, limit),
+        )
+
+    def _load_items_page(self, search_text, company_filter, sort_by_count, sort_ascending, after, limit) -> dict:
+        query, params, where, where_params, order = self._items_query(
+            search_text, company_filter, sort_by_count, sort_ascending
+        )
+        query = f"SELECT * FROM ({query}) AS catalog"
+        page_params = list(params)
+        if after is not None:
+            condition, cursor_params = self._keyset_condition(order, after)
+            query += " WHERE " + condition
+            page_params.extend(cursor_params)
+        query += " ORDER BY " + ", ".join(f"{c} {d}" for c, d in order) + " LIMIT %s"
+        page_params.append(limit + 1)
+
+        rows = self._fetch(query, tuple(page_params), as_dict=True, label="items_page")
+        items = rows[:limit]
+        cursor = tuple(items[-1][column] for column, _ in order) if len(rows) > limit else None
+
+        total = None
+        if after is None:
+            row = self._fetch("SELECT COUNT(*) FROM Items" + where, tuple(where_params), fetch_one=True, label="items_count")
+            total = row[0] if row else len(items)
+        logging.info(f"Страница товаров: {len(items)} строк, всего: {total}")
+        return {"items": items, "cursor": cursor, "total": total}
+
+    def get_items_page(self, after=None, limit=ITEMS_PAGE_SIZE) -> dict:
+        return self.search_items_page(after=after, limit=limit)
+
     def take_all_deliveryman(self):
+        return catalog_cache.get_or_load("deliverymen", self._load_all_deliveryman)
+
+    def _load_all_deliveryman(self):
         logging.info("Запрос всех поставщиков из БД")
-        rows = self._fetch("SELECT DISTINCT item_deliveryman FROM Items ORDER BY item_deliveryman")
+        rows = self._fetch("SELECT DISTINCT item_deliveryman FROM Items ORDER BY item_deliveryman", name="deliverymen")
         res = ["Все поставщики"] + [r[0] for r in rows if r[0]]
         logging.info(f"Получено поставщиков: {len(res)-1}")
         return res
@@ -151,7 +503,7 @@ class DatabaseConnection:
                    item_information as information, COALESCE(item_picture, '') as picture
             FROM Items WHERE item_id = %s
         """
-        res = self._fetch(query, (item_id,), fetch_one=True, as_dict=True) or {}
+        res = self._fetch(query, (item_id,), fetch_one=True, as_dict=True, name="item_single") or {}
         if "cost" in res:
             res["cost"] = float(res["cost"])
         return res
@@ -169,7 +521,7 @@ class DatabaseConnection:
             product["category"], product["sale"], product["count"],
             product["information"], item_id,
         )
-        return self._execute(query, tuple(params))
+        return self._execute(query, tuple(params), catalog_changed=True, name="update_item")
 
     def create_new_card(self, product: dict, picture_name: str):
         query = """
@@ -182,14 +534,29 @@ class DatabaseConnection:
             product["deliveryman"], product["creator"], product["category"],
             product["sale"], product["count"], product["information"], picture_name,
         )
-        return self._execute(query, params)
+        return self._execute(query, params, catalog_changed=True, name="create_item")
+
+    def referenced_pictures(self) -> set | None:
+        """Имена картинок, на которые ссылаются товары; None — если прочитать их не удалось."""
+        row = self._fetch(
+            "SELECT COALESCE(array_agg(DISTINCT item_picture), '{}') FROM Items WHERE item_picture <> ''",
+            fetch_one=True, name="referenced_pictures",
+        )
+        return None if row is None else set(row[0])
+
+    def rename_picture(self, old_name: str, new_name: str) -> bool:
+        """Переписывает ссылки всех товаров с картинки old_name на new_name."""
+        return self._execute(
+            "UPDATE Items SET item_picture = %s WHERE item_picture = %s",
+            (new_name, old_name), catalog_changed=True, name="rename_picture",
+        )
 
     def delete_item(self, item_article: str):
         item_id = Storage.get_item_id()
         if self.check_product_in_orders(item_article):
             logging.warning(f"Товар {item_article} используется в заказах, удаление отменено")
             return False
-        return self._execute("DELETE FROM Items WHERE item_id = %s", (item_id,))
+        return self._execute("DELETE FROM Items WHERE item_id = %s", (item_id,), catalog_changed=True, name="delete_item")
 
     def take_all_text_data_for_combo_box(self, type_of_data: str):
         col_map = {"category": "item_category", "deliveryman": "item_deliveryman", "creator": "item_creator"}
@@ -197,7 +564,7 @@ class DatabaseConnection:
         if not col:
             return []
         query = f"SELECT DISTINCT {col} FROM Items WHERE {col} IS NOT NULL AND {col} != '' ORDER BY {col}"
-        return [str(r[0]) for r in self._fetch(query)]
+        return catalog_cache.get_or_load(("combo", col), lambda: [str(r[0]) for r in self._fetch(query, name=f"combo_{col}")])
 
     def article_exists(self, article: str, exclude_id=None) -> bool:
         query = "SELECT COUNT(*) FROM Items WHERE item_article = %s"
@@ -205,46 +572,78 @@ class DatabaseConnection:
         if exclude_id is not None:
             query += " AND item_id != %s"
             params.append(exclude_id)
-        row = self._fetch(query, tuple(params), fetch_one=True)
+        row = self._fetch(query, tuple(params), fetch_one=True, name="article_exists" if exclude_id is None else "article_exists_other")
         return bool(row and row[0])
 
     # === ЗАКАЗЫ И ПВЗ ===
 
+    # Состав заказа агрегируется LATERAL-подзапросом только для строк, уже отобранных по order_id
+    ORDERS_QUERY = """
+        SELECT o.order_id as id, o.order_status as status, o.order_pvz_id_fk as pvz,
+               o.order_create_date as create_date, o.order_delivery_date as delivery_date,
+               o.order_client_name as client_name, p.pvz_address,
+               COALESCE(lines.article, 'ORD' || o.order_id::text) as article
+        FROM ({orders}) o
+        JOIN PVZ p ON p.pvz_id = o.order_pvz_id_fk
+        LEFT JOIN LATERAL (
+            SELECT string_agg(oi.product_article || ', ' || oi.quantity::text, ', ' ORDER BY oi.order_item_id) as article
+            FROM OrderItems oi WHERE oi.order_id = o.order_id
+        ) lines ON true
+        ORDER BY o.order_id
+    """
+
     def take_all_orders_rows(self):
-        query = """
-            SELECT o.order_id as id, o.order_status as status, o.order_pvz_id_fk as pvz,
-                   o.order_create_date as create_date, o.order_delivery_date as delivery_date,
-                   o.order_client_name as client_name, p.pvz_address,
-                   COALESCE((
-                       SELECT string_agg(oi.product_article || ', ' || oi.quantity::text, ', ' ORDER BY oi.order_item_id)
-                       FROM OrderItems oi WHERE oi.order_id = o.order_id
-                   ), 'ORD' || o.order_id::text) as article
-            FROM Orders o
-            JOIN PVZ p ON p.pvz_id = o.order_pvz_id_fk
-            ORDER BY o.order_id
+        return self._fetch(self.ORDERS_QUERY.format(orders="SELECT * FROM Orders"), as_dict=True, name="all_orders")
+
+    def take_orders_page(self, after=None, limit=ORDERS_PAGE_SIZE) -> dict:
         """
-        return self._fetch(query, as_dict=True)
+        Страница списка заказов в порядке order_id
+        :param after: курсор предыдущей страницы (последний order_id), None — первая страница
+        :return: {"items": [...], "cursor": курсор следующей страницы или None, "total": число заказов (только для первой)}
+        """
+        orders = "SELECT * FROM Orders WHERE order_id > %s ORDER BY order_id LIMIT %s"
+        rows = self._fetch(self.ORDERS_QUERY.format(orders=orders), (after or 0, limit + 1), as_dict=True, name="orders_page")
+        items = rows[:limit]
+        cursor = items[-1]["id"] if len(rows) > limit else None
+
+        total = None
+        if after is None:
+            row = self._fetch("SELECT COUNT(*) FROM Orders", fetch_one=True, name="orders_count")
+            total = row[0] if row else len(items)
+        logging.info(f"Страница заказов: {len(items)} строк, всего: {total}")
+        return {"items": items, "cursor": cursor, "total": total}
 
     def take_single_order_data(self):
         order_id = Storage.get_order_id()
         return self.get_order_by_id(order_id) if order_id else {}
 
     def take_pvz_address(self, pvz_id):
-        res = self._fetch("SELECT pvz_address FROM pvz WHERE pvz_id = %s", (pvz_id,), fetch_one=True)
+        res = self._fetch("SELECT pvz_address FROM pvz WHERE pvz_id = %s", (pvz_id,), fetch_one=True, name="pvz_address")
         return res[0] if res else "Адрес не найден"
 
     def take_all_pvz_addresses(self):
-        rows = self._fetch("SELECT pvz_id, pvz_address FROM pvz ORDER BY pvz_id")
+        rows = self._fetch("SELECT pvz_id, pvz_address FROM pvz ORDER BY pvz_id", name="all_pvz")
         return [f"{r[0]} | {r[1]}" for r in rows]
 
     def take_all_statuses(self):
-        rows = self._fetch("SELECT DISTINCT order_status FROM Orders")
+        rows = self._fetch("SELECT DISTINCT order_status FROM Orders", name="order_statuses")
         return [str(r[0]) for r in rows] or ["Новый", "Завершен"]
 
     def get_next_order_code(self) -> int:
-        row = self._fetch("SELECT COALESCE(MAX(order_code), 900) + 1 FROM Orders", fetch_one=True)
+        code = self.order_codes.next_code()
+        if code is not None:
+            return code
+        # Последовательность ещё не создана (не применена миграция 5) — прежний способ
+        logging.warning("Последовательность order_code_seq недоступна, код заказа вычисляется по MAX(order_code)")
+        row = self._fetch("SELECT COALESCE(MAX(order_code), 900) + 1 FROM Orders", fetch_one=True, name="next_order_code")
         return int(row[0]) if row else 901
 
+    def _fetch_order_codes(self, count: int) -> list:
+        rows = self._fetch(
+            "SELECT nextval('order_code_seq') FROM generate_series(1, %s)", (count,), name="order_code_block"
+        )
+        return [int(r[0]) for r in rows]
+
     def get_order_items_with_prices(self, order_id):
         query = """
             SELECT oi.product_article as article, oi.quantity,
@@ -254,7 +653,7 @@ class DatabaseConnection:
             LEFT JOIN items i ON oi.product_article = i.item_article
             WHERE oi.order_id = %s
         """
-        return self._fetch(query, (order_id,), as_dict=True)
+        return self._fetch(query, (order_id,), as_dict=True, name="order_items")
 
     def get_order_items(self, order_id):
         items = self.get_order_items_with_prices(order_id)
@@ -263,40 +662,71 @@ class DatabaseConnection:
         return items
 
     def check_product_in_orders(self, product_article):
-        res = self._fetch("SELECT COUNT(*) FROM OrderItems WHERE product_article = %s", (product_article,), fetch_one=True)
+        res = self._fetch("SELECT COUNT(*) FROM OrderItems WHERE product_article = %s", (product_article,), fetch_one=True, name="product_in_orders")
         return res[0] > 0 if res else False
 
+    # Заказ целиком одним запросом: строки товаров блокируются в порядке артикула (без взаимных
+    # блокировок между кассирами), заказ, его состав и списание остатков вставляются только если
+    # всех товаров хватает; уведомление об изменении каталога уходит в том же запросе
+    CREATE_ORDER_QUERY = """
+        WITH basket AS (
+            SELECT article, SUM(quantity)::INTEGER AS quantity, MIN(position) AS position
+            FROM unnest(%(articles)s::TEXT[], %(quantities)s::INTEGER[]) WITH ORDINALITY AS b(article, quantity, position)
+            GROUP BY article
+        ),
+        locked AS (
+            SELECT i.item_article, i.item_count
+            FROM Items i JOIN basket b ON b.article = i.item_article
+            ORDER BY i.item_article
+            FOR UPDATE OF i
+        ),
+        shortage AS (
+            SELECT b.article
+            FROM basket b LEFT JOIN locked l ON l.item_article = b.article
+            WHERE l.item_count IS NULL OR l.item_count < b.quantity
+        ),
+        new_order AS (
+            INSERT INTO Orders (order_create_date, order_delivery_date, order_pvz_id_fk,
+                                order_client_name, order_code, order_status)
+            SELECT %(create_date)s, %(delivery_date)s, %(pvz_id)s, %(client_name)s, %(code)s, %(status)s
+            WHERE NOT EXISTS (SELECT 1 FROM shortage)
+            RETURNING order_id
+        ),
+        lines AS (
+            INSERT INTO OrderItems (order_id, product_article, quantity)
+            SELECT o.order_id, b.article, b.quantity
+            FROM new_order o CROSS JOIN basket b
+            ORDER BY b.position
+        ),
+        stock AS (
+            UPDATE Items i SET item_count = i.item_count - b.quantity
+            FROM basket b, new_order o
+            WHERE i.item_article = b.article
+        )
+        SELECT o.order_id, pg_notify(%(channel)s, %(token)s),
+               ARRAY(SELECT article FROM shortage ORDER BY article)
+        FROM (SELECT 1) AS one LEFT JOIN new_order o ON true
+    """
+
     def create_new_order(self, order_data):
         if not self.ensure_connection():
             return False
         try:
-            with self.connection.cursor() as cursor:
-                order_query = """
-                    INSERT INTO Orders (order_create_date, order_delivery_date, order_pvz_id_fk,
-                                        order_client_name, order_code, order_status)
-                    VALUES (%s, %s, %s, %s, %s, %s) RETURNING order_id
-                """
-                cursor.execute(order_query, (
-                    order_data['create_date'], order_data['delivery_date'], order_data['pvz_id'],
-                    order_data['client_name'], order_data['code'], order_data['status']
-                ))
-                order_id = cursor.fetchone()[0]
-
-                for item in order_data['items']:
-                    cursor.execute(
-                        "SELECT item_count FROM Items WHERE item_article = %s FOR UPDATE",
-                        (item['article'],),
-                    )
-                    stock = cursor.fetchone()
-                    if not stock or stock[0] < item['quantity']:
-                        raise ValueError(f"Недостаточный остаток товара {item['article']}")
-                    cursor.execute("INSERT INTO OrderItems (order_id, product_article, quantity) VALUES (%s, %s, %s)",
-                                   (order_id, item['article'], item['quantity']))
-                    cursor.execute("UPDATE Items SET item_count = item_count - %s WHERE item_article = %s",
-                                   (item['quantity'], item['article']))
-                
-                self.connection.commit()
-                return True
+            with self._connection() as conn, conn.cursor() as cursor:
+                self.statements.execute(cursor, "create_order", self.CREATE_ORDER_QUERY, {
+                    "articles": [item['article'] for item in order_data['items']],
+                    "quantities": [int(item['quantity']) for item in order_data['items']],
+                    "create_date": order_data['create_date'], "delivery_date": order_data['delivery_date'],
+                    "pvz_id": order_data['pvz_id'], "client_name": order_data['client_name'],
+                    "code": order_data['code'], "status": order_data['status'],
+                    "channel": catalog_notify_channel, "token": PROCESS_TOKEN,
+                })
+                order_id, _, shortage = cursor.fetchone()
+                if order_id is None:
+                    raise ValueError(f"Недостаточный остаток товара {', '.join(shortage)}")
+                conn.commit()
+            catalog_cache.invalidate("создан заказ")
+            return True
         except Exception as e:
             logging.error(f"Ошибка создания заказа: {e}")
             traceback.print_exc()
@@ -305,19 +735,21 @@ class DatabaseConnection:
 
     def update_order_data(self, order_data):
         query = "UPDATE orders SET order_pvz_id_fk = %s, order_status = %s, order_delivery_date = %s WHERE order_id = %s"
-        return self._execute(query, (order_data['pvz_id'], order_data['status'], order_data['delivery_date'], order_data['id']))
+        return self._execute(query, (order_data['pvz_id'], order_data['status'], order_data['delivery_date'], order_data['id']), name="update_order")
 
     def delete_order(self, order_id):
         if not self.ensure_connection():
             return False
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute("SELECT product_article, quantity FROM OrderItems WHERE order_id = %s", (order_id,))
+            with self._connection() as conn, conn.cursor() as cursor:
+                self.statements.execute(cursor, "order_lines", "SELECT product_article, quantity FROM OrderItems WHERE order_id = %s", (order_id,))
                 for article, quantity in cursor.fetchall():
-                    cursor.execute("UPDATE Items SET item_count = item_count + %s WHERE item_article = %s", (quantity, article))
-                cursor.execute("DELETE FROM Orders WHERE order_id = %s", (order_id,))
-                self.connection.commit()
-                return True
+                    self.statements.execute(cursor, "restock_item", "UPDATE Items SET item_count = item_count + %s WHERE item_article = %s", (quantity, article))
+                self.statements.execute(cursor, "delete_order", "DELETE FROM Orders WHERE order_id = %s", (order_id,))
+                self._notify_catalog_changed(cursor)
+                conn.commit()
+            catalog_cache.invalidate("удалён заказ")
+            return True
         except Exception as e:
             logging.error(f"Ошибка удаления заказа: {e}")
             self._rollback_safe()
@@ -338,4 +770,4 @@ class DatabaseConnection:
             JOIN PVZ p ON p.pvz_id = o.order_pvz_id_fk
             WHERE o.order_id = %s
         """
-        return self._fetch(query, (order_id,), fetch_one=True, as_dict=True)
+        return self._fetch(query, (order_id,), fetch_one=True, as_dict=True, name="order_by_id")
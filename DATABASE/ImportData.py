@@ -1,8 +1,11 @@
-import pandas as pd
+import argparse
+import csv
 import psycopg
 import os
+import time
 from config import *
 from datetime import datetime
+from openpyxl import load_workbook
 
 def get_file_path(filename):
     """Получение относительного пути к файлу"""
@@ -27,31 +30,103 @@ def clear_tables(conn):
     cursor.close()
     print("Все таблицы очищены!")
 
-def import_clients(conn):
+# === ПОТОКОВОЕ ЧТЕНИЕ ФАЙЛОВ ===
+# .xlsx читается openpyxl в режиме read-only построчно, .csv — модулем csv;
+# в память попадает только текущая пачка строк
+
+BATCH_SIZE = 5000
+
+def open_rows(path):
+    """Итератор строк файла (кортежи значений), первая строка — заголовок"""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as file:
+            sample = file.read(64 * 1024)
+            file.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+            except csv.Error:
+                dialect = csv.excel
+            for row in csv.reader(file, dialect):
+                yield tuple(value if value != "" else None for value in row)
+    else:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+def read_batches(path, batch_size=BATCH_SIZE):
+    """Пачки строк по batch_size без заголовка и пустых строк; печатает скорость чтения"""
+    rows = open_rows(path)
+    header = next(rows, None)
+    print(f"Колонки в {os.path.basename(path)}:")
+    print(list(header or []))
+
+    started = time.perf_counter()
+    count = 0
+    batch = []
+    for row in rows:
+        if all(value is None for value in row):
+            continue
+        batch.append(row)
+        if len(batch) >= batch_size:
+            count += len(batch)
+            yield batch
+            batch = []
+            report_speed(f"Прочитано из {os.path.basename(path)}", count, started)
+    if batch:
+        count += len(batch)
+        yield batch
+    report_speed(f"Прочитано из {os.path.basename(path)}", count, started)
+
+def read_rows(path, batch_size=BATCH_SIZE):
+    for batch in read_batches(path, batch_size):
+        yield from batch
+
+def report_speed(title, count, started):
+    elapsed = time.perf_counter() - started
+    speed = count / elapsed if elapsed > 0 else count
+    print(f"{title}: {count} строк за {elapsed:.2f} с ({speed:.0f} строк/с)")
+
+def to_float(value):
+    return float(str(value).replace(",", ".")) if isinstance(value, str) else float(value)
+
+def client_values(row):
+    """Строка user_import: Роль сотрудника, ФИО, Логин, Пароль"""
+    return (row[0], row[1], row[2], row[3])
+
+def import_clients(conn, path=None, batch_size=BATCH_SIZE):
     query = """
     INSERT INTO Client (user_role, user_name, user_login, user_password)
     VALUES (%s, %s, %s, %s);
     """
-    data_frame = pd.read_excel(get_file_path("user_import.xlsx"))
-    
-    # Отладочная информация - посмотрим реальные названия колонок
-    print("Колонки в user_import.xlsx:")
-    print(data_frame.columns.tolist())
-    
     cursor = conn.cursor()
     
-    for row in data_frame.itertuples():
-        # Используем индексы вместо имен колонок
-        # Структура: Index, Роль сотрудника, ФИО, Логин, Пароль
-        values = (row[1], row[2], row[3], row[4])  # Индексы с 1, т.к. 0 - это Index
-        print(f"Импортируем: {values}")
-        cursor.execute(query, values)
+    for batch in read_batches(path or get_file_path("user_import.xlsx"), batch_size):
+        cursor.executemany(query, [client_values(row) for row in batch])
     
     conn.commit()
     cursor.close()
     print("Клиенты импортированы!")
 
-def import_items(conn):
+def item_values(row):
+    """Строка Tovar -> значения столбцов Items"""
+    picture = str(row[10]) if row[10] is not None and str(row[10]) != "nan" else ""
+    return (
+        row[0],  # Артикул
+        row[1],  # Наименование товара
+        row[2],  # Единица измерения
+        to_float(row[3]),  # Цена
+        row[4],  # Поставщик
+        row[5],  # Производитель
+        row[6],  # Категория товара
+        int(row[7]),  # Действующая скидка
+        int(row[8]),  # Кол-во на складе
+        row[9],  # Описание товара
+        picture
+    )
+
+def import_items(conn, path=None, batch_size=BATCH_SIZE):
     query = """
     INSERT INTO Items (
         item_article, item_name, item_edinica, item_cost, 
@@ -59,58 +134,26 @@ def import_items(conn):
         item_sale, item_count, item_information, item_picture
     ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
     """
-    data_frame = pd.read_excel(get_file_path("Tovar.xlsx"))
-    
-    print("Колонки в Tovar.xlsx:")
-    print(data_frame.columns.tolist())
-    
     cursor = conn.cursor()
     
-    for row in data_frame.itertuples():
-        picture = str(row[11]) if pd.notna(row[11]) and str(row[11]) != "nan" else ""
-        
-        values = (
-            row[1],  # Артикул
-            row[2],  # Наименование товара
-            row[3],  # Единица измерения
-            float(row[4]),  # Цена
-            row[5],  # Поставщик
-            row[6],  # Производитель
-            row[7],  # Категория товара
-            int(row[8]),  # Действующая скидка
-            int(row[9]),  # Кол-во на складе
-            row[10],  # Описание товара
-            picture
-        )
-        print(f"Импортируем товар: {values[0]} - {values[1]}")
-        cursor.execute(query, values)
+    for batch in read_batches(path or get_file_path("Tovar.xlsx"), batch_size):
+        cursor.executemany(query, [item_values(row) for row in batch])
     
     conn.commit()
     cursor.close()
     print("Товары импортированы!")
 
-def import_pvz(conn):
+def import_pvz(conn, path=None, batch_size=BATCH_SIZE):
     query = """
     INSERT INTO PVZ (pvz_address)
     VALUES (%s);
     """
-    data_frame = pd.read_excel(get_file_path("Пункты выдачи_import.xlsx"))
-    
-    print("Колонки в Пункты выдачи_import.xlsx:")
-    print(data_frame.columns.tolist())
-    print(f"Найдено записей: {len(data_frame)}")
-    
     cursor = conn.cursor()
     
     success_count = 0
-    for row in data_frame.itertuples():
-        try:
-            values = (row[1],)  # Адрес - 1й столбец
-            cursor.execute(query, values)
-            success_count += 1
-        except Exception as e:
-            print(f"Пропускаем дубликат: {row[1]}")
-            continue
+    for batch in read_batches(path or get_file_path("Пункты выдачи_import.xlsx"), batch_size):
+        cursor.executemany(query, [(row[0],) for row in batch])  # Адрес - 1й столбец
+        success_count += len(batch)
     
     conn.commit()
     cursor.close()
@@ -131,7 +174,24 @@ def parse_order_articles(article_string):
         print(f"Ошибка разбора артикулов: {article_string}, ошибка: {e}")
     return items
 
-def import_orders(conn):
+def order_values(row):
+    """Строка Заказ_import -> значения столбцов Orders (без order_id)"""
+    # Номер заказа, Артикул заказа, Дата заказа, Дата доставки,
+    # Адрес пункта выдачи, ФИО клиента, Код для получения, Статус заказа
+    create_date = parse_date(str(row[2]))  # Дата заказа
+    delivery_date = parse_date(str(row[3]))  # Дата доставки
+
+    # PVZ ID (уже должен существовать)
+    pvz_id = int(row[4])  # Адрес пункта выдачи
+
+    return (
+        create_date, delivery_date, pvz_id,
+        row[5],  # ФИО клиента
+        int(row[6]),  # Код для получения
+        row[7]   # Статус заказа
+    )
+
+def import_orders(conn, path=None, batch_size=BATCH_SIZE):
     # Сначала импортируем заказы
     order_query = """
     INSERT INTO Orders (
@@ -146,47 +206,25 @@ def import_orders(conn):
     VALUES (%s, %s, %s);
     """
     
-    data_frame = pd.read_excel(get_file_path("Заказ_import.xlsx"))
-    
-    print("Колонки в Заказ_import.xlsx:")
-    print(data_frame.columns.tolist())
-    
     cursor = conn.cursor()
     
     success_count = 0
-    for row in data_frame.itertuples():
+    for row in read_rows(path or get_file_path("Заказ_import.xlsx"), batch_size):
         try:
-            # Используем индексы колонок
-            # Номер заказа, Артикул заказа, Дата заказа, Дата доставки, 
-            # Адрес пункта выдачи, ФИО клиента, Код для получения, Статус заказа
-            
-            create_date = parse_date(str(row[3]))  # Дата заказа
-            delivery_date = parse_date(str(row[4]))  # Дата доставки
-            
-            # PVZ ID (уже должен существовать)
-            pvz_id = int(row[5])  # Адрес пункта выдачи
-            
-            values = (
-                create_date, delivery_date, pvz_id,
-                row[6],  # ФИО клиента
-                int(row[7]),  # Код для получения
-                row[8]   # Статус заказа
-            )
+            values = order_values(row)
             
             # Вставляем заказ и получаем его ID
             cursor.execute(order_query, values)
             order_id = cursor.fetchone()[0]
             
             # Разбираем и вставляем состав заказа
-            order_items = parse_order_articles(row[2])  # Артикул заказа
-            for article, quantity in order_items:
-                cursor.execute(order_items_query, (order_id, article, quantity))
+            order_items = parse_order_articles(row[1])  # Артикул заказа
+            cursor.executemany(order_items_query, [(order_id, article, quantity) for article, quantity in order_items])
             
             success_count += 1
-            print(f"Импортирован заказ #{row[1]} с {len(order_items)} товарами")
                 
         except Exception as e:
-            print(f"Ошибка импорта заказа {row[1]}: {e}")
+            print(f"Ошибка импорта заказа {row[0]}: {e}")
             continue
     
     conn.commit()
@@ -211,7 +249,163 @@ def parse_date(date_str):
         print(f"Ошибка парсинга даты: {date_str}")
         return datetime.now().date()
 
-def main():
+# === ПАКЕТНЫЙ ИМПОРТ (COPY) ===
+# Строки потоком уходят через COPY ... FROM STDIN во временные таблицы-стейджи,
+# затем один INSERT ... SELECT переносит их в рабочие таблицы
+
+def copy_rows(cursor, table, columns, rows):
+    """Передаёт строки в таблицу одним COPY, возвращает их количество"""
+    count = 0
+    with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+            count += 1
+    return count
+
+def bulk_import_clients(conn, path=None, batch_size=BATCH_SIZE):
+    started = time.perf_counter()
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            CREATE TEMP TABLE stage_clients (
+                user_role TEXT, user_name TEXT, user_login TEXT, user_password TEXT
+            ) ON COMMIT DROP
+        """)
+        count = copy_rows(
+            cursor, "stage_clients", ["user_role", "user_name", "user_login", "user_password"],
+            (client_values(row) for row in read_rows(path or get_file_path("user_import.xlsx"), batch_size)),
+        )
+        cursor.execute("""
+            INSERT INTO Client (user_role, user_name, user_login, user_password)
+            SELECT DISTINCT ON (user_login) user_role, user_name, user_login, user_password
+            FROM stage_clients ORDER BY user_login
+            ON CONFLICT (user_login) DO UPDATE SET
+                user_role = EXCLUDED.user_role, user_name = EXCLUDED.user_name,
+                user_password = EXCLUDED.user_password
+        """)
+    conn.commit()
+    report_speed("Клиенты импортированы", count, started)
+
+def bulk_import_pvz(conn, path=None, batch_size=BATCH_SIZE):
+    started = time.perf_counter()
+    rows = read_rows(path or get_file_path("Пункты выдачи_import.xlsx"), batch_size)
+    with conn.cursor() as cursor:
+        # position сохраняет порядок файла: номер ПВЗ в заказах — это номер строки
+        cursor.execute("CREATE TEMP TABLE stage_pvz (position INTEGER, pvz_address TEXT) ON COMMIT DROP")
+        count = copy_rows(
+            cursor, "stage_pvz", ["position", "pvz_address"],
+            ((position, row[0]) for position, row in enumerate(rows)),
+        )
+        cursor.execute("INSERT INTO PVZ (pvz_address) SELECT pvz_address FROM stage_pvz ORDER BY position")
+    conn.commit()
+    report_speed("ПВЗ импортированы", count, started)
+
+def bulk_import_items(conn, path=None, batch_size=BATCH_SIZE):
+    started = time.perf_counter()
+    columns = [
+        "item_article", "item_name", "item_edinica", "item_cost",
+        "item_deliveryman", "item_creator", "item_category",
+        "item_sale", "item_count", "item_information", "item_picture",
+    ]
+    rows = read_rows(path or get_file_path("Tovar.xlsx"), batch_size)
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            CREATE TEMP TABLE stage_items (
+                position BIGSERIAL,
+                item_article TEXT, item_name TEXT, item_edinica TEXT, item_cost NUMERIC(10,2),
+                item_deliveryman TEXT, item_creator TEXT, item_category TEXT,
+                item_sale INTEGER, item_count INTEGER, item_information TEXT, item_picture TEXT
+            ) ON COMMIT DROP
+        """)
+        count = copy_rows(cursor, "stage_items", columns, (item_values(row) for row in rows))
+        # Повтор артикула в прайсе: побеждает последняя строка; существующие товары обновляются
+        cursor.execute(f"""
+            INSERT INTO Items ({', '.join(columns)})
+            SELECT DISTINCT ON (item_article) {', '.join(columns)}
+            FROM stage_items ORDER BY item_article, position DESC
+            ON CONFLICT (item_article) DO UPDATE SET
+                {', '.join(f"{c} = EXCLUDED.{c}" for c in columns[1:])}
+        """)
+    conn.commit()
+    report_speed("Товары импортированы", count, started)
+
+def staged_order_rows(path, batch_size):
+    """Строки заказов для стейджа; строки с ошибками пропускаются"""
+    for row in read_rows(path, batch_size):
+        try:
+            # Номер заказа хранится как текст: он нужен только для сообщений, порядок задаёт position
+            yield (str(row[0]), str(row[1] or "")) + order_values(row)
+        except Exception as e:
+            print(f"Ошибка импорта заказа {row[0]}: {e}")
+
+def bulk_import_orders(conn, path=None, batch_size=BATCH_SIZE):
+    started = time.perf_counter()
+    rows = staged_order_rows(path or get_file_path("Заказ_import.xlsx"), batch_size)
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            CREATE TEMP TABLE stage_orders (
+                position BIGSERIAL, order_number TEXT, order_articles TEXT, order_create_date DATE, order_delivery_date DATE,
+                order_pvz_id_fk INTEGER, order_client_name TEXT, order_code INTEGER,
+                order_status TEXT, order_id INTEGER
+            ) ON COMMIT DROP
+        """)
+        count = copy_rows(
+            cursor, "stage_orders",
+            ["order_number", "order_articles", "order_create_date", "order_delivery_date", "order_pvz_id_fk",
+             "order_client_name", "order_code", "order_status"],
+            rows,
+        )
+
+        # Заказы с несуществующим ПВЗ пропускаются, остальным заранее выдаются order_id из последовательности
+        cursor.execute("DELETE FROM stage_orders s WHERE NOT EXISTS (SELECT 1 FROM PVZ p WHERE p.pvz_id = s.order_pvz_id_fk)")
+        skipped = cursor.rowcount
+        cursor.execute("UPDATE stage_orders SET order_id = nextval(pg_get_serial_sequence('orders', 'order_id'))")
+        cursor.execute("""
+            INSERT INTO Orders (order_id, order_create_date, order_delivery_date, order_pvz_id_fk,
+                                order_client_name, order_code, order_status)
+            SELECT order_id, order_create_date, order_delivery_date, order_pvz_id_fk,
+                   order_client_name, order_code, order_status
+            FROM stage_orders ORDER BY position
+        """)
+        # Состав разбирается на стороне БД: "А112Т4, 2, F635R4, 2" -> пары (артикул, количество)
+        cursor.execute("""
+            CREATE TEMP TABLE stage_order_lines ON COMMIT DROP AS
+            SELECT s.order_id, trim(parts[2 * n - 1]) AS article, trim(parts[2 * n]) AS quantity
+            FROM (SELECT order_id, string_to_array(order_articles, ',') AS parts FROM stage_orders) s,
+                 generate_series(1, coalesce(array_length(s.parts, 1), 0) / 2) AS n
+        """)
+        lines_count = cursor.rowcount
+        # Позиции с неизвестным артикулом или неверным количеством не вставляются и считаются пропущенными
+        cursor.execute(r"""
+            INSERT INTO OrderItems (order_id, product_article, quantity)
+            SELECT lines.order_id, lines.article, lines.quantity::INTEGER
+            FROM stage_order_lines lines
+            JOIN Items i ON i.item_article = lines.article
+            WHERE lines.quantity ~ '^\d+$' AND lines.quantity::INTEGER > 0
+        """)
+        items_count = cursor.rowcount
+    conn.commit()
+    if skipped:
+        print(f"Пропущено заказов с неизвестным ПВЗ: {skipped}")
+    if lines_count > items_count:
+        print(f"Пропущено позиций заказов с неизвестным артикулом или неверным количеством: {lines_count - items_count}")
+    print(f"Позиций заказов: {items_count}")
+    report_speed("Заказы импортированы", count - skipped, started)
+
+def sync_order_code_sequence(conn):
+    """Сдвигает order_code_seq за максимальный импортированный код (если последовательность уже создана миграцией)"""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT setval(to_regclass('order_code_seq'), GREATEST((SELECT MAX(order_code) FROM Orders), 900) + 1, false)
+            WHERE to_regclass('order_code_seq') IS NOT NULL
+        """)
+    conn.commit()
+
+def main(bulk=False, paths=None, batch_size=BATCH_SIZE):
+    """
+    :param paths: словарь {"pvz"|"clients"|"items"|"orders": путь к .xlsx или .csv}, по умолчанию файлы из EXCEL/
+    :param batch_size: сколько строк читается и отправляется в БД за раз
+    """
+    paths = paths or {}
     connection = psycopg.connect(
         user=user_name,
         password=user_password,
@@ -226,10 +420,17 @@ def main():
         clear_tables(connection)
         
         # Затем импортируем в правильном порядке
-        import_pvz(connection)
-        import_clients(connection) 
-        import_items(connection)
-        import_orders(connection)
+        if bulk:
+            bulk_import_pvz(connection, paths.get("pvz"), batch_size)
+            bulk_import_clients(connection, paths.get("clients"), batch_size)
+            bulk_import_items(connection, paths.get("items"), batch_size)
+            bulk_import_orders(connection, paths.get("orders"), batch_size)
+        else:
+            import_pvz(connection, paths.get("pvz"), batch_size)
+            import_clients(connection, paths.get("clients"), batch_size)
+            import_items(connection, paths.get("items"), batch_size)
+            import_orders(connection, paths.get("orders"), batch_size)
+        sync_order_code_sequence(connection)
         
         print("✅ Все данные успешно импортированы!")
         
@@ -241,4 +442,14 @@ def main():
         connection.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Импорт данных из Excel/CSV в БД")
+    parser.add_argument("--bulk", action="store_true", help="пакетный импорт через COPY и временные таблицы")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="размер пачки строк")
+    for name in ("pvz", "clients", "items", "orders"):
+        parser.add_argument(f"--{name}", metavar="FILE", help="файл .xlsx или .csv вместо стандартного")
+    args = parser.parse_args()
+    main(
+        bulk=args.bulk,
+        paths={name: getattr(args, name) for name in ("pvz", "clients", "items", "orders")},
+        batch_size=args.batch_size,
+    )
@@ -0,0 +1,237 @@
+import argparse
+import re
+import psycopg
+from config import *
+
+# Версионированные миграции схемы. Применённые версии записываются в schema_migrations,
+# повторный запуск выполняет только новые. Схему меняем только добавлением новой версии,
+# уже применённые миграции не редактируются.
+#
+# transactional=False — миграция выполняется вне транзакции (нужно для CREATE INDEX CONCURRENTLY,
+# который не блокирует запись в таблицу на живой базе); каждая её команда должна быть идемпотентной.
+
+MIGRATIONS = [
+    {
+        "version": 1,
+        "name": "initial_schema",
+        "transactional": True,
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS Client (
+                user_role TEXT NOT NULL,
+                user_name TEXT NOT NULL,
+                user_login TEXT NOT NULL PRIMARY KEY,
+                user_password TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS PVZ(
+                pvz_id SERIAL PRIMARY KEY NOT NULL,
+                pvz_address TEXT NOT NULL  -- Без UNIQUE, т.к. в данных есть дубликаты
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS Items(
+                item_id SERIAL PRIMARY KEY NOT NULL,
+                item_article TEXT NOT NULL UNIQUE,
+                item_name TEXT NOT NULL,
+                item_edinica TEXT NOT NULL,
+                item_cost DECIMAL(10,2) NOT NULL CHECK (item_cost >= 0),
+                item_deliveryman TEXT NOT NULL,
+                item_creator TEXT NOT NULL,
+                item_category TEXT NOT NULL,
+                item_sale INTEGER NOT NULL CHECK (item_sale >= 0),
+                item_count INTEGER NOT NULL CHECK (item_count >= 0),
+                item_information TEXT NOT NULL,
+                item_picture TEXT
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS Orders(
+                order_id SERIAL PRIMARY KEY NOT NULL,
+                order_create_date DATE NOT NULL,
+                order_delivery_date DATE NOT NULL,
+                order_pvz_id_fk INTEGER NOT NULL REFERENCES PVZ(pvz_id) ON UPDATE CASCADE,
+                order_client_name TEXT NOT NULL,
+                order_code INTEGER NOT NULL,
+                order_status TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS OrderItems(
+                order_item_id SERIAL PRIMARY KEY NOT NULL,
+                order_id INTEGER NOT NULL REFERENCES Orders(order_id) ON DELETE CASCADE,
+                product_article TEXT NOT NULL REFERENCES Items(item_article) ON UPDATE CASCADE,
+                quantity INTEGER NOT NULL CHECK (quantity > 0)
+            )
+            """,
+        ],
+    },
+    {
+        # Индексы под keyset-пагинацию каталога: (item_name, item_id) и (item_count, item_id)
+        "version": 2,
+        "name": "items_keyset_indexes",
+        "transactional": True,
+        "statements": [
+            "CREATE INDEX IF NOT EXISTS items_name_id_idx ON Items (item_name, item_id)",
+            "CREATE INDEX IF NOT EXISTS items_count_id_idx ON Items (item_count, item_id)",
+        ],
+    },
+    {
+        # Все поля поиска одной строкой и триграммный индекс по ней для ILIKE '%слово%'
+        "version": 3,
+        "name": "items_search_trigram",
+        "transactional": True,
+        "statements": [
+            """
+            ALTER TABLE Items ADD COLUMN IF NOT EXISTS item_search TEXT GENERATED ALWAYS AS (
+                item_article || ' ' || item_name || ' ' || item_edinica || ' ' || item_deliveryman || ' ' ||
+                item_creator || ' ' || item_category || ' ' || item_information
+            ) STORED
+            """,
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE INDEX IF NOT EXISTS items_search_trgm_idx ON Items USING GIN (item_search gin_trgm_ops)",
+        ],
+    },
+    {
+        # Индексы горячих путей: состав заказа (take_all_orders_rows, get_order_items_with_prices,
+        # delete_order), проверка товара в заказах, фильтр по поставщику, заказы по ПВЗ
+        "version": 4,
+        "name": "hot_path_indexes",
+        "transactional": False,
+        "statements": [
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS orderitems_order_id_idx ON OrderItems (order_id)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS orderitems_product_article_idx ON OrderItems (product_article)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS items_deliveryman_idx ON Items (item_deliveryman)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS orders_pvz_id_idx ON Orders (order_pvz_id_fk)",
+        ],
+    },
+    {
+        # Коды получения заказов из последовательности вместо MAX(order_code) + 1: без сканирования и гонок
+        "version": 5,
+        "name": "order_code_sequence",
+        "transactional": True,
+        "statements": [
+            "CREATE SEQUENCE IF NOT EXISTS order_code_seq START 901 MINVALUE 901",
+            "SELECT setval('order_code_seq', GREATEST((SELECT MAX(order_code) FROM Orders), 900) + 1, false)",
+        ],
+    },
+]
+
+# Ключ рекомендательной блокировки: две копии скрипта не применяют миграции одновременно
+MIGRATIONS_LOCK_KEY = 7310541
+
+def connect():
+    return psycopg.connect(
+        user=user_name,
+        password=user_password,
+        host=host_address,
+        dbname=database_name,
+        autocommit=True
+    )
+
+def ensure_migrations_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+def applied_versions(conn):
+    return {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+
+def concurrent_index_names(migration):
+    """Имена индексов, которые миграция создаёт через CREATE INDEX CONCURRENTLY"""
+    pattern = re.compile(r"CREATE INDEX CONCURRENTLY IF NOT EXISTS (\w+)", re.IGNORECASE)
+    return [match.group(1).lower() for statement in migration["statements"] for match in pattern.finditer(statement)]
+
+def holds_migrations_lock(conn):
+    return conn.execute("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_locks
+            WHERE locktype = 'advisory' AND pid = pg_backend_pid() AND granted
+              AND classid = 0 AND objid = %s AND objsubid = 1
+        )
+    """, (MIGRATIONS_LOCK_KEY,)).fetchone()[0]
+
+def drop_invalid_indexes(conn, index_names):
+    """
+    Удаляет индексы миграции, оставшиеся невалидными после прерванного CREATE INDEX CONCURRENTLY.
+    Невалиден и индекс, который другой сеанс строит прямо сейчас, поэтому удаляются только индексы
+    из index_names и только под блокировкой миграций — пока она взята, никто другой их не строит
+    """
+    if not index_names:
+        return
+    if not holds_migrations_lock(conn):
+        raise RuntimeError("drop_invalid_indexes вызывается только под блокировкой миграций")
+    invalid = conn.execute("""
+        SELECT i.indexrelid::regclass::text
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE NOT i.indisvalid AND c.relnamespace = 'public'::regnamespace AND c.relname = ANY(%s)
+    """, (index_names,)).fetchall()
+    for (index_name,) in invalid:
+        print(f"Удаляем невалидный индекс: {index_name}")
+        conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+
+def apply_migration(conn, migration):
+    version, name = migration["version"], migration["name"]
+    if migration["transactional"]:
+        with conn.transaction():
+            for statement in migration["statements"]:
+                conn.execute(statement)
+            conn.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+    else:
+        drop_invalid_indexes(conn, concurrent_index_names(migration))
+        for statement in migration["statements"]:
+            conn.execute(statement)
+        conn.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+    print(f"Применена миграция {version}: {name}")
+
+def migrate(conn=None, target=None):
+    """Применяет все ещё не применённые миграции (до версии target включительно)"""
+    own_connection = conn is None
+    conn = conn or connect()
+    try:
+        conn.execute("SELECT pg_advisory_lock(%s)", (MIGRATIONS_LOCK_KEY,))
+        try:
+            ensure_migrations_table(conn)
+            done = applied_versions(conn)
+            pending = [
+                m for m in sorted(MIGRATIONS, key=lambda m: m["version"])
+                if m["version"] not in done and (target is None or m["version"] <= target)
+            ]
+            if not pending:
+                print("Схема БД актуальна")
+            for migration in pending:
+                apply_migration(conn, migration)
+        finally:
+            conn.execute("SELECT pg_advisory_unlock(%s)", (MIGRATIONS_LOCK_KEY,))
+    finally:
+        if own_connection:
+            conn.close()
+
+def status(conn=None):
+    own_connection = conn is None
+    conn = conn or connect()
+    try:
+        ensure_migrations_table(conn)
+        done = dict(conn.execute("SELECT version, applied_at FROM schema_migrations").fetchall())
+        for migration in sorted(MIGRATIONS, key=lambda m: m["version"]):
+            applied_at = done.get(migration["version"])
+            state = f"применена {applied_at:%Y-%m-%d %H:%M}" if applied_at else "ожидает"
+            print(f"{migration['version']:>4}  {migration['name']:<30} {state}")
+    finally:
+        if own_connection:
+            conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Миграции схемы БД")
+    parser.add_argument("--status", action="store_true", help="показать применённые и ожидающие миграции")
+    parser.add_argument("--target", type=int, help="применить миграции только до этой версии")
+    args = parser.parse_args()
+    if args.status:
+        status()
+    else:
+        migrate(target=args.target)
@@ -0,0 +1,29 @@
+import threading
+from collections import deque
+
+from DATABASE.config import order_code_block_size
+
+
+class OrderCodeAllocator:
+    """
+    Выдаёт коды получения заказов из последовательности order_code_seq блоками.
+
+    Блок из block_size кодов забирается одним запросом к nextval и дальше раздаётся из памяти,
+    так что серия заказов не обращается к БД за каждым кодом. Коды уникальны между клиентами
+    (их выдаёт последовательность), но могут идти с пропусками: неиспользованный остаток
+    блока при закрытии приложения теряется.
+    """
+
+    def __init__(self, fetch_block, block_size: int = order_code_block_size):
+        """:param fetch_block: fetch_block(n) возвращает n новых кодов из последовательности"""
+        self.fetch_block = fetch_block
+        self.block_size = block_size
+        self._codes = deque()
+        self._lock = threading.Lock()
+
+    def next_code(self):
+        """Следующий код или None, если последовательность недоступна."""
+        with self._lock:
+            if not self._codes:
+                self._codes.extend(self.fetch_block(self.block_size))
+            return self._codes.popleft() if self._codes else None
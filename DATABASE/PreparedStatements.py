@@ -0,0 +1,64 @@
+import threading
+import time
+import weakref
+
+from DATABASE.config import prepared_statements_enabled
+
+
+class PreparedStatements:
+    """
+    Именованные серверные подготовленные запросы для постоянного набора запросов DatabaseConnection.
+
+    Запрос с именем готовится на каждом соединении один раз (PREPARE при первом выполнении,
+    дальше только EXECUTE) и переиспользуется, пока соединение живёт в пуле. Остальные
+    запросы (поиск с переменным числом условий и т.п.) не готовятся, чтобы не засорять кэш.
+    Первое выполнение на соединении учитывается как «подготовка + выполнение», остальные —
+    как «выполнение»: по разнице средних видно, сколько стоит разбор и планирование.
+    """
+
+    def __init__(self, enabled: bool = prepared_statements_enabled):
+        self.enabled = enabled
+        self._prepared = weakref.WeakKeyDictionary()
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def execute(self, cursor, name, query, params=()):
+        """Выполняет запрос; при заданном name — как подготовленный на соединении курсора."""
+        if not (self.enabled and name):
+            cursor.execute(query, params, prepare=False)
+            return
+        connection = cursor.connection
+        with self._lock:
+            names = self._prepared.setdefault(connection, set())
+            first = name not in names
+        started = time.perf_counter()
+        cursor.execute(query, params, prepare=True)
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            names.add(name)
+            stats = self._stats.setdefault(name, {"prepares": 0, "prepare_ms": 0.0, "executions": 0, "execute_ms": 0.0})
+            if first:
+                stats["prepares"] += 1
+                stats["prepare_ms"] += elapsed
+            else:
+                stats["executions"] += 1
+                stats["execute_ms"] += elapsed
+
+    def report(self) -> dict:
+        """
+        Разбивка по запросам: prepares — первых выполнений (с подготовкой), executions — повторных,
+        avg_first_ms / avg_execute_ms — их среднее время, prepare_cost_ms — оценка стоимости подготовки
+        """
+        with self._lock:
+            report = {}
+            for name, stats in sorted(self._stats.items()):
+                avg_first = stats["prepare_ms"] / stats["prepares"] if stats["prepares"] else 0.0
+                avg_execute = stats["execute_ms"] / stats["executions"] if stats["executions"] else 0.0
+                report[name] = {
+                    "prepares": stats["prepares"],
+                    "executions": stats["executions"],
+                    "avg_first_ms": round(avg_first, 3),
+                    "avg_execute_ms": round(avg_execute, 3),
+                    "prepare_cost_ms": round(avg_first - avg_execute, 3) if stats["executions"] else None,
+                }
+            return report
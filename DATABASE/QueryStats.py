@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+
+from DATABASE.config import slow_query_ms, slow_query_explain_interval, slow_query_log_size
+
+
+class QueryStats:
+    """
+    Статистика запросов DatabaseConnection по логическим именам (name/label из _fetch и _execute).
+
+    Для каждого имени: число вызовов и ошибок, суммарное и максимальное время, гистограмма задержек
+    по границам BUCKETS_MS, число строк и объём полученных данных. Объём оценивается по первым
+    SIZE_SAMPLE строкам результата: точный подсчёт по всем значениям стоит дороже самого чтения.
+    Запросы дольше slow_query_ms попадают в журнал медленных запросов, чтения — вместе с планом EXPLAIN;
+    план для одного имени снимается не чаще раза в slow_query_explain_interval.
+    """
+
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+    SIZE_SAMPLE = 32
+
+    def __init__(self, slow_ms: float = slow_query_ms, explain_interval: float = slow_query_explain_interval):
+        self.slow_ms = slow_ms
+        self.explain_interval = explain_interval
+        self.slow_queries = deque(maxlen=slow_query_log_size)
+        self._stats = {}
+        self._explained_at = {}
+        self._lock = threading.Lock()
+        # Необязательный наблюдатель observer(name, elapsed_ms, rows, failed) — например, профилировщик экранов
+        self.observer = None
+
+    @classmethod
+    def payload_size(cls, rows) -> int:
+        """Оценка объёма результата в байтах: строки и bytes — по длине, остальные значения — по 8 байт."""
+        if not rows:
+            return 0
+        sample = rows[:cls.SIZE_SAMPLE]
+        size = 0
+        for row in sample:
+            for value in (row.values() if isinstance(row, dict) else row):
+                size += len(value) if isinstance(value, (str, bytes)) else 8
+        return size * len(rows) // len(sample)
+
+    def record(self, name: str, elapsed_ms: float, rows: int = 0, size: int = 0, failed: bool = False) -> None:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {
+                    "calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "bytes": 0,
+                    "buckets": [0] * (len(self.BUCKETS_MS) + 1),
+                }
+            stats["calls"] += 1
+            stats["errors"] += failed
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["rows"] += rows
+            stats["bytes"] += size
+            stats["buckets"][bisect_left(self.BUCKETS_MS, elapsed_ms)] += 1
+        observer = self.observer
+        if observer is not None:
+            observer(name, elapsed_ms, rows, failed)
+
+    def is_slow(self, elapsed_ms: float) -> bool:
+        return self.slow_ms is not None and elapsed_ms >= self.slow_ms
+
+    def should_explain(self, name: str) -> bool:
+        """Пора ли снимать план для name (и отметка, что он снимается сейчас)."""
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained_at.get(name)
+            if last is not None and now - last < self.explain_interval:
+                return False
+            self._explained_at[name] = now
+            return True
+
+    def log_slow(self, name: str, elapsed_ms: float, query: str, plan: str | None) -> None:
+        with self._lock:
+            self.slow_queries.append({
+                "name": name,
+                "at": datetime.now().isoformat(timespec="seconds"),
+                "elapsed_ms": round(elapsed_ms, 3),
+                "query": " ".join(query.split()),
+                "plan": plan,
+            })
+
+    def _percentile(self, buckets, calls, share) -> str:
+        """Верхняя граница корзины, в которую попадает заданная доля вызовов."""
+        target = calls * share
+        seen = 0
+        for bound, count in zip(self.BUCKETS_MS + (None,), buckets):
+            seen += count
+            if seen >= target:
+                return f"<={bound}" if bound is not None else f">{self.BUCKETS_MS[-1]}"
+        return f">{self.BUCKETS_MS[-1]}"
+
+    def report(self) -> dict:
+        """Сводка по именам, по убыванию суммарного времени."""
+        with self._lock:
+            report = {}
+            for name, stats in sorted(self._stats.items(), key=lambda item: -item[1]["total_ms"]):
+                labels = [f"<={bound}" for bound in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}"]
+                report[name] = {
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "total_ms": round(stats["total_ms"], 3),
+                    "avg_ms": round(stats["total_ms"] / stats["calls"], 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                    "p50_ms": self._percentile(stats["buckets"], stats["calls"], 0.5),
+                    "p95_ms": self._percentile(stats["buckets"], stats["calls"], 0.95),
+                    "rows": stats["rows"],
+                    "bytes": stats["bytes"],
+                    "histogram_ms": {label: count for label, count in zip(labels, stats["buckets"]) if count},
+                }
+            return report
+
+    def dump(self, path) -> None:
+        """Записывает сводку и журнал медленных запросов в JSON-файл."""
+        with self._lock:
+            slow = list(self.slow_queries)
+        data = {"at": datetime.now().isoformat(timespec="seconds"), "queries": self.report(), "slow_queries": slow}
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,214 @@
+import re
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+
+class CatalogSearchIndex:
+    """
+    Поисковый индекс каталога в памяти процесса: отвечает на те же запросы, что и
+    DatabaseConnection.search_items_page, без обращения к БД.
+
+    Позиция товара в индексе — его место в порядке (item_name, item_id), полученном из БД,
+    поэтому порядок по имени совпадает с сортировкой PostgreSQL с учётом его правил сравнения строк.
+    - postings: триграмма (в нижнем регистре) -> возрастающий массив позиций товаров, в тексте которых она есть;
+    - suppliers: поставщик -> битовая маска позиций (int), для кандидатов поиска — supplier_of по позиции;
+    - by_count: перестановка позиций в порядке (item_count, item_id);
+    - name_rank: имя -> его место среди различных имён в порядке БД (сравнение имён из курсора без правил PostgreSQL).
+    Слово ищется как ILIKE '%слово%': кандидаты берутся из самого редкого списка триграмм,
+    затем каждое совпадение проверяется подстрокой.
+    """
+
+    GRAM = 3
+    # Сколько последних выборок хранить для подгрузки следующих страниц без повторного поиска
+    RESULTS_CACHE_SIZE = 16
+
+    def __init__(self, items, fields, weights):
+        """
+        :param items: строки каталога (словари ITEMS_COLUMNS) в порядке (name, id)
+        :param fields: поля поиска (псевдонимы столбцов)
+        :param weights: веса полей для ранжирования {псевдоним: вес}
+        """
+        self.items = list(items)
+        self.fields = list(fields)
+        self.weights = [weights[field] for field in self.fields]
+        self.field_texts = [[str(item[field] or "").lower() for field in self.fields] for item in self.items]
+        self.texts = [" ".join(texts) for texts in self.field_texts]
+
+        postings = {}
+        for position, text in enumerate(self.texts):
+            for gram in {text[i:i + self.GRAM] for i in range(len(text) - self.GRAM + 1)}:
+                postings.setdefault(gram, array("I")).append(position)
+        self.postings = postings
+
+        self.supplier_of = [item["deliveryman"] for item in self.items]
+        bitsets = {}
+        for position, supplier in enumerate(self.supplier_of):
+            bitset = bitsets.setdefault(supplier, bytearray((len(self.items) + 7) // 8))
+            bitset[position >> 3] |= 1 << (position & 7)
+        self.suppliers = {supplier: int.from_bytes(bitset, "little") for supplier, bitset in bitsets.items()}
+
+        self.by_count = sorted(range(len(self.items)), key=lambda p: (self.items[p]["count"], self.items[p]["id"]))
+        self.count_rank = [0] * len(self.items)
+        for index, position in enumerate(self.by_count):
+            self.count_rank[position] = index
+
+        self.name_rank = {}
+        for item in self.items:
+            self.name_rank.setdefault(item["name"], len(self.name_rank))
+
+        self._results = OrderedDict()
+        self._results_lock = threading.Lock()
+
+    # === СОПОСТАВЛЕНИЕ СЛОВ ===
+
+    @staticmethod
+    def _matcher(word: str):
+        """Функция text -> bool, эквивалентная text ILIKE '%word%' (с учётом % и _ внутри слова)."""
+        word = word.lower()
+        if not any(ch in word for ch in "%_\\"):
+            return lambda text: word in text
+        pattern = []
+        escaped = False
+        for ch in word:
+            if escaped:
+                pattern.append(re.escape(ch))
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == "%":
+                pattern.append(".*")
+            elif ch == "_":
+                pattern.append(".")
+            else:
+                pattern.append(re.escape(ch))
+        if escaped:
+            # PostgreSQL отклоняет шаблон, оканчивающийся на escape-символ, — запрос ничего не находит
+            return lambda text: False
+        regex = re.compile("".join(pattern), re.DOTALL)
+        return lambda text: regex.search(text) is not None
+
+    def _candidates(self, words):
+        """Возможные позиции для набора слов: самый короткий список триграмм или все позиции."""
+        best = None
+        for word in words:
+            word = word.lower()
+            if any(ch in word for ch in "%_\\"):
+                continue
+            for i in range(len(word) - self.GRAM + 1):
+                posting = self.postings.get(word[i:i + self.GRAM])
+                if posting is None:
+                    return ()
+                if best is None or len(posting) < len(best):
+                    best = posting
+        return best if best is not None else range(len(self.items))
+
+    @staticmethod
+    def _bits(mask: int):
+        """Позиции установленных битов маски по возрастанию."""
+        for byte_index, byte in enumerate(mask.to_bytes((mask.bit_length() + 7) // 8, "little")):
+            while byte:
+                low = byte & -byte
+                yield (byte_index << 3) + low.bit_length() - 1
+                byte ^= low
+
+    def _relevance(self, position: int, matchers) -> int:
+        texts = self.field_texts[position]
+        return sum(weight for match in matchers for text, weight in zip(texts, self.weights) if match(text))
+
+    # === ЗАПРОСЫ ===
+
+    def _matches(self, position: int, matchers, whole_text: bool) -> bool:
+        if whole_text:
+            return all(match(self.texts[position]) for match in matchers)
+        texts = self.field_texts[position]
+        return all(any(match(text) for text in texts) for match in matchers)
+
+    def search(self, words, company_filter="", sort_by_count=False, sort_ascending=True, ranked=False, whole_text=True):
+        """
+        Все подходящие товары в порядке выдачи SQL-запроса
+        :param whole_text: слово ищется в склейке полей (режим trigram), иначе — в каждом поле отдельно (режим ilike)
+        :return: (список позиций, {позиция: relevance} или None)
+        """
+        supplier = company_filter if company_filter and company_filter != "Все поставщики" else None
+        if supplier is not None and supplier not in self.suppliers:
+            return [], None
+
+        if words:
+            matchers = [self._matcher(word) for word in words]
+            positions = [
+                p for p in self._candidates(words)
+                if (supplier is None or self.supplier_of[p] == supplier)
+                and self._matches(p, matchers, whole_text)
+            ]
+        else:
+            matchers = []
+            positions = list(self._bits(self.suppliers[supplier])) if supplier is not None else list(range(len(self.items)))
+
+        if sort_by_count:
+            positions.sort(key=self.count_rank.__getitem__, reverse=not sort_ascending)
+            return positions, None
+        if ranked:
+            relevance = {p: self._relevance(p, matchers) for p in positions}
+            # Позиции уже идут по (name, id), сортировка устойчива
+            positions.sort(key=relevance.__getitem__, reverse=True)
+            return positions, relevance
+        return positions, None
+
+    def _cached_search(self, words, company_filter, sort_by_count, sort_ascending, ranked, whole_text):
+        """search с запоминанием последних выборок: страницы после первой не повторяют поиск."""
+        key = (tuple(words), company_filter, sort_by_count, sort_ascending, ranked, whole_text)
+        with self._results_lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                return result
+        result = self.search(words, company_filter, sort_by_count, sort_ascending, ranked, whole_text)
+        with self._results_lock:
+            self._results[key] = result
+            while len(self._results) > self.RESULTS_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return result
+
+    def _sort_key(self, order, values):
+        """
+        Ключ сортировки order для значений столбцов, сравнимый обычным <: имя заменяется его местом в порядке БД,
+        столбцы по убыванию — противоположным числом. None — имени нет в индексе, сравнить его нельзя
+        """
+        key = []
+        for (column, direction), value in zip(order, values):
+            if column == "name":
+                value = self.name_rank.get(value)
+                if value is None:
+                    return None
+            key.append(-value if direction == "DESC" else value)
+        return tuple(key)
+
+    def page(self, words, company_filter, sort_by_count, sort_ascending, ranked, order, after, limit, whole_text=True):
+        """
+        Страница в формате search_items_page: курсор — значения столбцов order последней строки
+        :return: страница или None, если курсор указывает на имя, которого в индексе нет (страницу отдаёт SQL)
+        """
+        positions, relevance = self._cached_search(words, company_filter, sort_by_count, sort_ascending, ranked, whole_text)
+        start = 0
+        if after is not None:
+            # Как keyset-условие SQL: первая строка строго после значений курсора. Сама строка курсора
+            # могла быть удалена или выпасть из выборки — её id не ищем
+            cursor_key = self._sort_key(order, after)
+            if cursor_key is None:
+                return None
+            start = bisect_right(
+                positions, cursor_key,
+                key=lambda p: self._sort_key(
+                    order, [relevance[p] if column == "relevance" else self.items[p][column] for column, _ in order]
+                ),
+            )
+        selected = positions[start:start + limit]
+        items = [
+            {**self.items[p], "relevance": relevance[p]} if relevance is not None else self.items[p]
+            for p in selected
+        ]
+        has_more = start + limit < len(positions)
+        cursor = tuple(items[-1][column] for column, _ in order) if has_more and items else None
+        return {"items": items, "cursor": cursor, "total": len(positions) if after is None else None}
@@ -1,4 +1,41 @@
 user_name = "postgres"
 user_password = "67909141"
 host_address = "127.0.0.1"
-database_name = "demoExam"
\ No newline at end of file
+database_name = "demoExam"
+
+# Пул соединений
+pool_enabled = True
+pool_min_size = 2
+pool_max_size = 8
+pool_timeout = 10.0
+pool_max_lifetime = 30 * 60.0
+pool_max_idle = 5 * 60.0
+
+# Режим поиска товаров: "trigram" — по столбцу item_search с GIN-индексом pg_trgm и ранжированием,
+# "ilike" — прежняя цепочка ILIKE по каждому полю
+search_engine = "trigram"
+
+# Поиск по каталогу в памяти процесса (DATABASE/SearchIndex.py) вместо запроса к БД на каждое нажатие;
+# для каталогов больше search_index_max_items товаров используется SQL
+search_index_enabled = True
+search_index_max_items = 50000
+
+# Кэш каталога: время жизни записи (сек), число записей и канал LISTEN/NOTIFY для сброса на других клиентах
+catalog_cache_ttl = 300.0
+catalog_cache_size = 128
+catalog_notify_channel = "catalog_changed"
+
+# Именованные подготовленные запросы (PREPARE один раз на соединение) для постоянного набора запросов
+prepared_statements_enabled = True
+
+# Коды получения заказов: сколько кодов клиент забирает из order_code_seq за одно обращение
+order_code_block_size = 20
+
+# Журнал медленных запросов: порог (мс, None — выключен), как часто снимать EXPLAIN для одного запроса чтения (сек)
+# и сколько последних медленных запросов хранить
+slow_query_ms = 200
+slow_query_explain_interval = 300.0
+slow_query_log_size = 50
+
+# Отдельная БД для DATABASE/Benchmark.py: скрипт пересоздаёт в ней таблицы и заполняет синтетическими данными
+benchmark_database_name = "demoExam_bench"
@@ -14,6 +14,8 @@ class CreateCardFrame(QFrame):
         super().__init__()
         self.controller = controller
         self.database = controller.db
+        self.product_form = None
+        self.saving = False
         self.frame_layout = QVBoxLayout(self)
         self.setup_ui()
 
@@ -38,33 +40,74 @@ class CreateCardFrame(QFrame):
         scroll_area.setWidget(container)
         self.frame_layout.addWidget(scroll_area)
 
-        save_button = QPushButton("Создать товар", objectName="button")
-        save_button.clicked.connect(self.save_new_product)
-        self.frame_layout.addWidget(save_button)
+        self.save_button = QPushButton("Создать товар", objectName="button")
+        self.save_button.clicked.connect(self.save_new_product)
+        self.frame_layout.addWidget(self.save_button)
+        self.image_editor.busy_changed.connect(self.update_save_button)
+
+    def refresh(self, changed=None):
+        """Очищает форму для нового товара."""
+        if self.product_form is None:
+            return
+        self.product_form.load_data({})
+        self.image_editor.reset()
 
     def save_new_product(self):
         product = self.product_form.get_data()
         if product is None:
             return
-        if self.database.article_exists(product.article):
+        self._set_saving(True)
+        self.controller.queries.submit(
+            self.database.article_exists,
+            product.article,
+            on_done=lambda exists: self.on_article_checked(product, exists),
+            on_error=self.on_product_failed,
+            key="create_card_save",
+        )
+
+    def on_article_checked(self, product, exists):
+        if exists:
+            self._set_saving(False)
             Messages.show_error("Товар с таким артикулом уже существует.", "Ошибка создания")
             return
 
         try:
-            picture_name = self.image_editor.save(product.article)
+            picture_name = self.image_editor.save()
         except Exception as error:
+            self._set_saving(False)
             Messages.show_error(f"Не удалось сохранить изображение: {error}")
             return
 
-        if not self.database.create_new_card(product.to_dict(), picture_name):
-            ProductImageEditor.delete(picture_name)
+        self.controller.queries.submit(
+            self.database.create_new_card,
+            product.to_dict(),
+            picture_name,
+            on_done=self.on_product_saved,
+            on_error=self.on_product_failed,
+            key="create_card_save",
+        )
+
+    def on_product_saved(self, saved):
+        self._set_saving(False)
+        if not saved:
             Messages.show_error("Не удалось сохранить товар в базе данных.")
             return
-
         Messages.show_info("Товар успешно создан.", "Готово")
-        self.controller.invalidate_frame(HomePageWindow.HomeFrame)
+        self.controller.refresh_frame(HomePageWindow.HomeFrame)
         self.controller.switch_window(HomePageWindow.HomeFrame)
 
+    def on_product_failed(self, message):
+        self._set_saving(False)
+        Messages.show_error(f"Не удалось создать товар: {message}")
+
+    def _set_saving(self, saving: bool):
+        self.saving = saving
+        self.update_save_button()
+
+    def update_save_button(self, *_):
+        # Пока товар записывается в фоне или выбранное фото ещё обрабатывается, сохранить нельзя
+        self.save_button.setEnabled(not self.saving and not self.image_editor.is_busy())
+
     def go_back_to_home_window(self):
         if Messages.ask_confirmation(
             "Прекратить создание товара? Несохранённые данные будут потеряны.",
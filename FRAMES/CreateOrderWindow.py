@@ -15,7 +15,7 @@ from PySide6.QtWidgets import (
 )
 
 import Messages
-from FRAMES import OrdersCardsWindow
+from FRAMES import HomePageWindow, OrdersCardsWindow
 from FRAMES.components import create_header, create_title
 from FRAMES.order_form import OrderDetailsForm
 
@@ -39,16 +39,25 @@ class CreateOrderFrame(QFrame):
         scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         container = QWidget()
         self.form_layout = QVBoxLayout(container)
-        self.details_form = OrderDetailsForm(self.database)
+        # Пункты выдачи приходят вместе с остатками товаров из фонового запроса (load_available_products)
+        self.details_form = OrderDetailsForm(self.database, pvz_values=[])
         self.form_layout.addWidget(self.details_form)
         self.create_products_section()
         self.create_order_items_table()
         scroll.setWidget(container)
         self.frame_layout.addWidget(scroll)
 
-        save_button = QPushButton("Создать заказ", objectName="button")
-        save_button.clicked.connect(self.create_order)
-        self.frame_layout.addWidget(save_button)
+        self.save_button = QPushButton("Создать заказ", objectName="button")
+        self.save_button.clicked.connect(self.create_order)
+        self.frame_layout.addWidget(self.save_button)
+
+    def refresh(self, changed=None):
+        """Очищает форму для нового заказа и перечитывает остатки товаров."""
+        self.order_items = []
+        self.update_order_items_table()
+        self.details_form.load_data({})
+        self.quantity_input.setText("1")
+        self.load_available_products()
 
     def create_products_section(self):
         section = QWidget()
@@ -72,7 +81,23 @@ class CreateOrderFrame(QFrame):
         self.load_available_products()
 
     def load_available_products(self):
-        self.available_products = self.database.get_all_items()
+        self.product_combo.setEnabled(False)
+        self.controller.queries.submit(
+            self.load_form_data,
+            on_done=self.fill_form_data,
+            on_error=lambda message: Messages.show_error(message, "Ошибка загрузки"),
+            key="create_order_data",
+        )
+
+    def load_form_data(self) -> dict:
+        """Остатки товаров и пункты выдачи одним фоновым заданием."""
+        return {"products": self.database.get_all_items(), "pvz": self.database.take_all_pvz_addresses()}
+
+    def fill_form_data(self, data):
+        if not self.details_form.pvz.count():
+            self.details_form.load_data({}, pvz_values=data["pvz"])
+        self.available_products = data["products"]
+        self.product_combo.setEnabled(True)
         self.product_combo.clear()
         for product in self.available_products:
             text = f"{product['article']} - {product['name']} (остаток: {product['count']})"
@@ -143,38 +168,57 @@ class CreateOrderFrame(QFrame):
 
     def create_order(self):
         details = self.details_form.get_data()
-        if details is None or not self._validate_items():
+        if details is None:
             return
+        if not self.order_items:
+            Messages.show_error("Добавьте хотя бы один товар в заказ.")
+            return
+        self.save_button.setEnabled(False)
+        self.controller.queries.submit(
+            self.save_order,
+            details,
+            list(self.order_items),
+            on_done=self.on_order_saved,
+            on_error=self.on_order_failed,
+            key="create_order",
+        )
+
+    def save_order(self, details: dict, items: list[dict]):
+        """Проверка остатков и запись заказа в фоновом потоке; возвращает (текст, заголовок) ошибки или None."""
+        current_products = {item["article"]: item for item in self.database.get_all_items()}
+        for item in items:
+            product = current_products.get(item["article"])
+            if product is None or item["quantity"] > product["count"]:
+                return (
+                    f"Остаток товара «{item['name']}» изменился. Обновите состав заказа.",
+                    "Недостаточно товара",
+                )
         user = self.database.take_user_data() or {"user_name": "Аккаунт Гостя"}
         details.update(
             {
                 "client_name": user["user_name"],
                 "code": self.database.get_next_order_code(),
-                "items": self.order_items,
+                "items": items,
             }
         )
         if not self.database.create_new_order(details):
-            Messages.show_error("Не удалось создать заказ в базе данных.")
-            return
+            return "Не удалось создать заказ в базе данных.", "Ошибка"
+        return None
 
+    def on_order_saved(self, error):
+        self.save_button.setEnabled(True)
+        if error is not None:
+            Messages.show_error(*error)
+            return
         Messages.show_info("Заказ успешно создан.", "Готово")
-        self.controller.invalidate_frame(OrdersCardsWindow.OrdersCardsFrame)
+        self.controller.refresh_frame(OrdersCardsWindow.OrdersCardsFrame)
+        # Товары списаны со склада — остатки в каталоге изменились
+        self.controller.refresh_frame(HomePageWindow.HomeFrame)
         self.controller.switch_window(OrdersCardsWindow.OrdersCardsFrame)
 
-    def _validate_items(self) -> bool:
-        if not self.order_items:
-            Messages.show_error("Добавьте хотя бы один товар в заказ.")
-            return False
-        current_products = {item["article"]: item for item in self.database.get_all_items()}
-        for item in self.order_items:
-            product = current_products.get(item["article"])
-            if product is None or item["quantity"] > product["count"]:
-                Messages.show_error(
-                    f"Остаток товара «{item['name']}» изменился. Обновите состав заказа.",
-                    "Недостаточно товара",
-                )
-                return False
-        return True
+    def on_order_failed(self, message):
+        self.save_button.setEnabled(True)
+        Messages.show_error(f"Не удалось создать заказ: {message}")
 
     def go_back_to_orders_window(self):
         if Messages.ask_confirmation(
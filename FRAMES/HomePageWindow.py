@@ -1,21 +1,23 @@
-from PySide6.QtCore import QTimer
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtWidgets import (
+    QAbstractItemView,
     QButtonGroup,
     QComboBox,
     QFrame,
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QListView,
     QPushButton,
     QRadioButton,
-    QScrollArea,
     QVBoxLayout,
     QWidget,
 )
 
 import Messages
+from DATABASE.Database import ITEMS_PAGE_SIZE
 from FRAMES import CreateCardWindow, LogInWindow, OrdersCardsWindow, UpdateCardWindow
-from FRAMES.cards import ProductCard
+from FRAMES.cards import ProductCardDelegate, ProductListModel
 from FRAMES.components import create_header, create_title
 from StaticStorage import Storage
 
@@ -29,6 +31,7 @@ class HomeFrame(QFrame):
         self.company_combo = None
         self.sort_asc_radio = None
         self.sort_desc_radio = None
+        self.shown_filters = None
 
         self.search_timer = QTimer(self)
         self.search_timer.setSingleShot(True)
@@ -49,10 +52,8 @@ class HomeFrame(QFrame):
         if "Фильтрация" in actions:
             self.create_filter_block()
 
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.frame_layout.addWidget(self.scroll_area)
-        self.update_items_display(self.database.get_all_items())
+        self.create_items_view()
+        self.perform_search_and_filter()
 
         if Storage.get_user_role() == "Администратор":
             add_button = QPushButton("Добавить товар", objectName="button")
@@ -66,6 +67,50 @@ class HomeFrame(QFrame):
             )
             self.frame_layout.addWidget(orders_button)
 
+    def create_items_view(self):
+        self.items_model = ProductListModel(self)
+        self.items_view = QListView(objectName="items_view")
+        self.items_view.setModel(self.items_model)
+        self.items_delegate = ProductCardDelegate(self.items_view)
+        self.items_delegate.thumbnails.loaded.connect(self.items_view.viewport().update)
+        self.items_view.setItemDelegate(self.items_delegate)
+        self.items_view.setUniformItemSizes(True)
+        self.items_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.items_view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.items_view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.items_view.setSpacing(4)
+        if Storage.get_user_role() == "Администратор":
+            self.items_view.viewport().setCursor(Qt.CursorShape.PointingHandCursor)
+            self.items_view.clicked.connect(
+                lambda index: self.open_update_product(self.items_model.item_at(index.row())["id"])
+            )
+        self.items_view.verticalScrollBar().valueChanged.connect(self.on_items_scrolled)
+        self.empty_label = create_title("Товары не найдены")
+        self.empty_label.hide()
+        self.count_label = QLabel(objectName="UpdateTextHint")
+        self.frame_layout.addWidget(self.count_label)
+        self.frame_layout.addWidget(self.empty_label)
+        self.frame_layout.addWidget(self.items_view)
+
+    def on_items_scrolled(self, value):
+        """Подгружает следующую страницу заранее, пока до конца списка остаётся меньше двух экранов."""
+        scroll_bar = self.items_view.verticalScrollBar()
+        if scroll_bar.maximum() - value < 2 * self.items_view.viewport().height() and self.items_model.canFetchMore():
+            self.items_model.fetchMore()
+        self.prefetch_pictures()
+
+    def prefetch_pictures(self):
+        """Готовит картинки видимых карточек и ещё одного экрана выше и ниже, остальные не грузит."""
+        viewport = self.items_view.viewport().rect()
+        first = self.items_view.indexAt(viewport.topLeft())
+        if not first.isValid():
+            return
+        last = self.items_view.indexAt(viewport.bottomLeft())
+        first_row = first.row()
+        last_row = last.row() if last.isValid() else self.items_model.rowCount() - 1
+        visible = last_row - first_row + 1
+        self.items_delegate.prefetch(self.items_model, first_row - visible, last_row + visible)
+
     def create_search_block(self):
         container = QWidget()
         layout = QHBoxLayout(container)
@@ -97,16 +142,23 @@ class HomeFrame(QFrame):
         layout = QHBoxLayout(container)
         layout.addWidget(QLabel("Поставщик:", objectName="UpdateTextHint"))
         self.company_combo = QComboBox(objectName="company_filter")
-        self.company_combo.addItems(self.database.take_all_deliveryman())
+        self.company_combo.addItem("Все поставщики")
         self.company_combo.currentIndexChanged.connect(self.on_any_change)
         layout.addWidget(self.company_combo)
         layout.addStretch()
         self.frame_layout.addWidget(container)
+        self.controller.queries.submit(self.database.take_all_deliveryman, on_done=self.fill_company_filter)
+
+    def fill_company_filter(self, companies):
+        self.company_combo.blockSignals(True)
+        self.company_combo.clear()
+        self.company_combo.addItems(companies)
+        self.company_combo.blockSignals(False)
 
     def on_any_change(self, *_):
         self.search_timer.start(300)
 
-    def perform_search_and_filter(self):
+    def perform_search_and_filter(self, limit: int = ITEMS_PAGE_SIZE):
         search_text = self.search_edit.text().strip() if self.search_edit else ""
         company = self.company_combo.currentText() if self.company_combo else ""
         sort_by_count = bool(
@@ -114,36 +166,67 @@ class HomeFrame(QFrame):
             or (self.sort_desc_radio and self.sort_desc_radio.isChecked())
         )
         sort_ascending = not (self.sort_desc_radio and self.sort_desc_radio.isChecked())
-        try:
-            items = self.database.search_and_filter_items(
-                search_text=search_text,
-                company_filter=company,
-                sort_by_count=sort_by_count,
-                sort_ascending=sort_ascending,
-            )
-            self.update_items_display(items)
-        except Exception as error:
-            Messages.show_error(f"Не удалось обновить список товаров: {error}")
+        filters = {
+            "search_text": search_text,
+            "company_filter": company,
+            "sort_by_count": sort_by_count,
+            "sort_ascending": sort_ascending,
+        }
+        self.count_label.setText("Загрузка...")
+        self.controller.queries.cancel("home_page")
+        self.controller.queries.submit(
+            self.database.search_items_page,
+            **filters,
+            limit=limit,
+            on_done=lambda page: self.update_items_display(page, filters),
+            on_error=self.on_search_failed,
+            key="home_search",
+        )
 
-    def update_items_display(self, items):
-        container = QWidget()
-        layout = QVBoxLayout(container)
-        if not items:
-            layout.addWidget(create_title("Товары не найдены"))
-        else:
-            on_click = self.open_update_product if Storage.get_user_role() == "Администратор" else None
-            for item in items:
-                layout.addWidget(ProductCard(item, on_click))
-        layout.addStretch()
-        self.scroll_area.setWidget(container)
+    def load_next_page(self, filters, cursor, callback):
+        self.controller.queries.submit(
+            self.database.search_items_page,
+            **filters,
+            after=cursor,
+            on_done=callback,
+            on_error=lambda _: callback(None),
+            key="home_page",
+        )
+
+    def refresh(self, changed=None):
+        """
+        Перечитывает текущую выборку на всю уже подгруженную длину: список не укорачивается до первой
+        страницы и прокрутка сохраняется, а сверка по id перерисует только изменённые карточки
+        :param changed: id изменённых товаров; пустое множество — перечитывать нечего
+        """
+        if changed is not None and not changed:
+            return
+        self.perform_search_and_filter(limit=max(self.items_model.rowCount(), ITEMS_PAGE_SIZE))
+
+    def on_search_failed(self, message):
+        self.count_label.setText("")
+        Messages.show_error(f"Не удалось обновить список товаров: {message}")
+
+    def update_items_display(self, page, filters):
+        # Карточки сверяются по id: уже показанные строки не пересоздаются, меняются только отличия
+        self.items_model.set_page(
+            page, lambda cursor, callback: self.load_next_page(filters, cursor, callback), keyed=True
+        )
+        if filters != self.shown_filters:
+            self.items_view.scrollToTop()
+        self.shown_filters = filters
+        self.count_label.setText(f"Найдено товаров: {self.items_model.total}")
+        self.empty_label.setVisible(not self.items_model.total)
+        self.items_view.setVisible(bool(self.items_model.total))
+        QTimer.singleShot(0, self.prefetch_pictures)
 
     def open_create_product(self):
-        self.controller.invalidate_frame(CreateCardWindow.CreateCardFrame)
+        self.controller.refresh_frame(CreateCardWindow.CreateCardFrame)
         self.controller.switch_window(CreateCardWindow.CreateCardFrame)
 
     def open_update_product(self, item_id):
         Storage.set_item_id(item_id)
-        self.controller.invalidate_frame(UpdateCardWindow.UpdateCardFrame)
+        self.controller.refresh_frame(UpdateCardWindow.UpdateCardFrame, [item_id])
         self.controller.switch_window(UpdateCardWindow.UpdateCardFrame)
 
     def go_back_to_log_in_window(self):
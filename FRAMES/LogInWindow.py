@@ -2,8 +2,7 @@ from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QFrame, QLineEdit, QPushButton, QVBoxLayout
 
 import Messages
-from FRAMES import HomePageWindow
-from FRAMES.components import create_labeled_edit, create_logo_label, create_title
+from FRAMES.components import create_labeled_edit, create_loading_label, create_logo_label, create_title
 from StaticStorage import Storage
 
 
@@ -11,7 +10,6 @@ class LogInFrame(QFrame):
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
-        self.database = controller.db
         self.frame_layout = QVBoxLayout(self)
         self.setup_ui()
 
@@ -42,6 +40,17 @@ class LogInFrame(QFrame):
         guest_button.clicked.connect(self.guest_enter)
         self.frame_layout.addWidget(guest_button)
 
+        # Пока подключение к БД идёт в фоне, войти нельзя
+        self.status_label = create_loading_label("Подключение к базе данных...")
+        self.frame_layout.addWidget(self.status_label)
+        self.buttons = [login_button, guest_button]
+        self.set_database_ready(self.controller.db is not None)
+
+    def set_database_ready(self, ready: bool):
+        for button in self.buttons:
+            button.setEnabled(ready)
+        self.status_label.setVisible(not ready)
+
     def log_in(self):
         login = self.login_edit.text().strip()
         password = self.password_edit.text()
@@ -50,7 +59,19 @@ class LogInFrame(QFrame):
             return
 
         Storage.clear_all()
-        if not self.database.check_user_login_password(login, password):
+        self._set_buttons_enabled(False)
+        self.controller.queries.submit(
+            self.controller.db.check_user_login_password,
+            login,
+            password,
+            on_done=self.on_login_checked,
+            on_error=self.on_login_failed,
+            key="log_in",
+        )
+
+    def on_login_checked(self, found):
+        self._set_buttons_enabled(True)
+        if not found:
             Messages.show_error(
                 "Пользователь не найден. Проверьте логин и пароль и повторите попытку.",
                 "Ошибка авторизации",
@@ -58,6 +79,14 @@ class LogInFrame(QFrame):
             return
         self._open_home()
 
+    def on_login_failed(self, message):
+        self._set_buttons_enabled(True)
+        Messages.show_error(f"Не удалось выполнить вход: {message}", "Ошибка авторизации")
+
+    def _set_buttons_enabled(self, enabled: bool):
+        for button in self.buttons:
+            button.setEnabled(enabled)
+
     def guest_enter(self):
         Storage.clear_all()
         Storage.set_user_role("Гость")
@@ -65,5 +94,8 @@ class LogInFrame(QFrame):
         self._open_home()
 
     def _open_home(self):
+        # Экраны после входа импортируются при первом входе, а не при запуске приложения
+        from FRAMES import HomePageWindow
+
         self.controller.invalidate_frame(HomePageWindow.HomeFrame)
         self.controller.switch_window(HomePageWindow.HomeFrame)
@@ -1,9 +1,11 @@
 from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QFrame, QLabel, QPushButton, QScrollArea, QVBoxLayout, QWidget
+from PySide6.QtWidgets import QAbstractItemView, QFrame, QListView, QPushButton, QVBoxLayout
 
+import Messages
+from DATABASE.Database import ORDERS_PAGE_SIZE
 from FRAMES import CreateOrderWindow, HomePageWindow, UpdateOrderWindow
-from FRAMES.cards import OrderCard
-from FRAMES.components import create_header, create_title
+from FRAMES.cards import OrderCardDelegate, OrderListModel
+from FRAMES.components import create_header, create_loading_label, create_title
 from StaticStorage import Storage
 
 
@@ -19,9 +21,7 @@ class OrdersCardsFrame(QFrame):
         self.frame_layout.addWidget(create_header(self.database, self.go_back_to_home_window))
         self.frame_layout.addWidget(create_title("Список заказов"))
 
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.frame_layout.addWidget(self.scroll_area)
+        self.create_orders_view()
         self.update_orders_display()
 
         if Storage.get_user_role() == "Администратор":
@@ -29,27 +29,80 @@ class OrdersCardsFrame(QFrame):
             add_button.clicked.connect(self.go_to_create_order_window)
             self.frame_layout.addWidget(add_button)
 
-    def update_orders_display(self):
-        container = QWidget()
-        layout = QVBoxLayout(container)
-        orders = self.database.take_all_orders_rows()
-        if not orders:
-            empty = QLabel("Заказы отсутствуют", objectName="empty_text")
-            empty.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(empty)
-        else:
-            for order in orders:
-                layout.addWidget(OrderCard(order, self.open_order))
-        layout.addStretch()
-        self.scroll_area.setWidget(container)
+    def create_orders_view(self):
+        self.orders_model = OrderListModel(self)
+        self.orders_view = QListView(objectName="items_view")
+        self.orders_view.setModel(self.orders_model)
+        self.orders_view.setItemDelegate(OrderCardDelegate(self.orders_view))
+        self.orders_view.setUniformItemSizes(True)
+        self.orders_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.orders_view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.orders_view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.orders_view.setSpacing(4)
+        self.orders_view.viewport().setCursor(Qt.CursorShape.PointingHandCursor)
+        self.orders_view.clicked.connect(lambda index: self.open_order(self.orders_model.item_at(index.row())["id"]))
+        self.orders_view.verticalScrollBar().valueChanged.connect(self.on_orders_scrolled)
+        self.loading_label = create_loading_label()
+        self.empty_label = create_loading_label("Заказы отсутствуют")
+        self.empty_label.hide()
+        self.frame_layout.addWidget(self.loading_label)
+        self.frame_layout.addWidget(self.empty_label)
+        self.frame_layout.addWidget(self.orders_view)
+
+    def on_orders_scrolled(self, value):
+        """Подгружает следующую страницу заранее, пока до конца списка остаётся меньше двух экранов."""
+        scroll_bar = self.orders_view.verticalScrollBar()
+        if scroll_bar.maximum() - value < 2 * self.orders_view.viewport().height() and self.orders_model.canFetchMore():
+            self.orders_model.fetchMore()
+
+    def refresh(self, changed=None):
+        """
+        Перечитывает заказы на всю уже подгруженную длину, чтобы не терять прокрутку;
+        сверка по id перерисует только изменённые
+        :param changed: id изменённых заказов; пустое множество — перечитывать нечего
+        """
+        if changed is not None and not changed:
+            return
+        self.update_orders_display(limit=max(self.orders_model.rowCount(), ORDERS_PAGE_SIZE))
+
+    def update_orders_display(self, limit: int = ORDERS_PAGE_SIZE):
+        self.loading_label.setVisible(not self.orders_model.rowCount())
+        self.empty_label.hide()
+        self.controller.queries.cancel("orders_page")
+        self.controller.queries.submit(
+            self.database.take_orders_page,
+            limit=limit,
+            on_done=self.show_orders,
+            on_error=self.on_orders_failed,
+            key="orders",
+        )
+
+    def load_next_page(self, cursor, callback):
+        self.controller.queries.submit(
+            self.database.take_orders_page,
+            after=cursor,
+            on_done=callback,
+            on_error=lambda _: callback(None),
+            key="orders_page",
+        )
+
+    def on_orders_failed(self, message):
+        self.loading_label.hide()
+        Messages.show_error(f"Не удалось загрузить заказы: {message}")
+
+    def show_orders(self, page):
+        self.orders_model.set_page(page, self.load_next_page, keyed=True)
+        self.loading_label.hide()
+        self.empty_label.setVisible(not self.orders_model.total)
+        self.orders_view.setVisible(bool(self.orders_model.total))
 
     def open_order(self, order_id):
         Storage.set_order_id(order_id)
-        self.controller.invalidate_frame(UpdateOrderWindow.UpdateOrderFrame)
+        self.controller.refresh_frame(UpdateOrderWindow.UpdateOrderFrame, [order_id])
         self.controller.switch_window(UpdateOrderWindow.UpdateOrderFrame)
 
     def go_to_create_order_window(self):
-        self.controller.invalidate_frame(CreateOrderWindow.CreateOrderFrame)
+        self.controller.refresh_frame(CreateOrderWindow.CreateOrderFrame)
         self.controller.switch_window(CreateOrderWindow.CreateOrderFrame)
 
     def go_back_to_home_window(self):
@@ -3,7 +3,7 @@ from PySide6.QtWidgets import QFrame, QPushButton, QScrollArea, QVBoxLayout, QWi
 
 import Messages
 from FRAMES import HomePageWindow
-from FRAMES.components import create_header, create_title
+from FRAMES.components import create_header, create_loading_label, create_title
 from FRAMES.image_service import ProductImageEditor
 from FRAMES.product_form import ProductForm
 from StaticStorage import Storage
@@ -14,23 +14,62 @@ class UpdateCardFrame(QFrame):
         super().__init__()
         self.controller = controller
         self.database = controller.db
-        self.item_data = self.database.take_item_single_info()
+        self.item_data = {}
+        self.product_form = None
+        self.image_editor = None
+        self.saving = False
         self.frame_layout = QVBoxLayout(self)
         self.setup_ui()
 
     def setup_ui(self):
         self.frame_layout.addWidget(create_header(self.database, self.go_back_to_home_window))
         self.frame_layout.addWidget(create_title("Редактирование товара"))
+        self.loading_label = create_loading_label()
+        self.frame_layout.addWidget(self.loading_label)
+        self.content = QWidget()
+        self.content_layout = QVBoxLayout(self.content)
+        self.content_layout.setContentsMargins(0, 0, 0, 0)
+        self.content.hide()
+        self.frame_layout.addWidget(self.content)
+        self.refresh()
+
+    def refresh(self, changed=None):
+        """Загружает товар из Storage в уже созданную форму."""
+        self.content.hide()
+        self.loading_label.show()
+        self.controller.queries.submit(
+            self.load_item,
+            on_done=self.show_item,
+            on_error=lambda message: Messages.show_error(message, "Ошибка загрузки"),
+            key="update_card",
+        )
+
+    def load_item(self) -> dict:
+        """Данные товара и значения выпадающих списков одним фоновым заданием."""
+        return {
+            "item": self.database.take_item_single_info(),
+            "combo_values": ProductForm.load_combo_values(self.database),
+        }
+
+    def show_item(self, data):
+        self.loading_label.hide()
+        self.item_data = data["item"]
         if not self.item_data:
             Messages.show_error("Выбранный товар не найден.", "Ошибка загрузки")
             return
 
+        if self.product_form is not None:
+            self.product_form.load_data(self.item_data, data["combo_values"])
+            self.image_editor.reset(self.item_data.get("picture", "picture.png"))
+            self.content.show()
+            return
+
         scroll_area = QScrollArea()
         scroll_area.setWidgetResizable(True)
         scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         container = QWidget()
         layout = QVBoxLayout(container)
-        self.product_form = ProductForm(self.database, self.item_data)
+        self.product_form = ProductForm(self.database, self.item_data, data["combo_values"])
         self.image_editor = ProductImageEditor(
             self.item_data.get("picture", "picture.png"),
             "Изменить фото",
@@ -38,46 +77,76 @@ class UpdateCardFrame(QFrame):
         layout.addWidget(self.product_form)
         layout.addWidget(self.image_editor)
         scroll_area.setWidget(container)
-        self.frame_layout.addWidget(scroll_area)
+        self.content_layout.addWidget(scroll_area)
 
-        save_button = QPushButton("Сохранить изменения", objectName="button")
-        save_button.clicked.connect(self.save_changes)
-        self.frame_layout.addWidget(save_button)
+        self.save_button = QPushButton("Сохранить изменения", objectName="button")
+        self.save_button.clicked.connect(self.save_changes)
+        self.content_layout.addWidget(self.save_button)
 
-        delete_button = QPushButton("Удалить товар", objectName="button")
-        delete_button.clicked.connect(self.delete_item)
-        self.frame_layout.addWidget(delete_button)
+        self.delete_button = QPushButton("Удалить товар", objectName="button")
+        self.delete_button.clicked.connect(self.delete_item)
+        self.content_layout.addWidget(self.delete_button)
+        self.image_editor.busy_changed.connect(self.update_buttons)
+        self.content.show()
 
     def save_changes(self):
         product = self.product_form.get_data()
         if product is None:
             return
-        if self.database.article_exists(product.article, exclude_id=self.item_data["id"]):
-            Messages.show_error("Товар с таким артикулом уже существует.")
+        self._set_buttons_enabled(False)
+        self.controller.queries.submit(
+            self.database.article_exists,
+            product.article,
+            exclude_id=self.item_data["id"],
+            on_done=lambda exists: self.on_article_checked(product, exists),
+            on_error=lambda message: self.on_action_failed(f"Не удалось обновить товар: {message}"),
+            key="update_card_save",
+        )
+
+    def on_article_checked(self, product, exists):
+        if exists:
+            self.on_action_failed("Товар с таким артикулом уже существует.")
             return
 
         old_picture = self.item_data.get("picture", "picture.png")
         try:
-            new_picture = self.image_editor.save(product.article, old_picture)
+            new_picture = self.image_editor.save(old_picture)
         except Exception as error:
-            Messages.show_error(f"Не удалось сохранить изображение: {error}")
+            self.on_action_failed(f"Не удалось сохранить изображение: {error}")
             return
 
-        if not self.database.update_card_picture(new_picture, product.to_dict()):
-            if new_picture != old_picture:
-                ProductImageEditor.delete(new_picture)
+        # Картинки могут быть общими для нескольких товаров: ненужные файлы удаляет сборщик мусора (image_store)
+        self.controller.queries.submit(
+            self.database.update_card_picture,
+            new_picture,
+            product.to_dict(),
+            on_done=self.on_item_saved,
+            on_error=lambda message: self.on_action_failed(f"Не удалось обновить товар: {message}"),
+            key="update_card_save",
+        )
+
+    def on_item_saved(self, saved):
+        self._set_buttons_enabled(True)
+        if not saved:
             Messages.show_error("Не удалось обновить товар в базе данных.")
             return
-
-        if new_picture != old_picture:
-            ProductImageEditor.delete(old_picture)
         Messages.show_info("Товар успешно обновлён.", "Готово")
-        self.controller.invalidate_frame(HomePageWindow.HomeFrame)
+        self.controller.refresh_frame(HomePageWindow.HomeFrame, [self.item_data["id"]])
         self.controller.switch_window(HomePageWindow.HomeFrame)
 
     def delete_item(self):
-        article = self.item_data["article"]
-        if self.database.check_product_in_orders(article):
+        self._set_buttons_enabled(False)
+        self.controller.queries.submit(
+            self.database.check_product_in_orders,
+            self.item_data["article"],
+            on_done=self.on_orders_checked,
+            on_error=lambda message: self.on_action_failed(f"Не удалось удалить товар: {message}"),
+            key="update_card_save",
+        )
+
+    def on_orders_checked(self, in_orders):
+        if in_orders:
+            self._set_buttons_enabled(True)
             Messages.show_error(
                 "Товар присутствует в заказе и не может быть удалён.",
                 "Удаление запрещено",
@@ -87,22 +156,47 @@ class UpdateCardFrame(QFrame):
             f"Удалить товар «{self.item_data['name']}»? Отменить операцию будет невозможно.",
             "Удаление товара",
         ):
+            self._set_buttons_enabled(True)
             return
-        if not self.database.delete_item(article):
+        self.controller.queries.submit(
+            self.database.delete_item,
+            self.item_data["article"],
+            on_done=self.on_item_deleted,
+            on_error=lambda message: self.on_action_failed(f"Не удалось удалить товар: {message}"),
+            key="update_card_save",
+        )
+
+    def on_item_deleted(self, deleted):
+        self._set_buttons_enabled(True)
+        if not deleted:
             Messages.show_error("Не удалось удалить товар.")
             return
 
-        ProductImageEditor.delete(self.item_data.get("picture", ""))
         Messages.show_info("Товар удалён.", "Готово")
         Storage.set_item_id(None)
-        self.controller.invalidate_frame(HomePageWindow.HomeFrame)
+        self.controller.refresh_frame(HomePageWindow.HomeFrame, [self.item_data["id"]])
         self.controller.switch_window(HomePageWindow.HomeFrame)
 
+    def on_action_failed(self, message):
+        self._set_buttons_enabled(True)
+        Messages.show_error(message)
+
+    def _set_buttons_enabled(self, enabled: bool):
+        self.saving = not enabled
+        self.update_buttons()
+
+    def update_buttons(self, *_):
+        # Пока изменения записываются в фоне, повторно сохранить или удалить товар нельзя;
+        # сохранить нельзя и пока выбранное фото ещё обрабатывается
+        self.save_button.setEnabled(not self.saving and not self.image_editor.is_busy())
+        self.delete_button.setEnabled(not self.saving)
+
     def go_back_to_home_window(self):
         if Messages.ask_confirmation(
             "Прекратить редактирование? Несохранённые изменения будут потеряны.",
             "Подтверждение выхода",
         ):
-            self.image_editor.cleanup()
+            if self.image_editor is not None:
+                self.image_editor.cleanup()
             Storage.set_item_id(None)
             self.controller.switch_window(HomePageWindow.HomeFrame)
@@ -2,8 +2,8 @@ from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QFrame, QPushButton, QScrollArea, QVBoxLayout, QWidget
 
 import Messages
-from FRAMES import OrdersCardsWindow
-from FRAMES.components import create_header, create_title
+from FRAMES import HomePageWindow, OrdersCardsWindow
+from FRAMES.components import create_header, create_loading_label, create_title
 from FRAMES.order_form import OrderDetailsForm, OrderItemsView
 from StaticStorage import Storage
 
@@ -13,50 +13,110 @@ class UpdateOrderFrame(QFrame):
         super().__init__()
         self.controller = controller
         self.database = controller.db
-        self.order_data = self.database.get_order_by_id(Storage.get_order_id())
-        self.order_items = self.database.get_order_items_with_prices(Storage.get_order_id())
+        self.order_data = None
+        self.order_items = []
+        self.details_form = None
+        self.buttons = []
         self.frame_layout = QVBoxLayout(self)
         self.setup_ui()
 
     def setup_ui(self):
         self.frame_layout.addWidget(create_header(self.database, self.go_back_to_orders_window))
-        is_admin = Storage.get_user_role() == "Администратор"
-        title = "Редактирование заказа" if is_admin else "Просмотр заказа"
+        self.is_admin = Storage.get_user_role() == "Администратор"
+        title = "Редактирование заказа" if self.is_admin else "Просмотр заказа"
         self.frame_layout.addWidget(create_title(title))
+        self.loading_label = create_loading_label()
+        self.frame_layout.addWidget(self.loading_label)
+        self.content = QWidget()
+        self.content_layout = QVBoxLayout(self.content)
+        self.content_layout.setContentsMargins(0, 0, 0, 0)
+        self.content.hide()
+        self.frame_layout.addWidget(self.content)
+        self.refresh()
+
+    def refresh(self, changed=None):
+        """Загружает заказ из Storage в уже созданную форму."""
+        self.content.hide()
+        self.loading_label.show()
+        self.controller.queries.submit(
+            self.load_order,
+            Storage.get_order_id(),
+            on_done=self.show_order,
+            on_error=lambda message: Messages.show_error(message, "Ошибка загрузки"),
+            key="update_order",
+        )
+
+    def load_order(self, order_id) -> dict:
+        """Все данные экрана одним фоновым заданием."""
+        return {
+            "order": self.database.get_order_by_id(order_id),
+            "items": self.database.get_order_items_with_prices(order_id),
+            "pvz": self.database.take_all_pvz_addresses(),
+        }
+
+    def show_order(self, data):
+        self.loading_label.hide()
+        self.order_data = data["order"]
+        self.order_items = data["items"]
         if not self.order_data:
             Messages.show_error("Выбранный заказ не найден.", "Ошибка загрузки")
             return
 
+        if self.details_form is not None:
+            self.details_form.load_data(self.order_data, pvz_values=data["pvz"])
+            self.items_view.set_items(self.order_items)
+            self.content.show()
+            return
+
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
         scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         container = QWidget()
         layout = QVBoxLayout(container)
-        self.details_form = OrderDetailsForm(self.database, self.order_data, editable=is_admin)
+        self.details_form = OrderDetailsForm(
+            self.database,
+            self.order_data,
+            editable=self.is_admin,
+            pvz_values=data["pvz"],
+        )
         layout.addWidget(self.details_form)
-        layout.addWidget(OrderItemsView(self.order_items))
+        self.items_view = OrderItemsView(self.order_items)
+        layout.addWidget(self.items_view)
         layout.addStretch()
         scroll.setWidget(container)
-        self.frame_layout.addWidget(scroll)
+        self.content_layout.addWidget(scroll)
 
-        if is_admin:
+        if self.is_admin:
             save_button = QPushButton("Сохранить изменения", objectName="button")
             save_button.clicked.connect(self.save_changes)
-            self.frame_layout.addWidget(save_button)
+            self.content_layout.addWidget(save_button)
             delete_button = QPushButton("Удалить заказ", objectName="button")
             delete_button.clicked.connect(self.delete_order)
-            self.frame_layout.addWidget(delete_button)
+            self.content_layout.addWidget(delete_button)
+            self.buttons = [save_button, delete_button]
+        self.content.show()
 
     def save_changes(self):
         data = self.details_form.get_data()
         if data is None:
             return
         data["id"] = self.order_data["id"]
-        if not self.database.update_order_data(data):
+        self._set_buttons_enabled(False)
+        self.controller.queries.submit(
+            self.database.update_order_data,
+            data,
+            on_done=self.on_order_saved,
+            on_error=lambda message: self.on_action_failed(f"Не удалось обновить заказ: {message}"),
+            key="update_order_save",
+        )
+
+    def on_order_saved(self, saved):
+        self._set_buttons_enabled(True)
+        if not saved:
             Messages.show_error("Не удалось обновить заказ.")
             return
         Messages.show_info("Заказ успешно обновлён.", "Готово")
-        self.controller.invalidate_frame(OrdersCardsWindow.OrdersCardsFrame)
+        self.controller.refresh_frame(OrdersCardsWindow.OrdersCardsFrame, [self.order_data["id"]])
         self.controller.switch_window(OrdersCardsWindow.OrdersCardsFrame)
 
     def delete_order(self):
@@ -65,14 +125,36 @@ class UpdateOrderFrame(QFrame):
             "Удаление заказа",
         ):
             return
-        if not self.database.delete_order(self.order_data["id"]):
+        self._set_buttons_enabled(False)
+        self.controller.queries.submit(
+            self.database.delete_order,
+            self.order_data["id"],
+            on_done=self.on_order_deleted,
+            on_error=lambda message: self.on_action_failed(f"Не удалось удалить заказ: {message}"),
+            key="update_order_save",
+        )
+
+    def on_order_deleted(self, deleted):
+        self._set_buttons_enabled(True)
+        if not deleted:
             Messages.show_error("Не удалось удалить заказ.")
             return
         Messages.show_info("Заказ удалён.", "Готово")
         Storage.set_order_id(None)
-        self.controller.invalidate_frame(OrdersCardsWindow.OrdersCardsFrame)
+        self.controller.refresh_frame(OrdersCardsWindow.OrdersCardsFrame, [self.order_data["id"]])
+        # Товары вернулись на склад — остатки в каталоге изменились
+        self.controller.refresh_frame(HomePageWindow.HomeFrame)
         self.controller.switch_window(OrdersCardsWindow.OrdersCardsFrame)
 
+    def on_action_failed(self, message):
+        self._set_buttons_enabled(True)
+        Messages.show_error(message)
+
+    def _set_buttons_enabled(self, enabled: bool):
+        # Пока изменения записываются в фоне, повторно сохранить или удалить заказ нельзя
+        for button in self.buttons:
+            button.setEnabled(enabled)
+
     def go_back_to_orders_window(self):
         Storage.set_order_id(None)
         self.controller.switch_window(OrdersCardsWindow.OrdersCardsFrame)
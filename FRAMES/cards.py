@@ -1,125 +1,390 @@
-from pathlib import Path
-
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QPixmap
-from PySide6.QtWidgets import QFrame, QHBoxLayout, QLabel, QPushButton, QVBoxLayout, QWidget
-
-from FRAMES.components import ICONS_DIR
-
-
-def _label(text, *, object_name="cardText", word_wrap=False, alignment=None) -> QLabel:
-    label = QLabel(str(text), objectName=object_name)
-    label.setWordWrap(word_wrap)
-    if alignment is not None:
-        label.setAlignment(alignment)
-    return label
-
-
-class ProductCard(QWidget):
-    def __init__(self, item: dict, on_click=None):
-        super().__init__(objectName="item_card")
-        self.setMinimumHeight(260)
-        self.setMaximumHeight(300)
-        state = "out_of_stock" if item["count"] == 0 else "high_discount" if item["sale"] > 15 else "normal"
-        self.setProperty("state", state)
-
-        layout = QHBoxLayout(self)
-        layout.addWidget(self._picture(item.get("picture")))
-
-        information = QPushButton() if on_click else QWidget()
-        information.setObjectName("update_button" if on_click else "product_information")
-        information.setMinimumHeight(240)
-        if on_click:
-            information.clicked.connect(lambda: on_click(item["id"]))
-        info_layout = QVBoxLayout(information)
-
-        info_layout.addWidget(_label(f"{item['category']} | {item['name']}"))
-        info_layout.addWidget(_label(f"Описание товара: {item['information']}", word_wrap=True))
-        info_layout.addWidget(_label(f"Производитель: {item['creator']}", word_wrap=True))
-        info_layout.addWidget(_label(f"Поставщик: {item['deliveryman']}", word_wrap=True))
-        info_layout.addLayout(self._price_layout(item))
-        info_layout.addWidget(_label(f"Единица измерения: {item['edinica']}", word_wrap=True))
-        info_layout.addWidget(_label(f"Количество на складе: {item['count']}", object_name="stock_count"))
-        layout.addWidget(information)
-
-        discount = QWidget(objectName="sale_widget")
-        discount.setFixedWidth(100)
-        discount_layout = QVBoxLayout(discount)
-        discount_layout.addWidget(
-            _label(
-                f"Скидка:\n{item['sale']}%",
-                object_name="sale_text",
-                alignment=Qt.AlignmentFlag.AlignCenter,
-            )
+
+from bisect import bisect_left
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QRect, QSize, Qt
+from PySide6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPen, QPixmap
+from PySide6.QtWidgets import QStyledItemDelegate
+
+from FRAMES.thumbnails import ThumbnailLoader
+
+
+class PagedListModel(QAbstractListModel):
+    """Список строк-словарей для QListView: виджеты не создаются, карточки рисует делегат.
+
+    Если задан загрузчик страниц, следующие страницы подгружаются через fetchMore по курсору.
+    При keyed=True новый список сверяется со старым по KEY: совпавшие строки остаются на месте
+    (или переставляются), изменённые перерисовываются, вставляются и удаляются только отличия.
+    """
+
+    DISPLAY_KEY = "id"
+    KEY = "id"
+    # Если переставлять пришлось бы больше строк, дешевле один сброс модели (например, смена сортировки)
+    MAX_MOVES = 64
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items = []
+        self._cursor = None
+        self._page_loader = None
+        self._fetching = False
+        self._generation = 0
+        self.total = 0
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._items[index.row()][self.DISPLAY_KEY]
+        return None
+
+    def item_at(self, row: int) -> dict:
+        return self._items[row]
+
+    def set_items(self, items, keyed: bool = False) -> None:
+        items = list(items)
+        # Подгрузка по старому курсору больше не нужна: её результат отбросит смена поколения
+        self._cursor = None
+        self._page_loader = None
+        self._fetching = False
+        self._generation += 1
+        self.total = len(items)
+        if keyed and self._items and items:
+            stable, kept = self._stable_keys(items)
+            if kept - len(stable) <= self.MAX_MOVES:
+                self._reconcile(items, stable)
+                return
+        self.beginResetModel()
+        self._items = items
+        self.endResetModel()
+
+    def set_page(self, page: dict, page_loader, keyed: bool = False) -> None:
+        """Начинает список с первой страницы; page_loader(cursor, callback) запрашивает следующую и отдаёт её в callback."""
+        self.set_items(page["items"], keyed)
+        self.total = page["total"] if page["total"] is not None else len(self._items)
+        self._cursor = page["cursor"]
+        self._page_loader = page_loader
+
+    def _stable_keys(self, items) -> tuple[set, int]:
+        """
+        Ключи наибольшей цепочки оставшихся строк, сохранивших взаимный порядок, — их не переставляем
+        :return: (ключи цепочки, сколько всего строк осталось); переставить придётся остальные
+        """
+        old_rows = {item[self.KEY]: row for row, item in enumerate(self._items)}
+        kept = [item[self.KEY] for item in items if item[self.KEY] in old_rows]
+        # tails[i] — индекс в kept последнего элемента лучшей цепочки длины i + 1, parents — предыдущий элемент
+        tails = []
+        tail_rows = []
+        parents = [None] * len(kept)
+        for index, key in enumerate(kept):
+            row = old_rows[key]
+            position = bisect_left(tail_rows, row)
+            parents[index] = tails[position - 1] if position else None
+            if position == len(tails):
+                tails.append(index)
+                tail_rows.append(row)
+            else:
+                tails[position] = index
+                tail_rows[position] = row
+        stable = set()
+        index = tails[-1] if tails else None
+        while index is not None:
+            stable.add(kept[index])
+            index = parents[index]
+        return stable, len(kept)
+
+    def _reconcile(self, items, stable: set) -> None:
+        keys = {item[self.KEY] for item in items}
+        row = len(self._items) - 1
+        while row >= 0:
+            if self._items[row][self.KEY] in keys:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and self._items[row][self.KEY] not in keys:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row + 1, last)
+            del self._items[row + 1:last + 1]
+            self.endRemoveRows()
+
+        # Переставляются только строки вне цепочки: каждая встаёт сразу за своей предшественницей в новом порядке
+        rows = {item[self.KEY]: row for row, item in enumerate(self._items)}
+        previous = None
+        for item in items:
+            key = item[self.KEY]
+            if key not in rows:
+                continue
+            if key not in stable:
+                source = rows[key]
+                target = 0 if previous is None else rows[previous] + 1
+                if target > source:
+                    target -= 1
+                if target != source:
+                    self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), target + (target > source))
+                    self._items.insert(target, self._items.pop(source))
+                    self.endMoveRows()
+                    for moved in range(min(source, target), max(source, target) + 1):
+                        rows[self._items[moved][self.KEY]] = moved
+            previous = key
+
+        row = 0
+        while row < len(items):
+            if items[row][self.KEY] not in rows:
+                end = row + 1
+                while end < len(items) and items[end][self.KEY] not in rows:
+                    end += 1
+                self.beginInsertRows(QModelIndex(), row, end - 1)
+                self._items[row:row] = items[row:end]
+                self.endInsertRows()
+                row = end
+                continue
+            if self._items[row] != items[row]:
+                self._items[row] = items[row]
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+            row += 1
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return (
+            not parent.isValid()
+            and not self._fetching
+            and self._cursor is not None
+            and self._page_loader is not None
         )
-        layout.addWidget(discount)
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if not self.canFetchMore(parent):
+            return
+        self._fetching = True
+        generation = self._generation
+        self._page_loader(self._cursor, lambda page: self._append_page(page, generation))
+
+    def _append_page(self, page, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._fetching = False
+        if page is None:
+            return
+        self._cursor = page["cursor"]
+        if page["items"]:
+            start = len(self._items)
+            self.beginInsertRows(QModelIndex(), start, start + len(page["items"]) - 1)
+            self._items.extend(page["items"])
+            self.endInsertRows()
+
+
+class ProductListModel(PagedListModel):
+    DISPLAY_KEY = "name"
+
+
+class OrderListModel(PagedListModel):
+    DISPLAY_KEY = "article"
+
+
+class _CardDelegate(QStyledItemDelegate):
+    """Общая часть делегатов-карточек: фиксированная высота, рамка #item_card и вывод строк текста."""
+
+    HEIGHT = 180
+    PADDING = 10
 
     @staticmethod
-    def _picture(filename) -> QLabel:
-        label = QLabel(objectName="product_picture")
-        label.setFixedSize(120, 120)
-        label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        path = ICONS_DIR / Path(filename or "picture.png").name
-        if not path.exists():
-            path = ICONS_DIR / "picture.png"
-        pixmap = QPixmap(str(path))
-        if pixmap.isNull():
-            label.setText("Нет фото")
+    def _font(pixel_size: int, bold: bool = False) -> QFont:
+        font = QFont("Times New Roman")
+        font.setPixelSize(pixel_size)
+        font.setBold(bold)
+        return font
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(option.rect.width(), self.HEIGHT)
+
+    @staticmethod
+    def _paint_card(painter: QPainter, rect: QRect, background: QColor) -> QRect:
+        card = rect.adjusted(2, 2, -2, -2)
+        painter.fillRect(card, background)
+        painter.setPen(QPen(QColor("black"), 3))
+        painter.drawRect(card)
+        return card
+
+    def _draw_line(self, painter: QPainter, rect: QRect, top: int, text: str, wrap: bool) -> int:
+        flags = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop
+        if wrap:
+            flags |= Qt.TextFlag.TextWordWrap
         else:
-            label.setPixmap(
-                pixmap.scaled(
-                    120,
-                    120,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation,
-                )
-            )
-        return label
+            text = painter.fontMetrics().elidedText(text, Qt.TextElideMode.ElideRight, rect.width())
+        line_rect = QRect(rect.left(), top, rect.width(), rect.bottom() - top)
+        bounds = painter.boundingRect(line_rect, flags, text)
+        painter.drawText(line_rect, flags, text)
+        return bounds.bottom() + 4
+
+
+class ProductCardDelegate(_CardDelegate):
+    """Рисует карточку товара в том же виде, что и стили #item_card, только для видимых строк."""
+
+    HEIGHT = 280
+    PICTURE_SIZE = 120
+    SALE_WIDTH = 100
+    BACKGROUNDS = {"normal": QColor("white"), "high_discount": QColor("#2E8B57"), "out_of_stock": QColor("#87CEEB")}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Картинки декодируются в фоне; пока миниатюры нет, карточка рисуется с пустой рамкой
+        self.thumbnails = ThumbnailLoader(self.PICTURE_SIZE, self)
+        self.text_font = self._font(20)
+        self.price_font = self._font(18)
+        self.price_bold_font = self._font(18, bold=True)
+        self.sale_font = self._font(22)
 
     @staticmethod
-    def _price_layout(item: dict) -> QHBoxLayout:
-        layout = QHBoxLayout()
+    def card_state(item: dict) -> str:
+        return "out_of_stock" if item["count"] == 0 else "high_discount" if item["sale"] > 15 else "normal"
+
+    def paint(self, painter: QPainter, option, index) -> None:
+        item = index.model().item_at(index.row())
+        state = self.card_state(item)
+        background = self.BACKGROUNDS[state]
+        text_color = QColor("white") if state == "high_discount" else QColor("black")
+
+        painter.save()
+        card = self._paint_card(painter, option.rect, background)
+        inner = card.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        picture = QRect(
+            inner.left(),
+            inner.center().y() - self.PICTURE_SIZE // 2,
+            self.PICTURE_SIZE,
+            self.PICTURE_SIZE,
+        )
+        sale = QRect(inner.right() - self.SALE_WIDTH, inner.top(), self.SALE_WIDTH, inner.height())
+        information = QRect(
+            picture.right() + self.PADDING,
+            inner.top(),
+            sale.left() - picture.right() - 2 * self.PADDING,
+            inner.height(),
+        )
+
+        self._paint_picture(painter, picture, item.get("picture"))
+        self._paint_information(painter, information, item, background, text_color)
+        painter.fillRect(sale, QColor("white"))
+        painter.setPen(QPen(QColor("black"), 1))
+        painter.drawRect(sale)
+        painter.setFont(self.sale_font)
+        painter.drawText(sale, Qt.AlignmentFlag.AlignCenter, f"Скидка:\n{item['sale']}%")
+        painter.restore()
+
+    def _paint_picture(self, painter: QPainter, rect: QRect, filename) -> None:
+        painter.fillRect(rect, QColor("white"))
+        painter.setPen(QPen(QColor("#cccccc"), 1))
+        painter.drawRect(rect)
+        pixmap = self._pixmap(filename)
+        if pixmap is None:
+            return
+        if pixmap.isNull():
+            painter.setPen(QColor("black"))
+            painter.setFont(self.text_font)
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, "Нет фото")
+            return
+        x = rect.left() + (rect.width() - pixmap.width()) // 2
+        y = rect.top() + (rect.height() - pixmap.height()) // 2
+        painter.drawPixmap(x, y, pixmap)
+
+    def _paint_information(self, painter: QPainter, rect: QRect, item: dict, background, text_color) -> None:
+        painter.fillRect(rect, background)
+        painter.setPen(QPen(QColor("black"), 1))
+        painter.drawRect(rect)
+        painter.setClipRect(rect)
+
+        text = rect.adjusted(self.PADDING, self.PADDING // 2, -self.PADDING, -self.PADDING // 2)
+        top = text.top()
+        painter.setPen(text_color)
+        painter.setFont(self.text_font)
+        for line, wrap in (
+            (f"{item['category']} | {item['name']}", False),
+            (f"Описание товара: {item['information']}", True),
+            (f"Производитель: {item['creator']}", True),
+            (f"Поставщик: {item['deliveryman']}", True),
+        ):
+            top = self._draw_line(painter, text, top, line, wrap)
+        top = self._paint_price(painter, text, top, item, text_color)
+        top = self._draw_line(painter, text, top, f"Единица измерения: {item['edinica']}", True)
+        self._draw_line(painter, text, top, f"Количество на складе: {item['count']}", False)
+        painter.setClipping(False)
+
+    def _paint_price(self, painter: QPainter, rect: QRect, top: int, item: dict, text_color) -> int:
         cost = float(item["cost"])
         sale = float(item["sale"])
+        price = f"Цена: {item['cost']}"
         if sale > 0:
-            layout.addWidget(_label(f"Цена: {item['cost']}", object_name="original_price"))
-            layout.addWidget(_label(f"{cost * (1 - sale / 100):.2f}", object_name="discounted_price"))
+            struck = QFont(self.price_font)
+            struck.setStrikeOut(True)
+            painter.setFont(struck)
+            painter.setPen(QColor("red"))
+            painter.drawText(rect.left(), top + painter.fontMetrics().ascent(), price)
+            left = rect.left() + painter.fontMetrics().horizontalAdvance(price) + self.PADDING
+            painter.setFont(self.price_bold_font)
+            painter.setPen(text_color)
+            painter.drawText(left, top + painter.fontMetrics().ascent(), f"{cost * (1 - sale / 100):.2f}")
         else:
-            layout.addWidget(_label(f"Цена: {item['cost']}", object_name="normal_price"))
-            layout.addStretch()
-        return layout
+            painter.setFont(self.price_bold_font)
+            painter.setPen(text_color)
+            painter.drawText(rect.left(), top + painter.fontMetrics().ascent(), price)
+        height = painter.fontMetrics().height()
+        painter.setFont(self.text_font)
+        return top + height + 4
+
+    def _pixmap(self, filename) -> QPixmap | None:
+        return self.thumbnails.pixmap(filename)
+
+    def prefetch(self, model: "ProductListModel", first_row: int, last_row: int) -> None:
+        """Заранее декодирует картинки строк first_row..last_row."""
+        first_row = max(first_row, 0)
+        last_row = min(last_row, model.rowCount() - 1)
+        self.thumbnails.prefetch(model.item_at(row).get("picture") for row in range(first_row, last_row + 1))
+
 
+class OrderCardDelegate(_CardDelegate):
+    """Рисует карточку заказа (как прежний виджет OrderCard) только для видимых строк."""
 
-class OrderCard(QFrame):
-    def __init__(self, order: dict, on_click):
-        super().__init__(objectName="item_card")
-        self.setFixedHeight(180)
-        self.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.mousePressEvent = lambda event: self._handle_click(event, order["id"], on_click)
+    DELIVERY_WIDTH = 150
 
-        layout = QHBoxLayout(self)
-        info = QWidget()
-        info_layout = QVBoxLayout(info)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.article_font = self._font(20, bold=True)
+        self.text_font = self._font(18)
+        self.delivery_title_font = self._font(16, bold=True)
+        self.delivery_date_font = self._font(20, bold=True)
+
+    def paint(self, painter: QPainter, option, index) -> None:
+        order = index.model().item_at(index.row())
+        painter.save()
+        card = self._paint_card(painter, option.rect, QColor("white"))
+        inner = card.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        delivery = QRect(inner.right() - self.DELIVERY_WIDTH, inner.top(), self.DELIVERY_WIDTH, inner.height())
+        information = QRect(inner.left(), inner.top(), delivery.left() - inner.left() - self.PADDING, inner.height())
+
+        painter.setClipRect(information)
+        painter.setPen(QColor("black"))
+        painter.setFont(self.article_font)
         article = order.get("article") or f"ORD{order['id']}"
-        info_layout.addWidget(_label(f"Артикул: {article}", object_name="order_article"))
-        info_layout.addWidget(_label(f"Статус: {order['status']}", object_name="order_text"))
-        info_layout.addWidget(_label(f"Адрес: {order.get('pvz_address', 'Адрес не найден')}", object_name="order_text", word_wrap=True))
-        info_layout.addWidget(_label(f"Дата заказа: {order['create_date']}", object_name="order_text"))
-        layout.addWidget(info, 70)
-
-        delivery = QWidget(objectName="delivery_box")
-        delivery_layout = QVBoxLayout(delivery)
-        delivery_layout.addStretch()
-        delivery_layout.addWidget(
-            _label("Дата доставки", object_name="delivery_title", alignment=Qt.AlignmentFlag.AlignCenter)
-        )
-        delivery_layout.addWidget(
-            _label(order["delivery_date"], object_name="delivery_date", alignment=Qt.AlignmentFlag.AlignCenter)
-        )
-        delivery_layout.addStretch()
-        layout.addWidget(delivery, 30)
+        top = self._draw_line(painter, information, information.top(), f"Артикул: {article}", False)
+        painter.setFont(self.text_font)
+        top = self._draw_line(painter, information, top, f"Статус: {order['status']}", False)
+        top = self._draw_line(painter, information, top, f"Адрес: {order.get('pvz_address', 'Адрес не найден')}", True)
+        self._draw_line(painter, information, top, f"Дата заказа: {order['create_date']}", False)
+        painter.setClipping(False)
 
-    @staticmethod
-    def _handle_click(event, order_id, callback) -> None:
-        if event.button() == Qt.MouseButton.LeftButton:
-            callback(order_id)
+        painter.fillRect(delivery, QColor("white"))
+        painter.setPen(QPen(QColor("black"), 2))
+        painter.drawRect(delivery)
+        title_height = QFontMetrics(self.delivery_title_font).height()
+        date_height = QFontMetrics(self.delivery_date_font).height()
+        top = delivery.center().y() - (title_height + date_height) // 2
+        painter.setFont(self.delivery_title_font)
+        painter.drawText(QRect(delivery.left(), top, delivery.width(), title_height), Qt.AlignmentFlag.AlignCenter, "Дата доставки")
+        painter.setFont(self.delivery_date_font)
+        painter.drawText(
+            QRect(delivery.left(), top + title_height, delivery.width(), date_height),
+            Qt.AlignmentFlag.AlignCenter,
+            str(order["delivery_date"]),
+        )
+        painter.restore()
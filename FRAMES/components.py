@@ -12,6 +12,8 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from StaticStorage import Storage
+
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 ICONS_DIR = PROJECT_ROOT / "ICONS"
@@ -23,10 +25,26 @@ def create_logo_label(size: int = 120) -> QLabel:
     label.setAlignment(Qt.AlignmentFlag.AlignCenter)
     label.setFixedSize(size, size)
 
+    pixmap = scaled_logo(size)
+    if pixmap is not None:
+        label.setPixmap(pixmap)
+    else:
+        label.setText("ОБУВЬ")
+        label.setObjectName("text_logo")
+    return label
+
+
+def scaled_logo(size: int) -> QPixmap | None:
+    """Логотип под размер size; в рамках сессии декодируется и масштабируется один раз."""
+    session = Storage.get_session()
+    if session is not None and size in session.logos:
+        return session.logos[size]
+
     logo_path = next(
         (ICONS_DIR / name for name in ("logo.JPG", "logo.png") if (ICONS_DIR / name).exists()),
         None,
     )
+    pixmap = None
     if logo_path:
         pixmap = QPixmap(str(logo_path)).scaled(
             size,
@@ -34,15 +52,13 @@ def create_logo_label(size: int = 120) -> QLabel:
             Qt.AspectRatioMode.KeepAspectRatio,
             Qt.TransformationMode.SmoothTransformation,
         )
-        label.setPixmap(pixmap)
-    else:
-        label.setText("ОБУВЬ")
-        label.setObjectName("text_logo")
-    return label
+    if session is not None:
+        session.logos[size] = pixmap
+    return pixmap
 
 
 def create_header(database, on_back) -> QWidget:
-    """Создаёт общую шапку: назад, логотип и ФИО пользователя."""
+    """Создаёт общую шапку: назад, логотип и ФИО пользователя (из сессии, без запросов после входа)."""
     header = QWidget(objectName="header_widget")
     layout = QHBoxLayout(header)
 
@@ -66,6 +82,12 @@ def create_title(text: str) -> QLabel:
     return title
 
 
+def create_loading_label(text: str = "Загрузка...") -> QLabel:
+    label = QLabel(text, objectName="empty_text")
+    label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+    return label
+
+
 def create_labeled_edit(
     label_text: str,
     value="",
@@ -1,23 +1,86 @@
+import logging
 import os
-import re
-import shutil
 import tempfile
 from pathlib import Path
 
-from PIL import Image
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QPixmap
+from PySide6.QtCore import QObject, QRunnable, Qt, QThreadPool, Signal
+from PySide6.QtGui import QImage, QPixmap
 from PySide6.QtWidgets import QFileDialog, QLabel, QPushButton, QVBoxLayout, QWidget
 
 import Messages
-from FRAMES.components import ICONS_DIR, PROJECT_ROOT
+from FRAMES.cards import ProductCardDelegate
+from FRAMES.components import ICONS_DIR
+from FRAMES.image_store import TEMP_DIR, store_image
+from FRAMES.thumbnails import store_thumbnail
+
+
+def _to_qimage(image) -> QImage:
+    """RGB-изображение PIL -> QImage со своей копией пикселей."""
+    data = image.tobytes("raw", "RGB")
+    return QImage(data, image.width, image.height, image.width * 3, QImage.Format.Format_RGB888).copy()
+
+
+def prepare_image(source: Path, size: tuple[int, int], thumbnail_size: int, temp_dir: Path):
+    """
+    Готовит выбранное фото за одно декодирование: JPEG-файл для ICONS/ размером size (во временном файле),
+    его предпросмотр и миниатюру карточки товара. Работает только с PIL и QImage, поэтому вызывается вне GUI-потока.
+    :return: (путь к временному файлу, предпросмотр, миниатюра)
+    """
+    # PIL нужен только при выборе фото — не замедляет запуск приложения
+    from PIL import Image
+
+    with Image.open(source) as image:
+        # JPEG раскодируется сразу уменьшенным в 2-8 раз (draft), но не меньше удвоенного размера картинки
+        # для LANCZOS — полноразмерные пиксели многомегапиксельного фото в памяти не появляются
+        image.draft("RGB", (size[0] * 2, size[1] * 2))
+        image = image.convert("RGB")
+    image.thumbnail(size, Image.Resampling.LANCZOS)
+    canvas = Image.new("RGB", size, "white")
+    canvas.paste(image, ((size[0] - image.width) // 2, (size[1] - image.height) // 2))
+
+    handle, temp_name = tempfile.mkstemp(suffix=".jpg", dir=temp_dir)
+    os.close(handle)
+    canvas.save(temp_name, "JPEG", quality=90)
+
+    # Миниатюра — из той же картинки 300x200, которую карточка иначе раскодировала бы из ICONS/
+    thumbnail = canvas.copy()
+    thumbnail.thumbnail((thumbnail_size, thumbnail_size), Image.Resampling.LANCZOS)
+    return Path(temp_name), _to_qimage(canvas), _to_qimage(thumbnail)
+
+
+class _PrepareSignals(QObject):
+    prepared = Signal(int, object)
+    failed = Signal(int, str)
+
+
+class _PrepareTask(QRunnable):
+    def __init__(self, ticket: int, args: tuple, signals: _PrepareSignals):
+        super().__init__()
+        self.ticket = ticket
+        self.args = args
+        self.signals = signals
+
+    def run(self):
+        try:
+            result = prepare_image(*self.args)
+        except Exception as e:
+            logging.error(f"Ошибка обработки изображения {self.args[0]}: {e}")
+            self.signals.failed.emit(self.ticket, str(e))
+            return
+        self.signals.prepared.emit(self.ticket, result)
 
 
 class ProductImageEditor(QWidget):
-    """Выбор, предпросмотр и сохранение изображения товара размером до 300x200."""
+    """
+    Выбор, предпросмотр и сохранение изображения товара размером до 300x200.
+    Выбранное фото обрабатывается в фоновом потоке (prepare_image), окно при этом не блокируется.
+    """
 
     SIZE = (300, 200)
-    TEMP_DIR = PROJECT_ROOT / "temp"
+    THUMBNAIL_SIZE = ProductCardDelegate.PICTURE_SIZE
+    TEMP_DIR = TEMP_DIR
+    # Начало и конец обработки фото: экраны блокируют сохранение, пока оно не готово
+    busy_changed = Signal(bool)
 
     def __init__(self, initial_filename: str = "", button_text: str = "Добавить фото"):
         super().__init__()
@@ -25,6 +88,15 @@ class ProductImageEditor(QWidget):
         self.TEMP_DIR.mkdir(parents=True, exist_ok=True)
         self.initial_filename = initial_filename or "picture.png"
         self.selected_path: Path | None = None
+        self.selected_thumbnail: QImage | None = None
+        # Номер последней поставленной обработки: результаты более ранних отбрасываются
+        self._ticket = 0
+        self._preparing = False
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self._signals = _PrepareSignals(self)
+        self._signals.prepared.connect(self._on_prepared)
+        self._signals.failed.connect(self._on_failed)
 
         layout = QVBoxLayout(self)
         self.preview = QLabel(objectName="product_image_preview")
@@ -32,11 +104,25 @@ class ProductImageEditor(QWidget):
         self.preview.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.preview, alignment=Qt.AlignmentFlag.AlignCenter)
 
-        button = QPushButton(button_text, objectName="button")
-        button.clicked.connect(self.select_image)
-        layout.addWidget(button)
+        self.button = QPushButton(button_text, objectName="button")
+        self.button.clicked.connect(self.select_image)
+        layout.addWidget(self.button)
         self._show_path(ICONS_DIR / self.initial_filename)
 
+    def reset(self, filename: str = "") -> None:
+        """Сбрасывает выбранный файл и показывает filename — для повторно открытого экрана."""
+        self.cleanup()
+        self.initial_filename = filename or "picture.png"
+        self._show_path(ICONS_DIR / self.initial_filename)
+
+    def is_busy(self) -> bool:
+        return self._preparing
+
+    def _set_preparing(self, preparing: bool) -> None:
+        if preparing != self._preparing:
+            self._preparing = preparing
+            self.busy_changed.emit(preparing)
+
     def select_image(self) -> None:
         file_path, _ = QFileDialog.getOpenFileName(
             self,
@@ -46,25 +132,34 @@ class ProductImageEditor(QWidget):
         )
         if not file_path:
             return
-        try:
-            self.cleanup()
-            self.selected_path = self._prepare_image(Path(file_path))
-            self._show_path(self.selected_path)
-        except Exception as error:
-            Messages.show_error(f"Не удалось обработать изображение: {error}")
-
-    def _prepare_image(self, source: Path) -> Path:
-        with Image.open(source) as image:
-            image = image.convert("RGB")
-            image.thumbnail(self.SIZE, Image.Resampling.LANCZOS)
-            canvas = Image.new("RGB", self.SIZE, "white")
-            offset = ((self.SIZE[0] - image.width) // 2, (self.SIZE[1] - image.height) // 2)
-            canvas.paste(image, offset)
-
-            handle, temp_name = tempfile.mkstemp(suffix=".jpg", dir=self.TEMP_DIR)
-            os.close(handle)
-            canvas.save(temp_name, quality=90)
-            return Path(temp_name)
+        self.prepare(Path(file_path))
+
+    def prepare(self, source: Path) -> None:
+        """Ставит обработку фото в фоновый поток; предпросмотр обновится по готовности."""
+        self.cleanup()
+        self._set_preparing(True)
+        self.preview.setPixmap(QPixmap())
+        self.preview.setText("Обработка фото…")
+        args = (source, self.SIZE, self.THUMBNAIL_SIZE, self.TEMP_DIR)
+        self.thread_pool.start(_PrepareTask(self._ticket, args, self._signals))
+
+    def _on_prepared(self, ticket: int, result) -> None:
+        path, preview, thumbnail = result
+        if ticket != self._ticket:
+            # Пока фото обрабатывалось, выбрали другое или сбросили редактор
+            path.unlink(missing_ok=True)
+            return
+        self._set_preparing(False)
+        self.selected_path = path
+        self.selected_thumbnail = thumbnail
+        self.preview.setPixmap(QPixmap.fromImage(preview))
+
+    def _on_failed(self, ticket: int, message: str) -> None:
+        if ticket != self._ticket:
+            return
+        self._set_preparing(False)
+        self._show_path(ICONS_DIR / self.initial_filename)
+        Messages.show_error(f"Не удалось обработать изображение: {message}")
 
     def _show_path(self, path: Path) -> None:
         target = path if path.exists() else ICONS_DIR / "picture.png"
@@ -81,30 +176,29 @@ class ProductImageEditor(QWidget):
             )
         )
 
-    def save(self, article: str, old_filename: str = "") -> str:
+    def save(self, old_filename: str = "") -> str:
+        """
+        Сохраняет выбранное фото в хранилище по содержимому (FRAMES.image_store) и возвращает имя файла.
+        Картинки могут быть общими для нескольких товаров, поэтому прежняя не удаляется —
+        неиспользуемые файлы убирает сборщик мусора.
+        """
+        if self._preparing:
+            raise RuntimeError("фото ещё обрабатывается, повторите сохранение через несколько секунд")
         if not self.selected_path:
             return old_filename or self.initial_filename or "picture.png"
 
-        safe_article = re.sub(r"[^\w.-]+", "_", article, flags=re.UNICODE).strip("._")
-        filename = f"{safe_article or 'product'}.jpg"
-        destination = ICONS_DIR / filename
-        staged = destination.with_name(f".{destination.name}.tmp")
-
-        shutil.copy2(self.selected_path, staged)
-        os.replace(staged, destination)
+        filename, _ = store_image(self.selected_path)
+        store_thumbnail(filename, self.THUMBNAIL_SIZE, self.selected_thumbnail)
         self.initial_filename = filename
         self.cleanup()
-        self._show_path(destination)
+        self._show_path(ICONS_DIR / filename)
         return filename
 
-    @staticmethod
-    def delete(filename: str) -> None:
-        if filename and filename != "picture.png":
-            path = ICONS_DIR / Path(filename).name
-            if path.exists():
-                path.unlink()
-
     def cleanup(self) -> None:
+        """Удаляет временный файл выбранного фото и отменяет его незавершённую обработку."""
+        self._ticket += 1
+        self._set_preparing(False)
         if self.selected_path and self.selected_path.exists():
             self.selected_path.unlink()
         self.selected_path = None
+        self.selected_thumbnail = None
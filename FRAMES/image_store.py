@@ -0,0 +1,178 @@
+import argparse
+import hashlib
+import logging
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+
+from FRAMES.components import ICONS_DIR, PROJECT_ROOT
+from FRAMES.thumbnails import PLACEHOLDER, THUMBNAILS_DIR, remove_thumbnails
+
+# Хранилище картинок товаров по содержимому: файл в ICONS/ называется по SHA-256 своих байтов,
+# поэтому одинаковые фото разных товаров лежат на диске один раз. Файлы общие, и удалять картинку
+# вместе с товаром нельзя — ненужные файлы находит collect_garbage по ссылкам Items.item_picture.
+# Сборка мусора запускается вручную: python -m FRAMES.image_store [--dedupe] [--dry-run] [--force]
+
+TEMP_DIR = PROJECT_ROOT / "temp"
+HASH_LENGTH = 32
+CONTENT_NAME = re.compile(rf"^[0-9a-f]{{{HASH_LENGTH}}}\.\w+$")
+# Файлы ICONS/, которые не являются картинками товаров
+RESERVED_NAMES = {PLACEHOLDER, "Icon.jpg", "logo.JPG", "logo.png", ".gitkeep"}
+# Сборщик мусора не трогает файлы моложе этого срока: картинку мог только что сохранить экран,
+# который ещё не записал товар в БД, а во временном файле — лежать фото открытого редактора
+GC_GRACE_SECONDS = 24 * 3600
+# Если товары ссылаются меньше чем на такую долю картинок ICONS/, приложение, скорее всего, подключено
+# к пустой или чужой БД — сборщик мусора ничего не удаляет без force
+GC_MIN_REFERENCED_SHARE = 0.1
+
+
+def content_name(path: Path) -> str:
+    """Имя файла по содержимому: первые HASH_LENGTH символов SHA-256 и расширение исходного файла."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return f"{digest.hexdigest()[:HASH_LENGTH]}{path.suffix.lower()}"
+
+
+def store_image(source: Path) -> tuple[str, bool]:
+    """
+    Кладёт файл в ICONS/ под именем по содержимому
+    :return: (имя файла, True — такая картинка уже была и повторно не записывалась)
+    """
+    ICONS_DIR.mkdir(parents=True, exist_ok=True)
+    filename = content_name(source)
+    destination = ICONS_DIR / filename
+    if destination.exists():
+        # Свежее время изменения защищает файл от сборщика мусора, пока товар с ним не записан в БД
+        os.utime(destination)
+        return filename, True
+    staged = destination.with_name(f".{destination.name}.tmp")
+    shutil.copyfile(source, staged)
+    os.replace(staged, destination)
+    return filename, False
+
+
+def _remove_old(path: Path, cutoff: float, dry_run: bool) -> int | None:
+    """Удаляет файл, если он старше cutoff; возвращает его размер или None, если файл не удалён."""
+    try:
+        stat = path.stat()
+        if stat.st_mtime > cutoff:
+            return None
+        if not dry_run:
+            path.unlink()
+    except OSError as e:
+        logging.error(f"Не удалось удалить {path}: {e}")
+        return None
+    return stat.st_size
+
+
+def collect_garbage(database, grace_seconds: float = GC_GRACE_SECONDS, dry_run: bool = False,
+                    force: bool = False) -> dict | None:
+    """
+    Удаляет картинки ICONS/, на которые не ссылается ни один товар, брошенные временные файлы temp/
+    и миниатюры картинок, которых больше нет. Файлы моложе grace_seconds не трогаются.
+    :param force: удалять, даже если товары ссылаются меньше чем на GC_MIN_REFERENCED_SHARE картинок
+    :return: сколько файлов и байт удалено (при dry_run — было бы удалено); None — сборка пропущена
+    """
+    referenced = database.referenced_pictures()
+    if referenced is None:
+        logging.warning("Сборка мусора картинок пропущена: не удалось получить картинки товаров из БД")
+        return None
+    referenced = {Path(name).name for name in referenced}
+    pictures = [
+        path.name for path in (ICONS_DIR.iterdir() if ICONS_DIR.exists() else ())
+        if path.is_file() and path.name not in RESERVED_NAMES
+    ]
+    in_use = sum(1 for name in pictures if name in referenced)
+    if pictures and in_use < len(pictures) * GC_MIN_REFERENCED_SHARE and not force:
+        logging.warning(
+            f"Сборка мусора картинок пропущена: товары ссылаются только на {in_use} из {len(pictures)} картинок "
+            f"ICONS/ — похоже, подключена пустая или другая БД (запустите с --force, если это не так)"
+        )
+        return None
+    cutoff = time.time() - grace_seconds
+    removed = {"pictures": 0, "temp": 0, "thumbnails": 0, "bytes": 0}
+
+    def remove(path: Path, kind: str) -> bool:
+        size = _remove_old(path, cutoff, dry_run)
+        if size is None:
+            return False
+        removed[kind] += 1
+        removed["bytes"] += size
+        return True
+
+    if ICONS_DIR.exists():
+        for path in ICONS_DIR.iterdir():
+            if path.is_file() and path.name not in referenced and path.name not in RESERVED_NAMES:
+                if remove(path, "pictures") and not dry_run:
+                    remove_thumbnails(path.name)
+    if TEMP_DIR.exists():
+        for path in TEMP_DIR.iterdir():
+            if path.is_file() and path.name not in RESERVED_NAMES:
+                remove(path, "temp")
+    if THUMBNAILS_DIR.exists():
+        for path in THUMBNAILS_DIR.iterdir():
+            # Имя миниатюры: <картинка>.<размер>.<mtime>.png
+            picture = path.name.rsplit(".", 3)[0]
+            if path.is_file() and not (ICONS_DIR / picture).exists():
+                remove(path, "thumbnails")
+    logging.info(f"Сборка мусора картинок{' (пробный запуск)' if dry_run else ''}: {removed}")
+    return removed
+
+
+def dedupe_pictures(database, dry_run: bool = False) -> dict | None:
+    """
+    Переводит картинки со старыми именами (<артикул>.jpg) в хранилище по содержимому и переписывает
+    ссылки товаров; прежние файлы затем удаляет collect_garbage.
+    :return: число переименованных картинок и сколько из них совпало с уже сохранёнными
+    """
+    referenced = database.referenced_pictures()
+    if referenced is None:
+        logging.warning("Перенос картинок пропущен: не удалось получить картинки товаров из БД")
+        return None
+    result = {"renamed": 0, "duplicates": 0}
+    seen = set()
+    for name in sorted(referenced):
+        path = ICONS_DIR / Path(name).name
+        if path.name in RESERVED_NAMES or CONTENT_NAME.match(path.name) or not path.is_file():
+            continue
+        if dry_run:
+            new_name = content_name(path)
+            existed = new_name in seen or (ICONS_DIR / new_name).exists()
+            seen.add(new_name)
+        else:
+            new_name, existed = store_image(path)
+            if not database.rename_picture(name, new_name):
+                continue
+        result["renamed"] += 1
+        result["duplicates"] += existed
+    logging.info(f"Перенос картинок в хранилище по содержимому{' (пробный запуск)' if dry_run else ''}: {result}")
+    return result
+
+
+if __name__ == "__main__":
+    from DATABASE.Database import DatabaseConnection
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(module)s] -> %(message)s", datefmt="%H:%M:%S")
+    parser = argparse.ArgumentParser(description="Хранилище картинок товаров: перенос и сборка мусора")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="сначала перевести картинки со старыми именами в хранилище по содержимому")
+    parser.add_argument("--grace-hours", type=float, default=GC_GRACE_SECONDS / 3600,
+                        help="не удалять файлы моложе этого срока (часов)")
+    parser.add_argument("--dry-run", action="store_true", help="только показать, что было бы сделано")
+    parser.add_argument("--force", action="store_true",
+                        help="удалять, даже если товары ссылаются лишь на малую долю картинок ICONS/")
+    args = parser.parse_args()
+
+    database = DatabaseConnection(pooled=False)
+    try:
+        if args.dedupe:
+            print(dedupe_pictures(database, dry_run=args.dry_run))
+        print(collect_garbage(
+            database, grace_seconds=args.grace_hours * 3600, dry_run=args.dry_run, force=args.force
+        ))
+    finally:
+        database.close()
@@ -4,7 +4,7 @@ from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QHBoxLayout, QLabel, QVBoxLayout, QWidget
 
 import Messages
-from FRAMES.components import create_labeled_combo, create_labeled_edit
+from FRAMES.components import clear_layout, create_labeled_combo, create_labeled_edit
 
 
 DATE_FORMATS = ("%d.%m.%Y", "%Y-%m-%d")
@@ -27,57 +27,72 @@ def parse_date(value) -> date:
 class OrderDetailsForm(QWidget):
     STATUSES = ("Новый", "В обработке", "Завершен")
 
-    def __init__(self, database, data: dict | None = None, editable: bool = True):
+    def __init__(self, database, data: dict | None = None, editable: bool = True, pvz_values=None):
         super().__init__()
         self.database = database
-        self.data = data or {}
         layout = QVBoxLayout(self)
 
-        article = self.data.get("article", "")
         container, self.article = create_labeled_edit(
             "Артикул заказа:",
-            article,
             placeholder="Сформируется из состава заказа",
             read_only=True,
         )
         layout.addWidget(container)
 
-        statuses = list(self.STATUSES)
-        current_status = self.data.get("status", "Новый")
         container, self.status = create_labeled_combo(
             "Статус заказа:",
-            statuses,
-            current=current_status,
+            list(self.STATUSES),
             enabled=editable,
         )
         layout.addWidget(container)
 
-        pvz_values = database.take_all_pvz_addresses()
-        current_pvz = self.data.get("pvz_display", "")
+        if pvz_values is None:
+            pvz_values = database.take_all_pvz_addresses()
         container, self.pvz = create_labeled_combo(
             "Адрес пункта выдачи:",
             pvz_values,
-            current=current_pvz,
             enabled=editable,
         )
         layout.addWidget(container)
 
-        create_value = self.data.get("create_date") or date.today().strftime("%d.%m.%Y")
         container, self.create_date = create_labeled_edit(
             "Дата заказа:",
-            create_value,
             read_only=True,
         )
         layout.addWidget(container)
 
-        delivery_value = self.data.get("delivery_date") or (date.today() + timedelta(days=3)).strftime("%d.%m.%Y")
         container, self.delivery_date = create_labeled_edit(
             "Дата выдачи:",
-            delivery_value,
             placeholder="ДД.ММ.ГГГГ",
             read_only=not editable,
         )
         layout.addWidget(container)
+        self.load_data(data)
+
+    def load_data(self, data: dict | None = None, pvz_values=None) -> None:
+        """Заполняет форму заказом data; без data — значениями нового заказа."""
+        self.data = data or {}
+        if pvz_values is not None:
+            self.pvz.clear()
+            self.pvz.addItems([str(value) for value in pvz_values if value is not None])
+        self.article.setText(self.data.get("article", ""))
+        self._select(self.status, self.data.get("status", "Новый"))
+        self._select(self.pvz, self.data.get("pvz_display"))
+
+        self.create_date.setText(str(self.data.get("create_date") or date.today().strftime("%d.%m.%Y")))
+        self.delivery_date.setText(
+            str(self.data.get("delivery_date") or (date.today() + timedelta(days=3)).strftime("%d.%m.%Y"))
+        )
+
+    @staticmethod
+    def _select(combo, value) -> None:
+        text = "" if value is None else str(value)
+        if not text:
+            combo.setCurrentIndex(0 if combo.count() else -1)
+            return
+        if combo.findText(text) < 0:
+            combo.insertItem(0, text)
+        combo.setCurrentText(text)
 
     def set_article_from_items(self, items: list[dict]) -> None:
         self.article.setText(", ".join(f"{item['article']}, {item['quantity']}" for item in items))
@@ -110,8 +125,14 @@ class OrderItemsView(QWidget):
         super().__init__()
         layout = QVBoxLayout(self)
         layout.addWidget(QLabel("Состав заказа:", objectName="UpdateTextHint"))
+        self.rows_layout = QVBoxLayout()
+        layout.addLayout(self.rows_layout)
+        self.set_items(items)
+
+    def set_items(self, items: list[dict]) -> None:
+        clear_layout(self.rows_layout)
         if not items:
-            layout.addWidget(QLabel("Товары отсутствуют", objectName="empty_text"))
+            self.rows_layout.addWidget(QLabel("Товары отсутствуют", objectName="empty_text"))
             return
         for item in items:
             row = QWidget()
@@ -121,4 +142,4 @@ class OrderItemsView(QWidget):
             details_label = QLabel(details, objectName="order_item_details")
             details_label.setAlignment(Qt.AlignmentFlag.AlignRight)
             row_layout.addWidget(details_label, 30)
-            layout.addWidget(row)
+            self.rows_layout.addWidget(row)
@@ -48,9 +48,10 @@ class ProductForm(QWidget):
         "category": "категорию товара",
     }
 
-    def __init__(self, database, data: dict | None = None):
+    def __init__(self, database, data: dict | None = None, combo_values: dict | None = None):
         super().__init__()
         self.database = database
+        self.combo_values = combo_values
         self.editing = bool(data)
         self.fields = {}
         self.form_layout = QVBoxLayout(self)
@@ -83,14 +84,35 @@ class ProductForm(QWidget):
         if data:
             self.load_data(data)
 
+    @classmethod
+    def load_combo_values(cls, database) -> dict:
+        """Значения всех выпадающих списков формы; можно вызывать из фонового потока."""
+        return {
+            key: database.take_all_text_data_for_combo_box(key)
+            for key, _, _, is_combo in cls.FIELD_SPECS
+            if is_combo
+        }
+
     def _combo_values(self, key: str) -> list[str]:
         try:
-            values = self.database.take_all_text_data_for_combo_box(key)
+            if self.combo_values is not None and key in self.combo_values:
+                values = self.combo_values[key]
+            else:
+                values = self.database.take_all_text_data_for_combo_box(key)
             return [str(value) for value in values if value and str(value).strip() != "nan"]
         except Exception:
             return []
 
-    def load_data(self, data: dict) -> None:
+    def load_data(self, data: dict, combo_values: dict | None = None) -> None:
+        """
+        :param combo_values: новые значения выпадающих списков (load_combo_values) — для повторно открытой формы
+        """
+        if combo_values is not None:
+            self.combo_values = combo_values
+            for key, field in self.fields.items():
+                if isinstance(field, QComboBox) and key in combo_values:
+                    field.clear()
+                    field.addItems([""] + self._combo_values(key))
         for key, field in self.fields.items():
             source_key = self.DATA_KEYS.get(key, key)
             value = data.get(source_key, "")
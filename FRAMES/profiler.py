@@ -0,0 +1,263 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from PySide6.QtCore import QEvent, QObject, QTimer
+from PySide6.QtWidgets import QApplication, QWidget
+
+
+class _Navigation:
+    """Один переход switch_window: события трассировки, незавершённые фоновые задачи и отрисовки."""
+
+    def __init__(self, number: int, frame_name: str):
+        self.number = number
+        self.frame_name = frame_name
+        self.started = time.perf_counter()
+        self.events = []
+        self.threads = {}
+        self.frame = None
+        # ticket фоновой задачи -> имя функции
+        self.pending = {}
+        self.widgets = Counter()
+        self.paint_started = None
+        self.last_paint = None
+        self.last_delivery = None
+
+
+class FrameProfiler(QObject):
+    """
+    Профилировщик переходов между экранами (флаг --profile-frames).
+
+    Для каждого вызова switch_window записывает фазы: построение или обновление экрана (construct/refresh),
+    применение стилей (polish), показ (show), раскладку (layout), отрисовку (paint), фоновые запросы (fetch)
+    и разбор их результатов в GUI-потоке (deliver), а также SQL-запросы со всех потоков.
+    Созданные виджеты считаются по событиям Polish — каждый виджет получает его один раз перед первым показом.
+    Переход завершён, когда все его фоновые запросы доставлены и экран перерисован после них
+    (или через TIMEOUT_MS). На каждый переход пишется файл в формате Chrome Trace Event —
+    его открывают chrome://tracing, Perfetto и speedscope (flame graph).
+    """
+
+    TIMEOUT_MS = 5000
+
+    def __init__(self, output_dir, parent=None):
+        super().__init__(parent)
+        self.output_dir = Path(output_dir)
+        self.navigation = None
+        self._count = 0
+        self._lock = threading.Lock()
+        self._timeout = QTimer(self)
+        self._timeout.setSingleShot(True)
+        self._timeout.setInterval(self.TIMEOUT_MS)
+        self._timeout.timeout.connect(lambda: self.finish("timeout"))
+
+    def watch_database(self, database) -> None:
+        database.query_stats.observer = self._on_query
+
+    # === ФАЗЫ ===
+
+    def begin(self, frame_name: str) -> None:
+        if self.navigation is not None:
+            self.finish("interrupted")
+        self._count += 1
+        with self._lock:
+            self.navigation = _Navigation(self._count, frame_name)
+        QApplication.instance().installEventFilter(self)
+        self._timeout.start()
+
+    @contextmanager
+    def phase(self, name: str, category: str = "frame", **args):
+        navigation = self.navigation
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(navigation, name, started, time.perf_counter(), category, args)
+
+    def show(self, frame: QWidget, container) -> None:
+        """Стили, показ и раскладка экрана — каждая фаза отдельно, а не внутри первой отрисовки."""
+        navigation = self.navigation
+        if navigation is not None:
+            navigation.frame = frame
+        with self.phase("polish"):
+            frame.ensurePolished()
+        with self.phase("show"):
+            container.setCurrentWidget(frame)
+        if frame.layout() is not None:
+            with self.phase("layout"):
+                frame.layout().activate()
+
+    # === ФОНОВЫЕ ЗАДАЧИ (AsyncQueryRunner.tracer) ===
+
+    def trace_task(self, ticket: int, function):
+        navigation = self.navigation
+        if navigation is None:
+            return function
+        name = getattr(function, "__name__", "task")
+        navigation.pending[ticket] = name
+
+        def traced(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._add(navigation, f"fetch {name}", started, time.perf_counter(), "fetch")
+
+        return traced
+
+    @contextmanager
+    def delivering(self, ticket: int):
+        navigation = self.navigation
+        name = navigation.pending.get(ticket) if navigation is not None else None
+        if name is None:
+            yield
+            return
+        with self.phase(f"deliver {name}"):
+            yield
+        navigation.last_delivery = time.perf_counter()
+
+    def task_done(self, ticket: int) -> None:
+        navigation = self.navigation
+        if navigation is not None and navigation.pending.pop(ticket, None) is not None:
+            self._finish_if_settled()
+
+    def _on_query(self, name: str, elapsed_ms: float, rows: int, failed: bool) -> None:
+        navigation = self.navigation
+        if navigation is None:
+            return
+        ended = time.perf_counter()
+        self._add(navigation, f"sql {name}", ended - elapsed_ms / 1000, ended, "sql", {"rows": rows, "failed": failed})
+
+    # === ОТРИСОВКА И ВИДЖЕТЫ ===
+
+    def eventFilter(self, watched, event) -> bool:
+        event_type = event.type()
+        if event_type == QEvent.Type.Polish:
+            navigation = self.navigation
+            if navigation is not None:
+                navigation.widgets[watched.metaObject().className()] += 1
+        elif event_type == QEvent.Type.Paint:
+            navigation = self.navigation
+            if (
+                navigation is not None and navigation.frame is not None and navigation.paint_started is None
+                and isinstance(watched, QWidget)
+                and (watched is navigation.frame or navigation.frame.isAncestorOf(watched))
+            ):
+                navigation.paint_started = time.perf_counter()
+                # Отрисовка окна идёт одним проходом: нулевой таймер сработает уже после него
+                QTimer.singleShot(0, self._paint_done)
+        return False
+
+    def _paint_done(self) -> None:
+        navigation = self.navigation
+        if navigation is None or navigation.paint_started is None:
+            return
+        started, navigation.paint_started = navigation.paint_started, None
+        self._add(navigation, "paint", started, time.perf_counter(), "frame", {"first": navigation.last_paint is None})
+        navigation.last_paint = started
+        self._finish_if_settled()
+
+    def _finish_if_settled(self) -> None:
+        navigation = self.navigation
+        if navigation.pending or navigation.paint_started is not None or navigation.last_paint is None:
+            return
+        if navigation.last_delivery is not None and navigation.last_delivery > navigation.last_paint:
+            return
+        self.finish()
+
+    # === РЕЗУЛЬТАТ ===
+
+    def _add(self, navigation, name: str, started: float, ended: float, category: str, args=None) -> None:
+        if navigation is None:
+            return
+        thread = threading.current_thread()
+        with self._lock:
+            if navigation is not self.navigation:
+                return
+            tid = thread.ident
+            navigation.threads[tid] = "GUI" if thread is threading.main_thread() else f"Фоновый поток {thread.name}"
+            navigation.events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((started - navigation.started) * 1e6, 1),
+                "dur": round((ended - started) * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": args or {},
+            })
+
+    def finish(self, reason: str = "done") -> None:
+        with self._lock:
+            navigation, self.navigation = self.navigation, None
+        if navigation is None:
+            return
+        self._timeout.stop()
+        QApplication.instance().removeEventFilter(self)
+        summary = self._summary(navigation, reason)
+        try:
+            path = self._write(navigation, summary)
+        except OSError as error:
+            logging.error(f"Не удалось сохранить профиль перехода на {navigation.frame_name}: {error}")
+            return
+        phases = ", ".join(f"{name} {ms} мс" for name, ms in summary["phases_ms"].items())
+        logging.info(
+            f"Переход на {navigation.frame_name}: {summary['total_ms']} мс ({phases}), "
+            f"виджетов создано: {summary['widgets_created']}, профиль: {path}"
+        )
+
+    @staticmethod
+    def _summary(navigation: _Navigation, reason: str) -> dict:
+        phases = defaultdict(float)
+        sql_gui_ms = 0.0
+        gui_tid = threading.main_thread().ident
+        for event in navigation.events:
+            kind = event["name"].split(" ", 1)[0]
+            phases[kind] += event["dur"] / 1000
+            if kind == "sql" and event["tid"] == gui_tid:
+                sql_gui_ms += event["dur"] / 1000
+        paints = [event for event in navigation.events if event["name"] == "paint"]
+        total_us = max((event["ts"] + event["dur"] for event in navigation.events), default=0)
+        return {
+            "frame": navigation.frame_name,
+            "mode": "construct" if "construct" in phases else "refresh" if "refresh" in phases else "cached",
+            "finished": reason,
+            "total_ms": round(total_us / 1000, 3),
+            "first_paint_ms": round((paints[0]["ts"] + paints[0]["dur"]) / 1000, 3) if paints else None,
+            "phases_ms": {name: round(ms, 3) for name, ms in phases.items()},
+            "sql_queries": sum(1 for event in navigation.events if event["cat"] == "sql"),
+            "sql_gui_thread_ms": round(sql_gui_ms, 3),
+            "widgets_created": sum(navigation.widgets.values()),
+            "widgets_by_class": dict(navigation.widgets.most_common()),
+        }
+
+    def _write(self, navigation: _Navigation, summary: dict) -> Path:
+        pid = os.getpid()
+        gui_tid = threading.main_thread().ident
+        events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "Обувь"}},
+            *(
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                for tid, name in navigation.threads.items()
+            ),
+            # Корневой интервал перехода: в flame graph все фазы GUI-потока вложены в него
+            {
+                "name": f"switch_window {navigation.frame_name}", "cat": "navigation", "ph": "X",
+                "ts": 0, "dur": round(summary["total_ms"] * 1000, 1), "pid": pid, "tid": gui_tid, "args": summary,
+            },
+            *sorted(navigation.events, key=lambda event: (event["ts"], -event["dur"])),
+        ]
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = self.output_dir / f"{stamp}-{navigation.number:03d}-{navigation.frame_name}.json"
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"traceEvents": events, "displayTimeUnit": "ms", "otherData": summary},
+                file, ensure_ascii=False, indent=1,
+            )
+        return path
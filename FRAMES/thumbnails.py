@@ -0,0 +1,213 @@
+import logging
+import os
+from pathlib import Path
+
+from PySide6.QtCore import QObject, QRunnable, QSize, Qt, QThreadPool, Signal
+from PySide6.QtGui import QImage, QImageReader, QPixmap, QPixmapCache
+
+from FRAMES.components import ICONS_DIR, PROJECT_ROOT
+
+# Уменьшенные копии картинок товаров лежат рядом с ICONS/ и переживают перезапуск приложения
+THUMBNAILS_DIR = PROJECT_ROOT / "THUMBNAILS"
+PLACEHOLDER = "picture.png"
+# Лимит QPixmapCache в КБ: около 500 миниатюр 120x120
+PIXMAP_CACHE_LIMIT = 32 * 1024
+
+
+def picture_path(filename) -> Path:
+    """Путь к картинке товара в ICONS/, для отсутствующих файлов — заглушка."""
+    path = ICONS_DIR / Path(filename or PLACEHOLDER).name
+    return path if path.exists() else ICONS_DIR / PLACEHOLDER
+
+
+def thumbnail_key(path: Path, size: int) -> str | None:
+    """Ключ миниатюры: имя файла, размер и время изменения — после замены картинки ключ меняется сам."""
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    return f"{path.name}.{size}.{mtime}"
+
+
+def _stored_path(key: str) -> Path:
+    return THUMBNAILS_DIR / f"{key}.png"
+
+
+def _decode_scaled(path: Path, size: int) -> QImage:
+    """Декодирует картинку сразу в уменьшенном размере (JPEG при этом не раскрывается целиком)."""
+    reader = QImageReader(str(path))
+    reader.setAutoTransform(True)
+    source = reader.size()
+    if source.isValid():
+        reader.setScaledSize(source.scaled(QSize(size, size), Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return image
+    if image.width() > size or image.height() > size:
+        image = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    return image
+
+
+def _store(key: str, image: QImage) -> None:
+    try:
+        THUMBNAILS_DIR.mkdir(parents=True, exist_ok=True)
+        target = _stored_path(key)
+        staged = target.with_name(f".{target.name}.tmp")
+        if image.save(str(staged), "PNG"):
+            os.replace(staged, target)
+        # Миниатюры прежних версий той же картинки больше не понадобятся
+        name, size, _ = key.rsplit(".", 2)
+        for stale in THUMBNAILS_DIR.glob(f"{name}.{size}.*.png"):
+            if stale != target:
+                stale.unlink(missing_ok=True)
+    except OSError as e:
+        logging.error(f"Не удалось сохранить миниатюру {key}: {e}")
+
+
+def load_thumbnail_image(filename, size: int) -> tuple[str | None, QImage]:
+    """
+    Возвращает (ключ, миниатюра) для картинки товара: с диска из THUMBNAILS/,
+    а при её отсутствии — декодирует оригинал и сохраняет результат.
+    Работает только с QImage, поэтому может вызываться вне GUI-потока.
+    """
+    path = picture_path(filename)
+    key = thumbnail_key(path, size)
+    if key is None:
+        return None, QImage()
+    stored = _stored_path(key)
+    if stored.exists():
+        image = QImage(str(stored))
+        if not image.isNull():
+            return key, image
+    image = _decode_scaled(path, size)
+    if not image.isNull():
+        _store(key, image)
+    return key, image
+
+
+def cached_thumbnail(filename, size: int) -> tuple[str | None, QPixmap | None]:
+    """Ищет миниатюру в QPixmapCache без обращения к файлам картинок, кроме stat."""
+    key = thumbnail_key(picture_path(filename), size)
+    if key is None:
+        return None, None
+    return key, QPixmapCache.find(key)
+
+
+def thumbnail_pixmap(filename, size: int) -> QPixmap:
+    """Миниатюра картинки товара для отрисовки в GUI-потоке."""
+    key, pixmap = cached_thumbnail(filename, size)
+    if pixmap is not None:
+        return pixmap
+    key, image = load_thumbnail_image(filename, size)
+    pixmap = QPixmap.fromImage(image)
+    if key is not None and not pixmap.isNull():
+        QPixmapCache.insert(key, pixmap)
+    return pixmap
+
+
+def store_thumbnail(filename, size: int, image: QImage | None) -> None:
+    """Сохраняет готовую миниатюру только что записанной картинки товара — без повторного декодирования."""
+    if image is None or image.isNull():
+        return
+    key = thumbnail_key(picture_path(filename), size)
+    if key is None:
+        return
+    _store(key, image)
+    QPixmapCache.insert(key, QPixmap.fromImage(image))
+
+
+def remove_thumbnails(filename) -> None:
+    """Удаляет миниатюры картинки товара (при удалении самой картинки)."""
+    name = Path(filename).name
+    if not name or not THUMBNAILS_DIR.exists():
+        return
+    for stored in THUMBNAILS_DIR.glob(f"{name}.*.png"):
+        stored.unlink(missing_ok=True)
+
+
+class _DecodeSignals(QObject):
+    decoded = Signal(str, object, object)
+
+
+class _DecodeTask(QRunnable):
+    def __init__(self, filename: str, size: int, signals: _DecodeSignals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.filename = filename
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        try:
+            key, image = load_thumbnail_image(self.filename, self.size)
+        except Exception as e:
+            logging.error(f"Ошибка загрузки миниатюры {self.filename}: {e}")
+            key, image = None, QImage()
+        self.signals.decoded.emit(self.filename, key, image)
+
+
+class ThumbnailLoader(QObject):
+    """
+    Готовит миниатюры в фоновом пуле потоков: pixmap() сразу отвечает из кэша
+    или ставит декодирование в очередь, а по готовности испускается loaded.
+    """
+
+    loaded = Signal(str)
+    VISIBLE_PRIORITY = 1
+    PREFETCH_PRIORITY = 0
+
+    def __init__(self, size: int, parent=None, max_threads: int = 2):
+        super().__init__(parent)
+        self.size = size
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self._signals = _DecodeSignals(self)
+        self._signals.decoded.connect(self._on_decoded)
+        self._pending = {}
+        self._failed = set()
+
+    def pixmap(self, filename) -> QPixmap | None:
+        """Готовая миниатюра или None, если она ещё загружается (загрузка ставится в очередь)."""
+        key, pixmap = cached_thumbnail(filename, self.size)
+        if pixmap is not None:
+            return pixmap
+        if key is None or key in self._failed:
+            return QPixmap()
+        self.request(filename, self.VISIBLE_PRIORITY)
+        return None
+
+    def request(self, filename, priority: int = PREFETCH_PRIORITY) -> None:
+        filename = filename or PLACEHOLDER
+        if filename in self._pending:
+            return
+        task = _DecodeTask(filename, self.size, self._signals)
+        self._pending[filename] = task
+        self.thread_pool.start(task, priority)
+
+    def prefetch(self, filenames) -> None:
+        """Загружает миниатюры рядом с видимой областью, снимая из очереди всё остальное."""
+        wanted = {filename or PLACEHOLDER for filename in filenames}
+        for filename, task in list(self._pending.items()):
+            if filename not in wanted and self.thread_pool.tryTake(task):
+                del self._pending[filename]
+        for filename in wanted:
+            key, pixmap = cached_thumbnail(filename, self.size)
+            if key is not None and pixmap is None and key not in self._failed:
+                self.request(filename)
+
+    def _on_decoded(self, filename: str, key, image) -> None:
+        self._pending.pop(filename, None)
+        if key is None:
+            return
+        if image.isNull():
+            # Битый файл не декодируем повторно на каждой перерисовке
+            self._failed.add(key)
+        else:
+            QPixmapCache.insert(key, QPixmap.fromImage(image))
+        self.loaded.emit(filename)
+
+    def wait_for_done(self, timeout_ms: int = -1) -> bool:
+        return self.thread_pool.waitForDone(timeout_ms)
+
+
+QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), PIXMAP_CACHE_LIMIT))
@@ -1,3 +1,15 @@
+class Session:
+    """
+    Данные текущего входа: профиль пользователя и общие картинки шапки.
+    Создаётся при авторизации, живёт до Storage.clear_all — шапки экранов строятся без запросов к БД и файлам.
+    """
+
+    def __init__(self, profile: dict):
+        self.profile = profile
+        # Логотип, уже масштабированный под размер: {size: QPixmap}
+        self.logos = {}
+
+
 class Storage:
     user_login_pk: str = None
     user_role: str = None
@@ -16,6 +28,9 @@ class Storage:
     # Id выбранного для редактирования заказа
     current_order_id: str = None
 
+    # Сессия авторизованного пользователя
+    session: Session = None
+
     @staticmethod
     def set_item_id(new_id):
         Storage.current_item_id = new_id
@@ -65,6 +80,14 @@ class Storage:
     def get_order_id(): 
         return Storage.current_order_id if Storage.current_order_id else None
 
+    @staticmethod
+    def set_session(new_session: Session):
+        Storage.session = new_session
+
+    @staticmethod
+    def get_session() -> Session:
+        return Storage.session
+
     @staticmethod
     def clear_all():
         """Очищает все временные данные"""
@@ -72,4 +95,5 @@ class Storage:
         Storage.user_role = None
         Storage.current_item_id = None
         Storage.current_order_id = None
+        Storage.session = None
         print("Storage: все данные очищены")
\ No newline at end of file
@@ -1,13 +1,27 @@
+import time
+
+# Отсчёт времени запуска — до импорта PySide6 и остальных модулей
+STARTED = time.time()
+
+import argparse
+import json
 import logging
+import os
+import statistics
+import subprocess
 import sys
+from contextlib import nullcontext
 from pathlib import Path
 
-from PySide6.QtGui import QFont, QIcon
+from PySide6.QtCore import QEvent, QObject, Signal
+from PySide6.QtGui import QFont, QIcon, QKeySequence, QShortcut
 from PySide6.QtWidgets import QApplication, QMainWindow, QStackedWidget
 
+import Messages
 import styles
-from DATABASE import Database
+from DATABASE.AsyncQueries import AsyncQueryRunner
 from FRAMES import LogInWindow
+from FRAMES.profiler import FrameProfiler
 
 
 logging.basicConfig(
@@ -17,12 +31,63 @@ logging.basicConfig(
 )
 
 
+def connect_database():
+    """Подключение к БД для фонового потока: psycopg и модуль БД импортируются здесь, а не при запуске."""
+    from DATABASE import Database
+
+    database = Database.DatabaseConnection()
+    if not database.ensure_connection():
+        database.close()
+        raise ConnectionError("сервер базы данных недоступен")
+    database.start_catalog_listener()
+    return database
+
+
+class StartupTimer(QObject):
+    """
+    Замер холодного старта: время от запуска процесса до первого кадра окна входа и до готовности БД.
+    Точка отсчёта — APP_STARTUP_T0 из окружения (её задаёт measure_startup) или начало импорта app.py.
+    """
+
+    def __init__(self, quit_when_done: bool = False, parent=None):
+        super().__init__(parent)
+        self.started = float(os.environ.get("APP_STARTUP_T0", STARTED))
+        self.quit_when_done = quit_when_done
+        self.marks = {}
+
+    def mark(self, name: str) -> None:
+        if name in self.marks:
+            return
+        self.marks[name] = round((time.time() - self.started) * 1000, 1)
+        logging.info(f"Запуск: {name} через {self.marks[name]} мс")
+        if self.quit_when_done and {"first_frame_ms", "database_ready_ms"} <= self.marks.keys():
+            print(json.dumps(self.marks), flush=True)
+            QApplication.quit()
+
+    def eventFilter(self, watched, event) -> bool:
+        if event.type() == QEvent.Type.Paint:
+            watched.removeEventFilter(self)
+            self.mark("first_frame_ms")
+        return False
+
+
+class CatalogSignals(QObject):
+    # Испускается из потока CatalogListener, слот выполняется в GUI-потоке
+    changed = Signal()
+
+
 class MainApplicationClass(QMainWindow):
-    def __init__(self):
+    def __init__(self, startup_timer: StartupTimer | None = None, profile_dir=None):
         super().__init__()
         self.setWindowTitle("Обувь")
         self.setMinimumSize(600, 800)
-        self.db = Database.DatabaseConnection()
+        self.startup_timer = startup_timer
+        # Окно входа показывается сразу, подключение к БД идёт в фоне (см. on_database_ready)
+        self.db = None
+        self.queries = AsyncQueryRunner(self)
+        # Профилирование переходов между экранами (--profile-frames)
+        self.frame_profiler = FrameProfiler(profile_dir, self) if profile_dir else None
+        self.queries.tracer = self.frame_profiler
 
         self.frame_container = QStackedWidget()
         self.setCentralWidget(self.frame_container)
@@ -31,25 +96,111 @@ class MainApplicationClass(QMainWindow):
         self.frame_container.addWidget(login_frame)
         self.frame_container.setCurrentWidget(login_frame)
         self.frames_cache = {"LogInFrame": login_frame}
+        if startup_timer is not None:
+            login_frame.installEventFilter(startup_timer)
+        self.queries.submit(connect_database, on_done=self.on_database_ready, on_error=self.on_database_failed)
+        # Выгрузка статистики запросов из работающего приложения
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, activated=self.dump_query_stats)
+        # Экраны, данные которых устарели: имя -> id изменённых записей (None — обновить всё)
+        self.stale_frames = {}
+        self.catalog_signals = CatalogSignals(self)
+        self.catalog_signals.changed.connect(self.on_catalog_changed)
+        self.catalog_listener = self.catalog_signals.changed.emit
+
+    def on_database_ready(self, database):
+        self.db = database
+        if database.pool is None:
+            # Без пула все запросы идут через одно подключение — параллельные потоки только ждали бы друг друга
+            self.queries.thread_pool.setMaxThreadCount(1)
+        if self.frame_profiler is not None:
+            self.frame_profiler.watch_database(database)
+        from DATABASE.CatalogCache import catalog_cache
+
+        catalog_cache.add_listener(self.catalog_listener)
+        self.frames_cache["LogInFrame"].set_database_ready(True)
+        if self.startup_timer is not None:
+            self.startup_timer.mark("database_ready_ms")
+
+    def on_database_failed(self, message):
+        logging.error(f"Не удалось подключиться к БД: {message}")
+        Messages.show_error(f"Не удалось подключиться к базе данных: {message}")
+
+    def on_catalog_changed(self):
+        """Каталог или заказы изменили с другого клиента: списки перечитываются, открытый на экране — сразу."""
+        for name in ("HomeFrame", "OrdersCardsFrame"):
+            self.refresh_frame(name)
+        frame = self.frame_container.currentWidget()
+        name = type(frame).__name__
+        if name in self.stale_frames:
+            frame.refresh(self.stale_frames.pop(name))
+
+    def dump_query_stats(self):
+        if self.db is None:
+            return
+        path = Path(__file__).resolve().parent / "query_stats.json"
+        try:
+            self.db.query_stats.dump(path)
+        except OSError as error:
+            Messages.show_error(f"Не удалось сохранить статистику запросов: {error}")
+            return
+        logging.info(f"Статистика запросов сохранена: {path}")
+        Messages.show_info(f"Статистика запросов сохранена в {path}", "Статистика")
+
+    def close_database(self):
+        if self.db is not None:
+            from DATABASE.CatalogCache import catalog_cache
+
+            catalog_cache.remove_listener(self.catalog_listener)
+            self.db.close()
 
     def switch_window(self, frame_class):
         """Открывает единственный закэшированный экземпляр указанного экрана."""
         name = frame_class.__name__
+        if self.frame_profiler is not None:
+            self.frame_profiler.begin(name)
         frame = self.frames_cache.get(name)
         if frame is None:
-            frame = frame_class(self)
+            with self.profile_phase("construct"):
+                frame = frame_class(self)
             self.frames_cache[name] = frame
             self.frame_container.addWidget(frame)
-        self.frame_container.setCurrentWidget(frame)
+        elif name in self.stale_frames:
+            with self.profile_phase("refresh"):
+                frame.refresh(self.stale_frames.pop(name))
+        if self.frame_profiler is not None:
+            self.frame_profiler.show(frame, self.frame_container)
+        else:
+            self.frame_container.setCurrentWidget(frame)
+
+    def profile_phase(self, name: str):
+        return self.frame_profiler.phase(name) if self.frame_profiler is not None else nullcontext()
 
     def invalidate_frame(self, frame_or_name) -> None:
         """Удаляет экран из кэша, чтобы при следующем открытии загрузились актуальные данные."""
         name = frame_or_name if isinstance(frame_or_name, str) else frame_or_name.__name__
         frame = self.frames_cache.pop(name, None)
+        self.stale_frames.pop(name, None)
         if frame is not None:
             self.frame_container.removeWidget(frame)
             frame.deleteLater()
 
+    def refresh_frame(self, frame_or_name, changed=None) -> None:
+        """
+        Помечает экран устаревшим: виджеты остаются, при следующем открытии экран перечитает только данные
+        :param changed: id изменённых записей; None — обновить всё
+        """
+        name = frame_or_name if isinstance(frame_or_name, str) else frame_or_name.__name__
+        frame = self.frames_cache.get(name)
+        if frame is None:
+            return
+        if not hasattr(frame, "refresh"):
+            self.invalidate_frame(name)
+            return
+        if name in self.stale_frames:
+            pending = self.stale_frames[name]
+            changed = None if pending is None or changed is None else pending | set(changed)
+        self.stale_frames[name] = None if changed is None else set(changed)
+
     def clear_cache_except(self, frame_names) -> None:
         for name in list(self.frames_cache):
             if name not in frame_names:
@@ -59,15 +210,48 @@ class MainApplicationClass(QMainWindow):
         self.invalidate_frame(frame_class)
 
 
+def measure_startup(runs: int) -> dict:
+    """Запускает приложение runs раз в отдельных процессах и возвращает медиану и минимум времени запуска."""
+    samples = []
+    for _ in range(runs):
+        env = dict(os.environ, APP_STARTUP_T0=repr(time.time()))
+        output = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), "--startup-time"],
+            env=env, capture_output=True, text=True, timeout=120,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        name: {
+            "median": round(statistics.median(sample[name] for sample in samples), 1),
+            "min": min(sample[name] for sample in samples),
+        }
+        for name in samples[0]
+    } | {"runs": runs}
+
+
 def main() -> int:
-    application = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Магазин обуви")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="замерить время до первого кадра и готовности БД, вывести JSON и выйти")
+    parser.add_argument("--startup-runs", type=int,
+                        help="замерить холодный старт в N отдельных процессах и вывести медиану в JSON")
+    parser.add_argument("--profile-frames", nargs="?", const=str(Path(__file__).resolve().parent / "profiles"),
+                        metavar="DIR", help="писать профиль каждого перехода между экранами (Chrome trace) в DIR")
+    args, qt_args = parser.parse_known_args()
+    if args.startup_runs:
+        print(json.dumps(measure_startup(args.startup_runs), ensure_ascii=False))
+        return 0
+
+    application = QApplication(sys.argv[:1] + qt_args)
     icon_path = Path(__file__).resolve().parent / "ICONS" / "Icon.jpg"
     if icon_path.exists():
         application.setWindowIcon(QIcon(str(icon_path)))
     application.setFont(QFont("Times New Roman"))
     application.setStyleSheet(styles.styles_sheet)
 
-    window = MainApplicationClass()
+    window = MainApplicationClass(StartupTimer(quit_when_done=args.startup_time), args.profile_frames)
+    application.aboutToQuit.connect(lambda: window.queries.wait_for_done(3000))
+    application.aboutToQuit.connect(window.close_database)
     window.show()
     return application.exec()
 
@@ -123,6 +123,10 @@ QWidget {
 }
 
 /* Карточки товаров */
+#items_view {
+    border: none;
+}
+
 #item_card {
     border: 3px solid black;
     background: white;